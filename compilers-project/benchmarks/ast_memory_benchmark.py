@@ -0,0 +1,58 @@
+import sys
+import tracemalloc
+from typing import Iterable
+from compiler import ast
+from compiler.arena import arena_from_tree
+from compiler.parser import parse
+from compiler.token_buffer import TokenLike, tokenize_buffer
+from compiler.tokenizer import tokenize
+from compiler.visitor import walk
+from .program_generator import ProgramShape, generate_program
+
+
+def measure_ast(tokens: Iterable[TokenLike]) -> tuple[int, int]:
+    """Returns the number of AST nodes parsed from `tokens` and the memory
+    in bytes that the AST keeps allocated, not counting the tokens."""
+    tracemalloc.start()
+    ast_node = parse(tokens)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert isinstance(ast_node, ast.Expression)
+    return sum(1 for _ in walk(ast_node)), size
+
+
+def measure_arena(ast_node: ast.Expression) -> int:
+    """Returns the memory in bytes that an arena of `ast_node` keeps
+    allocated, not counting the locations and types it shares with it."""
+    tracemalloc.start()
+    arena = arena_from_tree(ast_node)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert len(arena) > 0
+    return size
+
+
+def main() -> None:
+    length = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    source_code = generate_program(ProgramShape(length=length, depth=3, chain=4))
+    print(f'source size: {len(source_code)} characters')
+
+    # Nodes parsed from a list[Token] share the locations of the tokens,
+    # while a TokenBuffer creates a location for each node.
+    sources: list[tuple[str, Iterable[TokenLike]]] = [
+        ('list[Token]', tokenize('benchmark', source_code)),
+        ('TokenBuffer', tokenize_buffer('benchmark', source_code))
+    ]
+    for name, tokens in sources:
+        count, size = measure_ast(tokens)
+        print(f'{name}: {count:,} nodes, {size:,} bytes, '
+              f'{size / count:.1f} bytes/node')
+
+    ast_node = parse(sources[0][1])
+    assert ast_node is not None
+    size = measure_arena(ast_node)
+    print(f'AstArena: {size:,} bytes, {size / count:.1f} bytes/node')
+
+
+if __name__ == '__main__':
+    main()
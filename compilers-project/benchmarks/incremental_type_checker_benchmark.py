@@ -0,0 +1,52 @@
+import re
+import sys
+import time
+from compiler.incremental_type_checker import IncrementalTypeChecker
+from compiler.parser import parse
+from compiler.symtab import SymTab
+from compiler.tokenizer import tokenize
+from compiler.type_checker import typecheck
+from .program_generator import ProgramShape, generate_program
+from .run_benchmarks import best_time
+
+
+def main() -> None:
+    length = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    rounds = 5
+    source_code = generate_program(ProgramShape(length=length, depth=3, chain=4))
+    print(f'source size: {len(source_code)} characters')
+
+    # Each edit changes one integer literal in the middle of the program.
+    numbers = list(re.finditer(r'\b\d+\b', source_code))
+    number = numbers[len(numbers) // 2]
+    edits = [source_code[:number.start()] + str(1000 + i) +
+             source_code[number.end():] for i in range(rounds)]
+
+    edited = parse(tokenize('benchmark', edits[0]))
+    assert edited is not None
+    full_seconds = best_time(
+        lambda: typecheck(edited, SymTab(locals={})), rounds)
+    print(f'full check: {full_seconds * 1000:.1f} ms')
+
+    # Programs are hash-consed while they are parsed, so the statements that
+    # an edit did not change are the nodes that were checked before.
+    checker = IncrementalTypeChecker()
+    root = parse(tokenize('benchmark', source_code), nodes=checker.nodes)
+    assert root is not None
+    checker.typecheck(root, SymTab(locals={}))
+    incremental_seconds = []
+    for edit in edits:
+        tree = parse(tokenize('benchmark', edit), nodes=checker.nodes)
+        assert tree is not None
+        checker.hits = checker.misses = 0
+        start = time.perf_counter()
+        checker.typecheck(tree, SymTab(locals={}))
+        incremental_seconds.append(time.perf_counter() - start)
+    print(f'incremental check after an edit: '
+          f'{min(incremental_seconds) * 1000:.1f} ms, '
+          f'{checker.hits} hits, {checker.misses} misses, '
+          f'hit ratio {checker.hit_ratio:.3f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+import random
+from dataclasses import dataclass
+
+
+@dataclass
+class ProgramShape:
+    """Axes along which generated programs scale."""
+    # Number of top-level statements
+    length: int = 100
+    # Nesting depth of blocks, if and while statements
+    depth: int = 2
+    # Number of binary operators in each arithmetic expression
+    chain: int = 3
+    # Probability of a comment after each statement
+    comment_density: float = 0.1
+    seed: int = 0
+
+
+class ProgramGenerator:
+    """Generates well-typed programs of a given shape. The same shape and
+    seed always produce the same program."""
+
+    def __init__(self, shape: ProgramShape) -> None:
+        self.shape = shape
+        self.random = random.Random(shape.seed)
+        self.lines: list[str] = []
+        self.scopes: list[list[str]] = []
+        self.next_variable = 0
+
+    def emit(self, line: str) -> None:
+        indent = '    ' * len(self.scopes)
+        self.lines.append(indent + line)
+        if self.random.random() < self.shape.comment_density:
+            self.emit_comment()
+
+    def emit_comment(self) -> None:
+        indent = '    ' * len(self.scopes)
+        style = self.random.randrange(3)
+        if style == 0:
+            self.lines.append(f'{indent}# note {len(self.lines)}')
+        elif style == 1:
+            self.lines.append(f'{indent}// note {len(self.lines)}')
+        else:
+            self.lines.append(f'{indent}/* note\n{indent}   {len(self.lines)} */')
+
+    def variable(self) -> str:
+        scope = self.random.choice([scope for scope in self.scopes if scope])
+        return self.random.choice(scope)
+
+    def declare(self) -> str:
+        name = f'v{self.next_variable}'
+        self.next_variable += 1
+        self.scopes[-1].append(name)
+        return name
+
+    def operand(self) -> str:
+        if self.random.random() < 0.5:
+            return self.variable()
+        return str(self.random.randrange(1, 100))
+
+    def int_expression(self) -> str:
+        parts = [self.operand()]
+        for _ in range(self.shape.chain):
+            parts.append(self.random.choice(['+', '-', '*', '/', '%']))
+            parts.append(self.operand())
+        return ' '.join(parts)
+
+    def bool_expression(self) -> str:
+        comparison = self.random.choice(['<', '<=', '>', '>=', '==', '!='])
+        condition = f'{self.variable()} {comparison} {self.operand()}'
+        if self.random.random() < 0.3:
+            condition = f'not ({condition})'
+        if self.random.random() < 0.3:
+            condition += f' and {self.variable()} < {self.operand()}'
+        return condition
+
+    def simple_statement(self) -> None:
+        kind = self.random.randrange(3)
+        if kind == 0:
+            value = self.int_expression()
+            self.emit(f'var {self.declare()} = {value};')
+        elif kind == 1:
+            self.emit(f'{self.variable()} = {self.int_expression()};')
+        else:
+            self.emit(f'print_int({self.int_expression()});')
+
+    def block(self, depth: int, statements: int) -> None:
+        value = self.operand()
+        self.scopes.append([])
+        self.emit(f'var {self.declare()} = {value};')
+        for _ in range(statements):
+            self.simple_statement()
+        if depth > 0:
+            self.compound_statement(depth - 1)
+        self.emit(f'{self.variable()}')
+        self.scopes.pop()
+
+    def compound_statement(self, depth: int) -> None:
+        kind = self.random.randrange(3)
+        if kind == 0:
+            # Only one branch nests further to keep the size linear in depth.
+            self.emit(f'if {self.bool_expression()} then {{')
+            self.block(depth, 1)
+            self.emit('} else {')
+            self.block(0, 1)
+            self.emit('};')
+        elif kind == 1:
+            self.emit(f'while {self.bool_expression()} do {{')
+            self.block(depth, 1)
+            self.emit('};')
+        else:
+            self.emit('{')
+            self.block(depth, 1)
+            self.emit('};')
+
+    def generate(self) -> str:
+        self.emit('{')
+        self.scopes.append([])
+        self.emit(f'var {self.declare()} = 1;')
+        for i in range(self.shape.length):
+            if self.shape.depth > 0 and i % 10 == 9:
+                self.compound_statement(self.shape.depth - 1)
+            else:
+                self.simple_statement()
+        self.emit(f'print_int({self.variable()})')
+        self.scopes.pop()
+        self.emit('}')
+        return '\n'.join(self.lines) + '\n'
+
+
+def generate_program(shape: ProgramShape) -> str:
+    return ProgramGenerator(shape).generate()
@@ -0,0 +1,34 @@
+import sys
+import time
+from compiler.token_buffer import SourceEdit, retokenize, tokenize_buffer
+from .tokenizer_benchmark import generate_source
+
+
+def main() -> None:
+    copies = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    source_code = generate_source(copies)
+    print(f'source size: {len(source_code)} characters')
+
+    start = time.perf_counter()
+    buffer = tokenize_buffer('benchmark', source_code)
+    print(f'full tokenize: {(time.perf_counter() - start) * 1000:.2f} ms')
+
+    # Rename a variable in the middle of the source, type a character in a
+    # comment and then replace an operator.
+    offset = source_code.index('x = x + 1', len(source_code) // 2)
+    comment = source_code.index('counter', offset)
+    edits = [
+        SourceEdit(offset, 1, 'y'),
+        SourceEdit(comment, 0, 'x'),
+        SourceEdit(offset + 6, 1, '-')
+    ]
+    for edit in edits:
+        start = time.perf_counter()
+        change = retokenize(buffer, edit)
+        elapsed = time.perf_counter() - start
+        print(f'retokenize {edit}: {elapsed * 1000:.2f} ms, '
+              f'{change.new_end - change.start} tokens changed')
+
+
+if __name__ == '__main__':
+    main()
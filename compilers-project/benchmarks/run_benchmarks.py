@@ -0,0 +1,189 @@
+import argparse
+import dataclasses
+import json
+import math
+import platform
+import subprocess
+import time
+import tracemalloc
+from typing import Any, Callable
+from compiler.tokenizer import tokenize
+from compiler.parser import parse
+from .program_generator import ProgramShape, generate_program
+
+# Values of each axis. The other axes keep their default values.
+axes: dict[str, list[Any]] = {
+    'length': [250, 500, 1000, 2000, 4000],
+    'depth': [1, 4, 8, 16, 32],
+    'chain': [1, 4, 16, 64, 256],
+    'comment_density': [0.0, 0.25, 0.5, 1.0],
+}
+
+quick_axes: dict[str, list[Any]] = {
+    'length': [100, 200, 400],
+    'depth': [1, 4, 8],
+    'chain': [1, 8, 64],
+    'comment_density': [0.0, 0.5, 1.0],
+}
+
+default_shape = ProgramShape(length=200, depth=2, chain=3, comment_density=0.1)
+
+
+def best_time(function: Callable[[], Any], rounds: int) -> float:
+    best = math.inf
+    for _ in range(rounds):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def peak_memory(function: Callable[[], Any]) -> int:
+    tracemalloc.start()
+    function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def measure(shape: ProgramShape, rounds: int) -> dict[str, Any]:
+    source_code = generate_program(shape)
+    tokens = tokenize('benchmark', source_code)
+    result: dict[str, Any] = {
+        'shape': dataclasses.asdict(shape),
+        'characters': len(source_code),
+        'tokens': len(tokens),
+    }
+
+    try:
+        tokenize_seconds = best_time(
+            lambda: tokenize('benchmark', source_code), rounds)
+        parse_seconds = best_time(lambda: parse(tokens), rounds)
+        peak = peak_memory(lambda: parse(tokenize('benchmark', source_code)))
+    except RecursionError:
+        result['error'] = 'recursion limit exceeded'
+        return result
+
+    result.update({
+        'tokenize_seconds': tokenize_seconds,
+        'parse_seconds': parse_seconds,
+        'tokenize_tokens_per_second': len(tokens) / tokenize_seconds,
+        'parse_tokens_per_second': len(tokens) / parse_seconds,
+        'peak_memory_bytes': peak,
+    })
+    return result
+
+
+def scaling_exponent(points: list[dict[str, Any]], key: str) -> float | None:
+    """Least-squares slope of log(time) against log(program size in
+    characters). About 1 means linear scaling."""
+    measured = [(math.log(p['characters']), math.log(p[key]))
+                for p in points if key in p]
+    if len(measured) < 2:
+        return None
+    mean_x = sum(x for x, _ in measured) / len(measured)
+    mean_y = sum(y for _, y in measured) / len(measured)
+    variance = sum((x - mean_x) ** 2 for x, _ in measured)
+    if variance == 0:
+        return None
+    return sum((x - mean_x) * (y - mean_y) for x, y in measured) / variance
+
+
+def git_commit() -> str | None:
+    try:
+        result = subprocess.run(['git', 'rev-parse', 'HEAD'],
+                                capture_output=True, text=True, check=True)
+        return result.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(axes: dict[str, list[Any]], rounds: int) -> dict[str, Any]:
+    results: dict[str, list[dict[str, Any]]] = {}
+    scaling: dict[str, dict[str, float | None]] = {}
+
+    for axis, values in axes.items():
+        results[axis] = []
+        for value in values:
+            shape = dataclasses.replace(default_shape, **{axis: value})
+            point = measure(shape, rounds)
+            results[axis].append(point)
+            print_point(axis, value, point)
+
+        scaling[axis] = {
+            'tokenize': scaling_exponent(results[axis], 'tokenize_seconds'),
+            'parse': scaling_exponent(results[axis], 'parse_seconds'),
+        }
+        print(f'  scaling exponent: {scaling[axis]}')
+
+    return {
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'results': results,
+        'scaling': scaling,
+    }
+
+
+def print_point(axis: str, value: Any, point: dict[str, Any]) -> None:
+    if 'error' in point:
+        print(f'{axis}={value}: {point["tokens"]} tokens, {point["error"]}')
+        return
+    print(f'{axis}={value}: {point["tokens"]} tokens, '
+          f'tokenize {point["tokenize_tokens_per_second"]:,.0f} tokens/s, '
+          f'parse {point["parse_tokens_per_second"]:,.0f} tokens/s, '
+          f'peak {point["peak_memory_bytes"]:,} bytes')
+
+
+def compare(baseline: dict[str, Any], current: dict[str, Any],
+            threshold: float) -> int:
+    """Prints the throughput of `current` relative to `baseline` and returns
+    the number of measurements that got slower by more than `threshold`."""
+    regressions = 0
+    for axis, points in current['results'].items():
+        for old, new in zip(baseline['results'].get(axis, []), points):
+            if old['shape'] != new['shape']:
+                continue
+            for key in ['tokenize_tokens_per_second', 'parse_tokens_per_second']:
+                if key not in old or key not in new:
+                    continue
+                ratio = new[key] / old[key]
+                marker = ''
+                if ratio < 1 - threshold:
+                    marker = '  <-- regression'
+                    regressions += 1
+                print(f'{axis}={new["shape"][axis]} {key}: {ratio:.2f}x{marker}')
+    return regressions
+
+
+def main() -> int:
+    arg_parser = argparse.ArgumentParser(
+        description='Benchmarks the tokenizer and the parser on generated programs.')
+    arg_parser.add_argument('--output', default='benchmark_results.json',
+                            help='file to save the results to as JSON')
+    arg_parser.add_argument('--compare', metavar='BASELINE',
+                            help='JSON results of an earlier run to compare with')
+    arg_parser.add_argument('--threshold', type=float, default=0.1,
+                            help='relative slowdown reported as a regression')
+    arg_parser.add_argument('--rounds', type=int, default=5)
+    arg_parser.add_argument('--quick', action='store_true',
+                            help='use smaller programs')
+    args = arg_parser.parse_args()
+
+    results = run(quick_axes if args.quick else axes, args.rounds)
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f'Results saved to {args.output}')
+
+    if args.compare is not None:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, results, args.threshold)
+        print(f'{regressions} regressions')
+        return 1 if regressions > 0 else 0
+
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,36 @@
+import pickle
+import sys
+from typing import Any, Callable
+from compiler.parser import parse
+from compiler.serialization import deserialize, serialize
+from compiler.symtab import SymTab
+from compiler.tokenizer import tokenize
+from compiler.type_checker import typecheck
+from .program_generator import ProgramShape, generate_program
+from .run_benchmarks import best_time
+
+
+def main() -> None:
+    length = int(sys.argv[1]) if len(sys.argv) > 1 else 3000
+    rounds = 5
+    source_code = generate_program(ProgramShape(length=length, depth=3, chain=4))
+    ast_node = parse(tokenize('benchmark', source_code))
+    assert ast_node is not None
+    typecheck(ast_node, SymTab(locals={}))
+    print(f'source size: {len(source_code)} characters')
+
+    formats: list[tuple[str, Callable[[], bytes], Callable[[bytes], Any]]] = [
+        ('pickle', lambda: pickle.dumps(ast_node, pickle.HIGHEST_PROTOCOL),
+         pickle.loads),
+        ('compact', lambda: serialize(ast_node), deserialize),
+    ]
+    for name, dump, load in formats:
+        data = dump()
+        dump_seconds = best_time(dump, rounds)
+        load_seconds = best_time(lambda: load(data), rounds)
+        print(f'{name}: {len(data):,} bytes, dump {dump_seconds * 1000:.1f} ms, '
+              f'load {load_seconds * 1000:.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
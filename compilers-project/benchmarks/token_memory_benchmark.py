@@ -0,0 +1,34 @@
+import sys
+import tracemalloc
+from typing import Callable, Sized
+from compiler.tokenizer import tokenize
+from compiler.token_buffer import tokenize_buffer
+from .tokenizer_benchmark import generate_source
+
+
+def measure_peak(tokenize_function: Callable[[str, str], Sized],
+                 source_code: str) -> tuple[int, int]:
+    """Returns the number of tokens and the peak memory use in bytes."""
+    tracemalloc.start()
+    tokens = tokenize_function('benchmark', source_code)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return len(tokens), peak
+
+
+def main() -> None:
+    copies = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    source_code = generate_source(copies)
+    print(f'source size: {len(source_code)} characters')
+
+    tokenizers: list[tuple[str, Callable[[str, str], Sized]]] = [
+        ('list[Token]', tokenize),
+        ('TokenBuffer', tokenize_buffer)
+    ]
+    for name, tokenize_function in tokenizers:
+        count, peak = measure_peak(tokenize_function, source_code)
+        print(f'{name}: peak {peak:,} bytes, {peak / count:.1f} bytes/token')
+
+
+if __name__ == '__main__':
+    main()
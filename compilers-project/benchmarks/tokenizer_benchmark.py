@@ -0,0 +1,55 @@
+import sys
+import time
+from typing import Callable, Sized
+from compiler.tokenizer import tokenize
+from compiler.token_buffer import tokenize_buffer, tokenize_bytes
+
+# A snippet that uses every kind of token and both comment styles.
+snippet = '''{
+    var x: Int = 0; // counter
+    var done = false;
+    /* loop until
+       done */
+    while not done and x < 1000 do {
+        x = x + 1 * (2 - 3) % 4;
+        if x >= 10 or x == null then done = true else print_int(x);
+    }
+    # trailing comment
+}
+'''
+
+
+def generate_source(copies: int) -> str:
+    return snippet * copies
+
+
+def benchmark_tokenize(tokenize_function: Callable[[], Sized],
+                       rounds: int) -> float:
+    """Returns the best tokenizing speed of the rounds in tokens per second."""
+    best = 0.0
+    for _ in range(rounds):
+        start = time.perf_counter()
+        tokens = tokenize_function()
+        elapsed = time.perf_counter() - start
+        best = max(best, len(tokens) / elapsed)
+    return best
+
+
+def main() -> None:
+    copies = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    source_code = generate_source(copies)
+    source_bytes = source_code.encode()
+    print(f'source size: {len(source_code)} characters')
+
+    tokenizers: list[tuple[str, Callable[[], Sized]]] = [
+        ('tokenize', lambda: tokenize('benchmark', source_code)),
+        ('tokenize_buffer', lambda: tokenize_buffer('benchmark', source_code)),
+        ('tokenize_bytes', lambda: tokenize_bytes('benchmark', source_bytes))
+    ]
+    for name, tokenize_function in tokenizers:
+        tokens_per_second = benchmark_tokenize(tokenize_function, rounds=5)
+        print(f'{name}: {tokens_per_second:,.0f} tokens/s')
+
+
+if __name__ == '__main__':
+    main()
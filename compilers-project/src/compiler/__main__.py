@@ -1,8 +1,14 @@
+import os
 import sys
-from .tokenizer import tokenize
-from .parser import parse
+from typing import Iterator
+from . import ast, ir
+from .batch import front_end_files
+from .cache import FrontEndCache, tokenize_and_parse
 from .interpreter import interpret
-from .type_checker import typecheck
+from .parser import parse_iter
+from .resolver import resolve, resolve_statements
+from .tokenizer import tokenize_stream
+from .type_checker import typecheck, typecheck_statements
 from .ir_generator import generate_ir
 from .assembly_generator import generate_assembly
 from .assembler import assemble
@@ -16,26 +22,42 @@ Usage: {sys.argv[0]} <command> [source_code_file]
 Command 'interpret':
     Runs the interpreter on source code.
 
+Command 'parse' [source_code_file ...]:
+    Tokenizes and parses any number of files in parallel and reports the
+    result of each. An error in one file does not stop the others.
+    --jobs=N                Number of worker processes. Defaults to the
+                            number of available cores.
+
 Common arguments:
     source_code_file        Optional. Defaults to standard input if missing.
+    --no-cache              Do not use the token and AST cache in the
+                            directory given by $COMPILER_CACHE_DIR.
  """.strip() + "\n"
 
 
 def main() -> int:
     command: str | None = None
-    input_file: str | None = None
+    input_files: list[str] = []
+    use_cache = True
+    jobs: int | None = None
     for arg in sys.argv[1:]:
         if arg in ['-h', '--help']:
             print(usage)
             return 0
+        elif arg == '--no-cache':
+            use_cache = False
+        elif arg.startswith('--jobs='):
+            jobs = int(arg.removeprefix('--jobs='))
         elif arg.startswith('-'):
             raise Exception(f"Unknown argument: {arg}")
         elif command is None:
             command = arg
-        elif input_file is None:
-            input_file = arg
         else:
-            raise Exception("Multiple input files not supported")
+            input_files.append(arg)
+
+    if command != 'parse' and len(input_files) > 1:
+        raise Exception("Multiple input files not supported")
+    input_file = input_files[0] if input_files else None
 
     def read_source_code() -> str:
         if input_file is not None:
@@ -51,88 +73,125 @@ def main() -> int:
     if input_file is None:
         input_file = 'no_file'
 
-    if command == 'test_prints':
+    cache_dir = os.environ.get('COMPILER_CACHE_DIR')
+    cache = FrontEndCache(cache_dir) if use_cache and cache_dir else None
+
+    def parse_statements(
+            syntax_errors: list[str]) -> Iterator[ast.Expression]:
+        # Without a cache, top-level statements are parsed and passed on
+        # one at a time while the source is still being read, and syntax
+        # errors are added to `syntax_errors`. With a cache, they are raised.
+        if cache is not None:
+            _, ast_node = tokenize_and_parse(input_file, read_source_code(),
+                                             cache)
+            if ast_node is None:
+                raise Exception('AST node was none')
+            yield ast_node
+        elif input_files:
+            with open(input_file) as f:
+                yield from parse_iter(tokenize_stream(input_file, f),
+                                      diagnostics=syntax_errors)
+        else:
+            yield from parse_iter(tokenize_stream(input_file, sys.stdin),
+                                  diagnostics=syntax_errors)
+
+    def check_statements() -> Iterator[ast.Expression]:
+        # Statements are parsed and checked to the end of the program so
+        # that all errors are reported together, but the IR generator gets
+        # no more statements after the first error. Type errors are only
+        # reported if the program parses.
+        typechecker_symtab = SymTab(locals={})
+        syntax_errors: list[str] = []
+        diagnostics: list[str] = []
+        for statement in typecheck_statements(
+                resolve_statements(parse_statements(syntax_errors),
+                                   diagnostics=diagnostics),
+                typechecker_symtab, diagnostics):
+            if not syntax_errors and not diagnostics:
+                yield statement
+        if syntax_errors or diagnostics:
+            raise Exception('\n'.join(syntax_errors or diagnostics))
+
+    def generate_program_ir() -> list[ir.Instruction]:
+        return generate_ir(root_types, check_statements())
+
+    if command == 'parse':
+        if not input_files:
+            raise Exception("No input files given")
+        failed = 0
+        for file_result in front_end_files(input_files, jobs,
+                                           cache_dir if use_cache else None):
+            if file_result.error is not None:
+                failed += 1
+                print(f'{file_result.input_file}: error: {file_result.error}')
+            else:
+                assert file_result.tokens is not None
+                print(f'{file_result.input_file}: {len(file_result.tokens)} tokens')
+        return 1 if failed > 0 else 0
+
+    elif command == 'test_prints':
         source_code = read_source_code()
 
+        tokens, ast_node = tokenize_and_parse(input_file, source_code, cache)
+
         print('------- Tokens --------')
-        tokens = tokenize(input_file, source_code)
         for token in tokens:
             print(token)
 
         print('------- AST --------')
-        ast_node = parse(tokens)
         if ast_node is None:
             raise Exception('AST node was none')
         print(ast_node)
 
+        resolve(ast_node)
+
         print('------- Interpreter --------')
-        interpreter_symtab = SymTab(locals=interpreter_locals, parent=None)
+        interpreter_symtab = SymTab(locals=interpreter_locals)
         result = interpret(ast_node, interpreter_symtab)
         print(result)
 
         print('------- Typechecker --------')
-        typechecker_symtab = SymTab(locals={}, parent=None)
+        typechecker_symtab = SymTab(locals={})
         check_type = typecheck(ast_node, typechecker_symtab)
         print(check_type)
 
         print('------- IR --------')
-        ir = generate_ir(root_types, ast_node)
-        print('\n'.join([str(ins) for ins in ir]))
+        ir_instructions = generate_ir(root_types, ast_node)
+        print('\n'.join([str(ins) for ins in ir_instructions]))
 
         print('------- Assembly --------')
-        asm_code = generate_assembly(ir)
+        asm_code = generate_assembly(ir_instructions)
         print(asm_code)
 
     elif command == 'interpret':
         source_code = read_source_code()
-        tokens = tokenize(input_file, source_code)
-        ast_node = parse(tokens)
+        _, ast_node = tokenize_and_parse(input_file, source_code, cache)
         if ast_node is None:
             raise Exception('AST node was none')
-        interpreter_symtab = SymTab(locals=interpreter_locals, parent=None)
+        resolve(ast_node)
+        interpreter_symtab = SymTab(locals=interpreter_locals)
         result = interpret(ast_node, interpreter_symtab)
         print(result)
-        typechecker_symtab = SymTab(locals={}, parent=None)
+        typechecker_symtab = SymTab(locals={})
         check_type = typecheck(ast_node, typechecker_symtab)
         print(check_type)
 
     elif command == 'ir':
-        source_code = read_source_code()
-        tokens = tokenize(input_file, source_code)
-        ast_node = parse(tokens)
-        if ast_node is None:
-            raise Exception('AST node was none')
-        typechecker_symtab = SymTab(locals={}, parent=None)
-        typecheck(ast_node, typechecker_symtab)
-        ir_instructions = generate_ir(root_types, ast_node)
+        ir_instructions = generate_program_ir()
         print('\n'.join([str(ins) for ins in ir_instructions]))
 
     elif command == 'asm':
-        source_code = read_source_code()
-        tokens = tokenize(input_file, source_code)
-        ast_node = parse(tokens)
-        if ast_node is None:
-            raise Exception('AST node was none')
-        typechecker_symtab = SymTab(locals={}, parent=None)
-        typecheck(ast_node, typechecker_symtab)
-        ir_instructions = generate_ir(root_types, ast_node)
+        ir_instructions = generate_program_ir()
         asm_code = generate_assembly(ir_instructions)
         print(asm_code)
 
     elif command == 'compile':
-        source_code = read_source_code()
-        tokens = tokenize(input_file, source_code)
-        ast_node = parse(tokens)
-        if ast_node is None:
-            raise Exception('AST node was none')
-        typechecker_symtab = SymTab(locals={}, parent=None)
-        typecheck(ast_node, typechecker_symtab)
-        ir_instructions = generate_ir(root_types, ast_node)
+        ir_instructions = generate_program_ir()
         asm_code = generate_assembly(ir_instructions)
         assemble(asm_code, 'compiled_program')
 
     elif command == 'end':
-        check_test_cases()
+        check_test_cases(cache)
 
     else:
         print(f"Error: unknown command: {command}\n\n{usage}", file=sys.stderr)
@@ -0,0 +1,332 @@
+from array import array
+from typing import Any, Callable
+from . import ast
+from .parser import binary_operators
+from .tokenizer import Location
+from .type_definitions import Type
+from .visitor import children, post_order
+
+# Classes of AST nodes by their kind code
+node_kinds: list[type[ast.Expression]] = [
+    ast.Literal,
+    ast.Identifier,
+    ast.BinaryOp,
+    ast.UnaryOp,
+    ast.IfStatement,
+    ast.WhileLoop,
+    ast.Block,
+    ast.FunctionCall,
+    ast.VarDeclaration,
+    ast.ErrorNode,
+]
+kind_codes: dict[type[ast.Expression], int] = {
+    kind: code for code, kind in enumerate(node_kinds)
+}
+
+operators: list[str] = list(binary_operators) + ['not']
+operator_codes: dict[str, int] = {
+    operator: code for code, operator in enumerate(operators)
+}
+
+# Codes of the `ops` array for nodes that have no operator
+LITERAL_INT, LITERAL_BOOL, LITERAL_UNIT, LITERAL_BIG_INT = 0, 1, 2, 3
+NO_TYPE, INT_TYPE, BOOL_TYPE = 0, 1, 2
+HAS_NAME, NO_NAME = 0, 1
+
+
+class AstArena:
+    """AST stored as parallel arrays instead of node objects. Each node is
+    an integer id, and has a kind code, an operator or other small code, an
+    integer value and a range of the `children` array holding the ids of its
+    child nodes. Children always have smaller ids than their parent.
+
+    What the arrays hold for each kind of node:
+        Literal         ops: LITERAL_*, values: the int or bool value, or
+                        the index in `big_ints` of an int that does not
+                        fit in 64 bits
+        Identifier      values: id of the name in `names`
+        BinaryOp        ops: operator code, children: left, right
+        UnaryOp         ops: operator code, children: expr
+        IfStatement     children: condition, true branch, false branch if any
+        WhileLoop       children: condition, body
+        Block           children: statements
+        FunctionCall    ops: HAS_NAME or NO_NAME, children: name if any, args
+        VarDeclaration  ops: *_TYPE, children: name, value
+        ErrorNode       values: id of the message in `names`
+
+    Locations and types are shared objects, so they are kept in lists.
+    Bindings and frame sizes set by the resolver are not kept, so views of
+    the nodes are unresolved."""
+
+    def __init__(self) -> None:
+        self.kinds = array('B')
+        self.ops = array('B')
+        self.values = array('q')
+        self.child_starts = array('I')
+        self.children = array('I')
+        self.locations: list[Location] = []
+        self.types: list[Type] = []
+        self.names: list[str] = []
+        self.name_index: dict[str, int] = {}
+        self.big_ints: list[int] = []
+        self.root = -1
+
+    def intern_name(self, name: str) -> int:
+        name_id = self.name_index.get(name)
+        if name_id is None:
+            name_id = len(self.names)
+            self.names.append(name)
+            self.name_index[name] = name_id
+        return name_id
+
+    def append(self, kind: type[ast.Expression], location: Location,
+               node_type: Type, children: list[int], op: int = 0,
+               value: int = 0) -> int:
+        """Adds a node whose children have already been added and returns
+        its id."""
+        self.kinds.append(kind_codes[kind])
+        self.ops.append(op)
+        self.values.append(value)
+        self.child_starts.append(len(self.children))
+        self.children.extend(children)
+        self.locations.append(location)
+        self.types.append(node_type)
+        return len(self.kinds) - 1
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    def kind(self, node_id: int) -> type[ast.Expression]:
+        return node_kinds[self.kinds[node_id]]
+
+    def child_count(self, node_id: int) -> int:
+        if node_id + 1 < len(self.kinds):
+            return self.child_starts[node_id + 1] - self.child_starts[node_id]
+        return len(self.children) - self.child_starts[node_id]
+
+    def child(self, node_id: int, index: int) -> int:
+        return self.children[self.child_starts[node_id] + index]
+
+    def child_ids(self, node_id: int) -> array:
+        start = self.child_starts[node_id]
+        return self.children[start:start + self.child_count(node_id)]
+
+    def view(self, node_id: int | None = None) -> ast.Expression:
+        """Returns a node that reads its fields from the arena, so that
+        passes written for the AST classes can run on the arena. Defaults to
+        the root node."""
+        if node_id is None:
+            node_id = self.root
+        view: Any = object.__new__(view_classes[self.kinds[node_id]])
+        view.arena = self
+        view.id = node_id
+        return view
+
+
+def arena_from_tree(root: ast.Expression) -> AstArena:
+    """Converts a tree of AST nodes into an arena, without recursion."""
+    arena = AstArena()
+    ids: dict[int, int] = {}
+
+    def add(node: ast.Expression) -> int:
+        child_ids = [ids[id(child)] for child in children(node)]
+        match node:
+            case ast.Literal():
+                if isinstance(node.value, bool):
+                    op, value = LITERAL_BOOL, int(node.value)
+                elif node.value is None:
+                    op, value = LITERAL_UNIT, 0
+                elif -(1 << 63) <= node.value < 1 << 63:
+                    op, value = LITERAL_INT, node.value
+                else:
+                    op, value = LITERAL_BIG_INT, len(arena.big_ints)
+                    arena.big_ints.append(node.value)
+                return arena.append(ast.Literal, node.location, node.type,
+                                    child_ids, op, value)
+            case ast.Identifier():
+                return arena.append(ast.Identifier, node.location, node.type,
+                                    child_ids, value=arena.intern_name(node.name))
+            case ast.ErrorNode():
+                return arena.append(ast.ErrorNode, node.location, node.type,
+                                    child_ids, value=arena.intern_name(node.message))
+            case ast.BinaryOp() | ast.UnaryOp():
+                return arena.append(type(node), node.location, node.type,
+                                    child_ids, operator_codes[node.op])
+            case ast.FunctionCall():
+                op = NO_NAME if node.name is None else HAS_NAME
+                return arena.append(ast.FunctionCall, node.location, node.type,
+                                    child_ids, op)
+            case ast.VarDeclaration():
+                if node.var_type is None:
+                    op = NO_TYPE
+                elif isinstance(node.var_type, ast.Int):
+                    op = INT_TYPE
+                else:
+                    op = BOOL_TYPE
+                return arena.append(ast.VarDeclaration, node.location,
+                                    node.type, child_ids, op)
+            case _:
+                return arena.append(type(node), node.location, node.type,
+                                    child_ids)
+
+    # Nodes are added after all of their children.
+    for node in post_order(root):
+        if id(node) not in ids:
+            ids[id(node)] = add(node)
+
+    arena.root = ids[id(root)]
+    return arena
+
+
+def tree_from_arena(arena: AstArena) -> ast.Expression:
+    """Converts an arena back into a tree of AST nodes."""
+    nodes: list[ast.Expression] = []
+    for node_id in range(len(arena)):
+        children = [nodes[child] for child in arena.child_ids(node_id)]
+        kind = arena.kind(node_id)
+        fields: dict[str, Any]
+        if kind is ast.Literal:
+            fields = {'value': literal_value(arena, node_id)}
+        elif kind is ast.Identifier:
+            fields = {'name': arena.names[arena.values[node_id]]}
+        elif kind is ast.BinaryOp:
+            fields = {'left': children[0], 'op': operators[arena.ops[node_id]],
+                      'right': children[1]}
+        elif kind is ast.UnaryOp:
+            fields = {'op': operators[arena.ops[node_id]], 'expr': children[0]}
+        elif kind is ast.IfStatement:
+            fields = {'condition': children[0], 'true_branch': children[1],
+                      'false_branch': children[2] if len(children) > 2 else None}
+        elif kind is ast.WhileLoop:
+            fields = {'condition': children[0], 'body': children[1]}
+        elif kind is ast.Block:
+            fields = {'statements': children}
+        elif kind is ast.FunctionCall:
+            if arena.ops[node_id] == HAS_NAME:
+                fields = {'name': children[0], 'args': children[1:]}
+            else:
+                fields = {'name': None, 'args': children}
+        elif kind is ast.VarDeclaration:
+            fields = {'name': children[0], 'var_type': var_type(arena, node_id),
+                      'value': children[1]}
+        else:
+            fields = {'message': arena.names[arena.values[node_id]]}
+        nodes.append(kind(arena.locations[node_id], type=arena.types[node_id],
+                          **fields))
+    return nodes[arena.root]
+
+
+def literal_value(arena: AstArena, node_id: int) -> int | bool | None:
+    op = arena.ops[node_id]
+    if op == LITERAL_BOOL:
+        return bool(arena.values[node_id])
+    if op == LITERAL_UNIT:
+        return None
+    if op == LITERAL_BIG_INT:
+        return arena.big_ints[arena.values[node_id]]
+    return arena.values[node_id]
+
+
+def var_type(arena: AstArena, node_id: int) -> ast.TypeExpression | None:
+    op = arena.ops[node_id]
+    if op == INT_TYPE:
+        return ast.Int('Int')
+    if op == BOOL_TYPE:
+        return ast.Bool('Bool')
+    return None
+
+
+def child_view(index: int) -> Callable[[AstArena, int], ast.Expression]:
+    return lambda arena, node_id: arena.view(arena.child(node_id, index))
+
+
+def function_name(arena: AstArena, node_id: int) -> ast.Expression | None:
+    if arena.ops[node_id] == NO_NAME:
+        return None
+    return arena.view(arena.child(node_id, 0))
+
+
+def function_args(arena: AstArena, node_id: int) -> list[ast.Expression]:
+    args = arena.child_ids(node_id)
+    if arena.ops[node_id] == HAS_NAME:
+        args = args[1:]
+    return [arena.view(arg) for arg in args]
+
+
+def false_branch(arena: AstArena, node_id: int) -> ast.Expression | None:
+    if arena.child_count(node_id) < 3:
+        return None
+    return arena.view(arena.child(node_id, 2))
+
+
+# How a view reads each field of its node class other than location and
+# type from the arena
+view_fields: dict[type[ast.Expression], dict[str, Callable[[AstArena, int], Any]]] = {
+    ast.Literal: {'value': literal_value},
+    ast.Identifier: {
+        'name': lambda arena, node_id: arena.names[arena.values[node_id]],
+        'binding': lambda arena, node_id: None,
+    },
+    ast.BinaryOp: {
+        'left': child_view(0),
+        'op': lambda arena, node_id: operators[arena.ops[node_id]],
+        'right': child_view(1),
+    },
+    ast.UnaryOp: {
+        'op': lambda arena, node_id: operators[arena.ops[node_id]],
+        'expr': child_view(0),
+    },
+    ast.IfStatement: {
+        'condition': child_view(0),
+        'true_branch': child_view(1),
+        'false_branch': false_branch,
+    },
+    ast.WhileLoop: {
+        'condition': child_view(0),
+        'body': child_view(1),
+    },
+    ast.Block: {
+        'statements': lambda arena, node_id: [
+            arena.view(child) for child in arena.child_ids(node_id)],
+        'frame_size': lambda arena, node_id: 0,
+    },
+    ast.FunctionCall: {
+        'name': function_name,
+        'args': function_args,
+    },
+    ast.VarDeclaration: {
+        'name': child_view(0),
+        'var_type': var_type,
+        'value': child_view(1),
+        'binding': lambda arena, node_id: None,
+    },
+    ast.ErrorNode: {
+        'message': lambda arena, node_id: arena.names[arena.values[node_id]],
+    },
+}
+
+
+def make_view_class(kind: type[ast.Expression]) -> type:
+    """Returns a subclass of `kind` whose fields are properties that read
+    the arena, so that views match the same patterns as the nodes. Only the
+    type of a node can be set through a view."""
+    def field_property(getter: Callable[[AstArena, int], Any]) -> property:
+        return property(lambda self: getter(self.arena, self.id))
+
+    def get_type(self: Any) -> Type:
+        return self.arena.types[self.id]
+
+    def set_type(self: Any, node_type: Type) -> None:
+        self.arena.types[self.id] = node_type
+
+    namespace: dict[str, Any] = {
+        '__slots__': ('arena', 'id'),
+        'location': property(lambda self: self.arena.locations[self.id]),
+        'type': property(get_type, set_type),
+    }
+    for name, getter in view_fields[kind].items():
+        namespace[name] = field_property(getter)
+    return type(f'{kind.__name__}View', (kind,), namespace)
+
+
+view_classes: list[type] = [make_view_class(kind) for kind in node_kinds]
@@ -2,41 +2,47 @@ from dataclasses import dataclass, field
 from .tokenizer import Location
 from .type_definitions import Type, Unit
 
+# (scope depth, slot index) of a variable, counting scopes from the
+# outermost block. Set by the resolver.
+Binding = tuple[int, int]
 
-@dataclass
+
+@dataclass(slots=True)
 class TypeExpression:
     """Base class for AST nodes representing type expressions."""
 
 
-@dataclass
+@dataclass(slots=True)
 class Int(TypeExpression):
     type: str
 
 
-@dataclass
+@dataclass(slots=True)
 class Bool(TypeExpression):
     type: str
 
 
-@dataclass
+@dataclass(slots=True)
 class Expression:
     """Base class for AST nodes representing expressions."""
     location: Location
     type: Type = field(kw_only=True, default=Unit)
 
 
-@dataclass
+@dataclass(slots=True)
 class Literal(Expression):
     value: int | bool | None
     # (value=None is used when parsing the keyword `unit`)
 
 
-@dataclass
+@dataclass(slots=True)
 class Identifier(Expression):
     name: str
+    binding: Binding | None = field(
+        kw_only=True, default=None, compare=False, repr=False)
 
 
-@dataclass
+@dataclass(slots=True)
 class BinaryOp(Expression):
     """AST node for a binary operation like `A + B`"""
     left: Expression
@@ -44,14 +50,14 @@ class BinaryOp(Expression):
     right: Expression
 
 
-@dataclass
+@dataclass(slots=True)
 class UnaryOp(Expression):
     """AST node for an unary operation like `- B` or `not B`"""
     op: str
     expr: Expression
 
 
-@dataclass
+@dataclass(slots=True)
 class IfStatement(Expression):
     """AST node for conditional statements"""
     condition: Expression
@@ -59,31 +65,41 @@ class IfStatement(Expression):
     false_branch: Expression | None
 
 
-@dataclass
+@dataclass(slots=True)
 class FunctionCall(Expression):
     """AST node for function calls"""
     name: Identifier | None
     args: list[Expression]
 
 
-@dataclass
+@dataclass(slots=True)
 class WhileLoop(Expression):
     """AST node for function calls"""
     condition: Expression
     body: Expression
 
 
-@dataclass
+@dataclass(slots=True)
 class Block(Expression):
     """AST node for {} blocks"""
     statements: list[Expression]
+    # Number of variables declared in the block. Set by the resolver.
+    frame_size: int = field(kw_only=True, default=0, compare=False, repr=False)
 
 
-@dataclass
+@dataclass(slots=True)
 class VarDeclaration(Expression):
     name: Identifier
     var_type: TypeExpression | None
     value: Expression
+    binding: Binding | None = field(
+        kw_only=True, default=None, compare=False, repr=False)
+
+
+@dataclass(slots=True)
+class ErrorNode(Expression):
+    """AST node in place of a statement that could not be parsed"""
+    message: str
 
 
 ...  # You get to define more later
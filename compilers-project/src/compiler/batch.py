@@ -0,0 +1,106 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Any, Sequence
+from . import ast
+from .cache import FrontEndCache, tokenize_and_parse
+from .serialization import deserialize, serialize
+from .tokenizer import Token
+
+
+@dataclass
+class FrontEndResult:
+    """Tokens and AST of one input, or the error that stopped them."""
+    input_file: str
+    tokens: list[Token] | None = None
+    ast_node: ast.Expression | None = None
+    error: str | None = None
+    # AST in the compact format, set by `front_end` in worker processes
+    ast_data: bytes | None = field(default=None, repr=False, compare=False)
+
+    # Results are sent from worker processes with the compact AST format,
+    # which is smaller and faster to load than pickled nodes.
+    def __getstate__(self) -> dict[str, Any]:
+        state = dict(self.__dict__)
+        if self.ast_node is not None:
+            if self.ast_data is None:
+                state['ast_data'] = serialize(self.ast_node)
+            state['ast_node'] = None
+        return state
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        if state['ast_data'] is not None:
+            state['ast_node'] = deserialize(state['ast_data'])
+            state['ast_data'] = None
+        self.__dict__.update(state)
+
+
+# Cache of the current worker process, set up by `init_worker`.
+worker_cache: FrontEndCache | None = None
+
+
+def init_worker(cache_dir: str | None) -> None:
+    global worker_cache
+    worker_cache = FrontEndCache(cache_dir) if cache_dir else None
+
+
+def front_end(input_file: str, source_code: str | None = None,
+              serialized: bool = False) -> FrontEndResult:
+    """Tokenizes and parses one input, reading it from `input_file` if no
+    source code is given. Errors are returned instead of raised. With
+    `serialized`, the AST is also encoded to be sent to another process,
+    so that an error in encoding it is returned too."""
+    try:
+        if source_code is None:
+            with open(input_file) as f:
+                source_code = f.read()
+        tokens, ast_node = tokenize_and_parse(input_file, source_code,
+                                              worker_cache)
+        ast_data = None
+        if serialized and ast_node is not None:
+            ast_data = serialize(ast_node)
+        return FrontEndResult(input_file, tokens, ast_node, ast_data=ast_data)
+    except Exception as e:
+        return FrontEndResult(input_file, error=f'{type(e).__name__}: {e}')
+
+
+def available_cores() -> int:
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def front_end_sources(sources: Sequence[tuple[str, str | None]],
+                      workers: int | None = None,
+                      cache_dir: str | None = None) -> list[FrontEndResult]:
+    """Runs `front_end` on each (input_file, source_code) pair across a pool
+    of `workers` processes, one per available core by default. Results are
+    in the order of `sources`, and an error in one input does not stop the
+    others."""
+    if workers is None:
+        workers = available_cores()
+    workers = max(1, min(workers, len(sources)))
+
+    if workers == 1:
+        init_worker(cache_dir)
+        return [front_end(input_file, source_code)
+                for input_file, source_code in sources]
+
+    # Send inputs in chunks to keep the overhead per file low, but small
+    # enough chunks that the work stays balanced between the workers.
+    chunksize = max(1, len(sources) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                             initargs=(cache_dir,)) as executor:
+        return list(executor.map(partial(front_end, serialized=True),
+                                 [input_file for input_file, _ in sources],
+                                 [source_code for _, source_code in sources],
+                                 chunksize=chunksize))
+
+
+def front_end_files(input_files: list[str], workers: int | None = None,
+                    cache_dir: str | None = None) -> list[FrontEndResult]:
+    """Like `front_end_sources`, but reads each input from its file in the
+    worker process."""
+    return front_end_sources([(input_file, None) for input_file in input_files],
+                             workers, cache_dir)
@@ -0,0 +1,152 @@
+import hashlib
+import marshal
+import os
+import sys
+import tempfile
+from array import array
+from . import ast
+from .parser import parse_recovering
+from .serialization import deserialize, serialize
+from .token_buffer import token_types, type_codes
+from .tokenizer import LineIndex, Location, Token, tokenize
+
+# Increase when the format of the cache files changes.
+CACHE_FORMAT = 2
+
+# Modules whose code determines the tokens and AST of a source.
+FRONT_END_MODULES = ['tokenizer.py', 'token_buffer.py', 'parser.py', 'ast.py',
+                     'arena.py', 'serialization.py', 'cache.py']
+
+
+def compiler_version() -> str:
+    """Digest of the front end's code, so that changes to the tokenizer or
+    the parser invalidate old cache entries."""
+    digest = hashlib.sha256(str(CACHE_FORMAT).encode())
+    directory = os.path.dirname(__file__)
+    for module in FRONT_END_MODULES:
+        with open(os.path.join(directory, module), 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def encode_tokens(tokens: list[Token]) -> tuple:
+    texts: dict[str, int] = {}
+    text_ids = array('I', [texts.setdefault(token.text, len(texts))
+                           for token in tokens])
+    return (
+        array('B', [type_codes[token.type] for token in tokens]).tobytes(),
+        array('I', [token.location.offset for token in tokens]).tobytes(),
+        text_ids.tobytes(),
+        list(texts)
+    )
+
+
+def decode_tokens(data: tuple, input_file: str,
+                  line_index: LineIndex) -> list[Token]:
+    types = array('B', data[0])
+    offsets = array('I', data[1])
+    text_ids = array('I', data[2])
+    texts = [sys.intern(text) for text in data[3]]
+    return [
+        Token(
+            text=texts[text_ids[i]],
+            type=token_types[types[i]],
+            location=Location(input_file, offset=offsets[i],
+                              line_index=line_index)
+        )
+        for i in range(len(types))
+    ]
+
+
+class FrontEndCache:
+    """On-disk cache of tokens and ASTs keyed by a hash of the source and
+    the compiler version. Stores at most `max_bytes` of entries and evicts
+    the least recently used entries first."""
+
+    def __init__(self, directory: str, max_bytes: int = 64 * 1024 * 1024) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.version = compiler_version()
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, source_code: str) -> str:
+        digest = hashlib.sha256(self.version.encode())
+        digest.update(source_code.encode())
+        return os.path.join(self.directory, digest.hexdigest() + '.bin')
+
+    def load(self, input_file: str,
+             source_code: str) -> tuple[list[Token], ast.Expression | None] | None:
+        path = self.path(source_code)
+        try:
+            with open(path, 'rb') as f:
+                contents = f.read()
+        except OSError:
+            return None
+
+        # A truncated or corrupted entry is a miss, and is removed so that
+        # it is stored again.
+        try:
+            data = marshal.loads(contents)
+            line_index = LineIndex(source_code)
+            tokens = decode_tokens(data[0], input_file, line_index)
+            ast_node = None if data[1] is None else deserialize(data[1], input_file)
+        except Exception:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+
+        try:
+            os.utime(path)  # mark as recently used
+        except OSError:
+            pass
+        return tokens, ast_node
+
+    def store(self, source_code: str, tokens: list[Token],
+              ast_node: ast.Expression | None) -> None:
+        data = (encode_tokens(tokens),
+                None if ast_node is None else serialize(ast_node))
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            marshal.dump(data, f)
+        os.replace(temp_path, self.path(source_code))
+        self.evict()
+
+    def evict(self) -> None:
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.bin'):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+
+
+def tokenize_and_parse(input_file: str, source_code: str,
+                       cache: FrontEndCache | None = None) -> tuple[list[Token], ast.Expression | None]:
+    """Tokenizes and parses the source, or loads the results from `cache`
+    if the same source has been compiled before. If the source has syntax
+    errors, raises an exception that lists all of them."""
+    if cache is not None:
+        cached = cache.load(input_file, source_code)
+        if cached is not None:
+            return cached
+
+    tokens = tokenize(input_file, source_code)
+    ast_node, diagnostics = parse_recovering(tokens)
+    if diagnostics:
+        raise Exception('\n'.join(diagnostics))
+
+    if cache is not None:
+        cache.store(source_code, tokens, ast_node)
+
+    return tokens, ast_node
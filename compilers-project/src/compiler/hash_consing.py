@@ -0,0 +1,128 @@
+import dataclasses
+from typing import Hashable, Iterable
+from . import ast
+from .visitor import annotations, children
+
+
+class NodeTable:
+    """Hash-consing table of AST nodes. Structurally equal subtrees, not
+    counting locations and types, are replaced by one shared node, which
+    gets the location of the last of them that was shared, so that a tree
+    shared after an edit has the locations of the edited source.
+
+    Each shared node has a structural hash, which is equal for equal
+    subtrees and can be used to memoize passes over them. As nodes are
+    shared, a pass that stores something on a node, like the type checker
+    does, stores it for every occurrence of the subtree."""
+
+    def __init__(self) -> None:
+        self.nodes: dict[int, ast.Expression] = {}
+        # Structural hashes of the shared nodes by their id
+        self.hashes: dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def structural_hash(self, node: ast.Expression) -> int:
+        return self.hashes[id(node)]
+
+    def retain(self, roots: Iterable[ast.Expression]) -> None:
+        """Removes the nodes that are not in the trees of `roots`."""
+        live: dict[int, ast.Expression] = {}
+        stack = list(roots)
+        while stack:
+            node = stack.pop()
+            if id(node) not in live:
+                live[id(node)] = node
+                stack.extend(children(node))
+
+        # The nodes are stored again, as a removed node may be on the way
+        # from the hash of a remaining one to its key.
+        nodes, hashes = self.nodes, self.hashes
+        self.nodes = {}
+        self.hashes = {}
+        for node in nodes.values():
+            if id(node) in live:
+                structural_hash = hashes[id(node)]
+                key = structural_hash
+                while key in self.nodes:
+                    key += 1
+                self.nodes[key] = node
+                self.hashes[id(node)] = structural_hash
+
+    def share(self, root: ast.Expression) -> ast.Expression:
+        """Returns the shared node that is equal to `root`, adding the
+        subtrees of `root` that are not in the table yet."""
+        shared: dict[int, ast.Expression] = {}
+        stack: list[tuple[ast.Expression, bool]] = [(root, False)]
+        while stack:
+            node, children_shared = stack.pop()
+            if id(node) in shared:
+                continue
+            if id(node) in self.hashes:
+                shared[id(node)] = node
+            elif not children_shared:
+                stack.append((node, True))
+                stack.extend((child, False) for child in children(node))
+            else:
+                shared[id(node)] = self.share_node(node, shared)
+        return shared[id(root)]
+
+    def share_node(self, node: ast.Expression,
+                   shared: dict[int, ast.Expression]) -> ast.Expression:
+        """Replaces the children of `node` with their shared nodes and
+        returns the shared node equal to it."""
+        # The hash uses the hashes of the children. Only nodes whose
+        # children are the same shared nodes are equal.
+        parts: list[Hashable] = [type(node).__name__]
+        for field in dataclasses.fields(node):
+            if field.name in annotations:
+                continue
+            value = getattr(node, field.name)
+            if isinstance(value, ast.Expression):
+                value = shared[id(value)]
+                setattr(node, field.name, value)
+                parts.append(self.hashes[id(value)])
+            elif isinstance(value, list):
+                value = [shared[id(item)] for item in value]
+                setattr(node, field.name, value)
+                parts.append(tuple(self.hashes[id(item)] for item in value))
+            else:
+                if isinstance(value, ast.TypeExpression):
+                    value = type(value).__name__
+                # True == 1, so the type of a value is part of the hash.
+                parts.append((type(value).__name__, value))
+
+        structural_hash = hash(tuple(parts))
+        # Nodes are stored by their hash, and the next free key after it if
+        # the hashes of different nodes collide.
+        key = structural_hash
+        while key in self.nodes:
+            existing = self.nodes[key]
+            if shallow_equal(existing, node):
+                existing.location = node.location
+                return existing
+            key += 1
+        self.nodes[key] = node
+        self.hashes[id(node)] = structural_hash
+        return node
+
+
+def shallow_equal(a: ast.Expression, b: ast.Expression) -> bool:
+    """Compares nodes whose children are shared nodes."""
+    if type(a) is not type(b):
+        return False
+    for field in dataclasses.fields(a):
+        if field.name in annotations:
+            continue
+        x = getattr(a, field.name)
+        y = getattr(b, field.name)
+        if isinstance(x, ast.Expression):
+            if x is not y:
+                return False
+        elif isinstance(x, list):
+            if len(x) != len(y) or any(i is not j for i, j in zip(x, y)):
+                return False
+        elif type(x) is not type(y) or x != y:
+            return False
+    return True
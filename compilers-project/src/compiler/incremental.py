@@ -0,0 +1,336 @@
+from dataclasses import dataclass
+from typing import Iterator
+from . import ast
+from .parser import binary_operators, parse_iter
+from .token_buffer import TokenBuffer, TokenChange, TokenView
+from .tokenizer import Location
+from .visitor import children, walk
+
+# Token index ranges of blocks and statements by the id of their node
+Spans = dict[int, tuple[int, int]]
+
+
+@dataclass
+class IncrementalParse:
+    """AST of the tokens in a TokenBuffer, together with the token ranges of
+    its blocks and statements that `reparse` uses to re-parse only the part
+    of the program that an edit changed."""
+    buffer: TokenBuffer
+    ast_node: ast.Expression | None
+    # Top-level statements of the program. When there are several, they
+    # are the statements of `ast_node`.
+    statements: list[ast.Expression]
+    spans: Spans
+    source_length: int
+
+
+@dataclass
+class Level:
+    """A block, or the top level of the program if `block` is None, and the
+    index and token range after the change of its statement that contains
+    the change, if any."""
+    block: ast.Block | None
+    statements: list[ast.Expression]
+    index: int | None = None
+    span: tuple[int, int] = (-1, -1)
+
+
+def token_views(buffer: TokenBuffer, start: int, end: int) -> Iterator[TokenView]:
+    for index in range(start, end):
+        yield TokenView(buffer, index)
+
+
+def make_root(buffer: TokenBuffer, statements: list[ast.Expression],
+              root: ast.Expression | None) -> ast.Expression | None:
+    """Returns the root node of a program of `statements` like `parse`
+    does, reusing the block `root` if it already holds them."""
+    if not statements:
+        return None
+    if len(statements) == 1:
+        return statements[0]
+    if isinstance(root, ast.Block) and root.statements is statements:
+        root.location = buffer.location(0)
+        return root
+    return ast.Block(location=buffer.location(0), statements=statements)
+
+
+def parse_buffer(buffer: TokenBuffer) -> IncrementalParse:
+    spans: Spans = {}
+    statements = list(parse_iter(token_views(buffer, 0, len(buffer)), spans))
+    return IncrementalParse(
+        buffer=buffer,
+        ast_node=make_root(buffer, statements, None),
+        statements=statements,
+        spans=spans,
+        source_length=len(buffer.source_code)
+    )
+
+
+def reparse(parsed: IncrementalParse,
+            change: TokenChange) -> ast.Expression | None:
+    """Updates `parsed` after its buffer has been re-tokenized with `change`
+    and returns the new AST.
+
+    Only the innermost statement of a block or of the program that contains
+    the change is re-parsed. If that is not possible, e.g. because the edit
+    added a ";", the innermost enclosing "{}" block is re-parsed instead,
+    then its enclosing block and finally the whole program. Statements that
+    were not re-parsed, and re-parsed statements whose tokens did not
+    change, remain the same objects. Nodes after the change get their
+    locations shifted in place, which needs no tokenizing or parsing.
+
+    If the edited program does not parse, the exception is raised and the
+    next call re-parses the whole program."""
+    buffer = parsed.buffer
+    spans = parsed.spans
+    token_delta = change.new_end - change.old_end
+    char_delta = len(buffer.source_code) - parsed.source_length
+    parsed.source_length = len(buffer.source_code)
+
+    levels = find_levels(parsed, change)
+    shift_after_change(parsed, change, char_delta)
+
+    # After an error the whole program is parsed again.
+    failed = not parsed.statements and len(buffer) > 0
+    if change.start == change.old_end == change.new_end and not failed:
+        parsed.ast_node = make_root(buffer, parsed.statements, parsed.ast_node)
+        return parsed.ast_node
+
+    try:
+        if failed or not reparse_levels(parsed, levels, change):
+            reparse_block(parsed, levels[0], change, token_delta)
+    except Exception:
+        parsed.statements = []
+        parsed.ast_node = None
+        spans.clear()
+        raise
+
+    parsed.ast_node = make_root(buffer, parsed.statements, parsed.ast_node)
+    return parsed.ast_node
+
+
+def find_levels(parsed: IncrementalParse, change: TokenChange) -> list[Level]:
+    """Returns the top level of the program and the blocks that strictly
+    enclose the changed tokens, from the outermost to the innermost. Token
+    ranges are compared before the change."""
+    spans = parsed.spans
+
+    def contains_change(node: ast.Expression) -> bool:
+        start, end = spans.get(id(node), (-1, -1))
+        return 0 <= start <= change.start < end and change.old_end <= end
+
+    def encloses_change(block: ast.Block) -> bool:
+        start, end = spans[id(block)]
+        return start < change.start and change.old_end <= end - 1
+
+    levels: list[Level] = []
+    block: ast.Block | None = None
+    statements = parsed.statements
+    while True:
+        index = next((i for i, statement in enumerate(statements)
+                      if contains_change(statement)), None)
+        if index is None:
+            levels.append(Level(block, statements))
+            return levels
+
+        start, end = spans[id(statements[index])]
+        token_delta = change.new_end - change.old_end
+        levels.append(Level(block, statements, index,
+                            (start, end + token_delta)))
+
+        # Find the outermost block in the statement that encloses the
+        # change. Blocks that do not enclose it cannot contain one that does.
+        inner: ast.Block | None = None
+        stack = [statements[index]]
+        while stack and inner is None:
+            node = stack.pop()
+            if isinstance(node, ast.Block):
+                if encloses_change(node):
+                    inner = node
+                continue
+            stack.extend(children(node))
+
+        if inner is None:
+            return levels
+        block = inner
+        statements = inner.statements
+
+
+def shift_after_change(parsed: IncrementalParse, change: TokenChange,
+                       char_delta: int) -> None:
+    """Moves the token ranges and locations of nodes after the change to
+    their positions after it."""
+    buffer = parsed.buffer
+    spans = parsed.spans
+    token_delta = change.new_end - change.old_end
+
+    if change.new_end < len(buffer):
+        # Offset of the first token after the change before the edit
+        threshold = buffer.start(change.new_end) - char_delta
+    else:
+        threshold = parsed.source_length - char_delta + 1
+
+    # Ranges that start or end in the changed tokens get no new range.
+    def shift_start(index: int) -> int:
+        if index < change.start:
+            return index
+        if index >= change.old_end:
+            return index + token_delta
+        return -1
+
+    def shift_end(index: int) -> int:
+        if index <= change.start:
+            return index
+        if index >= change.old_end:
+            return index + token_delta
+        return -1
+
+    stack = list(parsed.statements)
+    while stack:
+        node = stack.pop()
+        span = spans.get(id(node))
+        if span is not None:
+            start, end = span
+            if end <= change.start:
+                continue
+            start, end = shift_start(start), shift_end(end)
+            if start < 0 or end < 0:
+                start = end = -1
+            spans[id(node)] = (start, end)
+
+        location = node.location
+        if location.offset >= threshold:
+            node.location = Location(location.file,
+                                     offset=location.offset + char_delta,
+                                     line_index=buffer.line_index)
+        stack.extend(children(node))
+
+
+def reparse_levels(parsed: IncrementalParse, levels: list[Level],
+                   change: TokenChange) -> bool:
+    """Re-parses the innermost statement or block that contains the change
+    and returns whether that succeeded."""
+    innermost = levels[-1]
+    if innermost.index is not None and reparse_statement(parsed, innermost):
+        return True
+
+    token_delta = change.new_end - change.old_end
+    for level in reversed(levels):
+        if level.block is not None:
+            try:
+                reparse_block(parsed, level, change, token_delta)
+                return True
+            except Exception:
+                pass
+    return False
+
+
+def reparse_statement(parsed: IncrementalParse, level: Level) -> bool:
+    """Re-parses the statement of `level` that contains the change, if it
+    still is a statement of its own, and returns whether it was."""
+    assert level.index is not None
+    buffer = parsed.buffer
+    spans = parsed.spans
+    old = level.statements[level.index]
+    start, end = level.span
+    if end <= start:
+        return False
+    # The unit value after a last ";" stands for the closing brace of its
+    # block, which a statement parsed in its place could not end with.
+    if isinstance(old, ast.Literal) and old.value is None:
+        return False
+
+    # The statement must still be separated from its neighbours in the
+    # same way, so that it would end at the same token in a full parse.
+    if start > 0 and buffer.text(start - 1) not in [';', '{']:
+        if (buffer.text(start - 1) != '}' or buffer.text(start) in binary_operators
+                or buffer.text(start) in ['then', 'else', 'do']):
+            return False
+    if end < len(buffer) and buffer.text(end) not in [';', '}']:
+        if buffer.text(end - 1) != '}':
+            return False
+
+    # Parse one token past the statement, so that the parser sees the same
+    # token after it as in a full parse.
+    new_spans: Spans = {}
+    try:
+        statements = parse_iter(
+            token_views(buffer, start, min(end + 1, len(buffer))),
+            new_spans, start)
+        new = next(statements)
+    except Exception:
+        return False
+    if new_spans[id(new)] != (start, end):
+        return False
+
+    level.statements[level.index] = new
+    forget_spans(spans, old)
+    keep_spans(spans, new_spans, new)
+    return True
+
+
+def reparse_block(parsed: IncrementalParse, level: Level,
+                  change: TokenChange, token_delta: int) -> None:
+    """Re-parses the statements of the block of `level`, or of the whole
+    program if it has no block. Statements whose tokens did not change
+    keep their old nodes."""
+    buffer = parsed.buffer
+    spans = parsed.spans
+
+    new_spans: Spans = {}
+    if level.block is not None:
+        start, end = spans[id(level.block)]
+        if start < 0:
+            raise Exception('Block was changed')
+        results = parse_iter(token_views(buffer, start, end), new_spans, start)
+        new_block = next(results)
+        if next(results, None) is not None or not isinstance(new_block, ast.Block) \
+                or new_spans[id(new_block)] != (start, end):
+            raise Exception('Block does not end at the same token')
+        new_statements = new_block.statements
+    else:
+        new_statements = list(parse_iter(token_views(buffer, 0, len(buffer)),
+                                         new_spans))
+
+    # Old statements by their token range, for those outside the change.
+    # The statement that contained the change may have a range next to it
+    # after the change, e.g. if its last tokens were deleted.
+    old_by_span = {
+        spans[id(statement)]: statement
+        for index, statement in enumerate(level.statements)
+        if id(statement) in spans and spans[id(statement)][0] >= 0
+        and index != level.index
+    }
+
+    def unchanged(span: tuple[int, int]) -> bool:
+        return span[1] <= change.start or span[0] >= change.new_end
+
+    merged: list[ast.Expression] = []
+    for statement in new_statements:
+        span = new_spans[id(statement)]
+        old = old_by_span.pop(span, None) if unchanged(span) else None
+        if old is not None:
+            merged.append(old)
+        else:
+            merged.append(statement)
+            keep_spans(spans, new_spans, statement)
+
+    reused = {id(statement) for statement in merged}
+    for statement in level.statements:
+        if id(statement) not in reused:
+            forget_spans(spans, statement)
+
+    # Keep the same list, which may be the statements of the root block.
+    level.statements[:] = merged
+
+
+def forget_spans(spans: Spans, node: ast.Expression) -> None:
+    for child in walk(node):
+        spans.pop(id(child), None)
+
+
+def keep_spans(spans: Spans, new_spans: Spans, node: ast.Expression) -> None:
+    for child in walk(node):
+        span = new_spans.get(id(child))
+        if span is not None:
+            spans[id(child)] = span
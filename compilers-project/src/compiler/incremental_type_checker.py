@@ -0,0 +1,183 @@
+from dataclasses import dataclass
+from . import ast
+from .hash_consing import NodeTable
+from .symtab import SymTab
+from .type_checker import TypeChecker
+from .type_definitions import Type, Unit
+from .visitor import children
+
+
+@dataclass(slots=True)
+class Inputs:
+    """Names that a statement reads from the scopes around it, and names
+    that it declares in the scope it is in."""
+    reads: tuple[str, ...]
+    declares: tuple[str, ...]
+
+
+@dataclass(slots=True)
+class CheckedStatement:
+    """Result of type checking a statement with some types of its inputs."""
+    node: ast.Expression
+    type: Type
+    # Types of the declared names after the statement
+    declared: tuple[tuple[str, Type], ...]
+
+
+class IncrementalTypeChecker(TypeChecker):
+    """Type checker that remembers the result of each statement by its
+    structural hash and the types of its inputs, so that checking a program
+    again after an edit only checks the statements that changed and those
+    whose inputs changed.
+
+    Programs are hash-consed into `nodes`, so the nodes of the statements
+    that did not change are the nodes checked before. Parsing with
+    `nodes=checker.nodes` hash-conses while parsing, which is faster than
+    sharing the parsed tree. `hits` and `misses` count the statements that
+    were reused and checked. Statements that have type errors are not
+    remembered, so their errors are reported again.
+
+    What is remembered of nodes that are no longer in the program is
+    dropped once the tables have grown to twice their size after the last
+    time."""
+
+    def __init__(self, nodes: NodeTable | None = None,
+                 diagnostics: list[str] | None = None) -> None:
+        super().__init__(diagnostics)
+        self.nodes = nodes if nodes is not None else NodeTable()
+        # Inputs of the shared nodes by their id
+        self.inputs: dict[int, Inputs] = {}
+        self.results: dict[tuple, CheckedStatement] = {}
+        # Key of the result whose types the nodes of each statement have
+        self.node_keys: dict[int, tuple] = {}
+        self.hits = 0
+        self.misses = 0
+        # Number of shared nodes after the tables were last pruned
+        self.live_size = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total > 0 else 0.0
+
+    def typecheck(self, root: ast.Expression, symtab: SymTab) -> ast.Expression:
+        """Type checks a program and returns its hash-consed root, whose
+        nodes have their types."""
+        root = self.nodes.share(root)
+        # Only the statements are remembered, as the root changes with
+        # every edit.
+        self.check(root, symtab)
+        if len(self.nodes) > 2 * self.live_size:
+            self.prune(root)
+        return root
+
+    def prune(self, root: ast.Expression) -> None:
+        """Forgets the nodes that are not in the program of `root`, and
+        the results of checking them."""
+        self.nodes.retain([root])
+        self.inputs = {key: inputs for key, inputs in self.inputs.items()
+                       if key in self.nodes.hashes}
+        self.node_keys = {key: node_key for key, node_key in self.node_keys.items()
+                          if key in self.nodes.hashes}
+        self.results = {key: result for key, result in self.results.items()
+                        if id(result.node) in self.nodes.hashes}
+        self.live_size = len(self.nodes)
+
+    def inputs_of(self, node: ast.Expression) -> Inputs:
+        """Finds the inputs of a shared node in the order the type checker
+        uses them. The inputs of blocks are found from those of their
+        statements, which are remembered."""
+        inputs = self.inputs.get(id(node))
+        if inputs is not None:
+            return inputs
+
+        reads: dict[str, None] = {}
+        declares: dict[str, None] = {}
+        scopes: list[set[str]] = [set()]
+
+        def read(name: str) -> None:
+            if not any(name in scope for scope in scopes):
+                reads[name] = None
+
+        def declare(name: str) -> None:
+            scopes[-1].add(name)
+            if len(scopes) == 1:
+                declares[name] = None
+
+        def visit(node: ast.Expression) -> None:
+            match node:
+                case ast.Identifier():
+                    if node.binding is not None:
+                        raise Exception(
+                            f'{node.location}: resolved trees are not supported')
+                    read(node.name)
+                case ast.VarDeclaration():
+                    visit(node.value)
+                    declare(node.name.name)
+                case ast.FunctionCall():
+                    # A call stores the type of the function under its name.
+                    for arg in node.args:
+                        visit(arg)
+                    if node.name is not None:
+                        declare(node.name.name)
+                case ast.Block():
+                    for name in self.inputs_of(node).reads:
+                        read(name)
+                case _:
+                    for child in children(node):
+                        visit(child)
+
+        if isinstance(node, ast.Block):
+            # Names declared in the block are not visible after it.
+            for statement in node.statements:
+                statement_inputs = self.inputs_of(statement)
+                for name in statement_inputs.reads:
+                    read(name)
+                scopes[-1].update(statement_inputs.declares)
+        else:
+            visit(node)
+
+        inputs = Inputs(tuple(reads), tuple(declares))
+        self.inputs[id(node)] = inputs
+        return inputs
+
+    def check_statement(self, node: ast.Expression, symtab: SymTab) -> Type:
+        inputs = self.inputs_of(node)
+        key = (
+            self.nodes.structural_hash(node),
+            tuple(symtab.require(name) for name in inputs.reads),
+            tuple(symtab.is_local(name) for name in inputs.declares),
+        )
+
+        result = self.results.get(key)
+        # The nodes of a statement that occurs in several places have the
+        # types of the place checked last, so it is checked again elsewhere.
+        if (result is not None and result.node is node
+                and self.node_keys.get(id(node)) == key):
+            self.hits += 1
+            for name, declared_type in result.declared:
+                if symtab.is_local(name):
+                    symtab.assign(name, declared_type)
+                else:
+                    symtab.add_local(name, declared_type)
+            return result.type
+
+        self.misses += 1
+        error_count = len(self.diagnostics or [])
+        node_type = self.check(node, symtab)
+        if len(self.diagnostics or []) > error_count:
+            return node_type
+        self.results[key] = CheckedStatement(
+            node,
+            node_type,
+            tuple((name, symtab.require(name)) for name in inputs.declares),
+        )
+        self.node_keys[id(node)] = key
+        return node_type
+
+    def visit_Block(self, node: ast.Block, symtab: SymTab) -> Type:
+        with symtab.scope(node.frame_size):
+            for statement in node.statements:
+                self.check_statement(statement, symtab)
+
+        return Unit
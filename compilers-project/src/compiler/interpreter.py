@@ -1,7 +1,8 @@
 from typing import Any, Callable, Union
 from . import ast
 from dataclasses import dataclass
-from .symtab import SymTab, find_context, find_top_level_context
+from .symtab import SymTab
+from .visitor import Visitor
 
 
 @dataclass
@@ -17,157 +18,167 @@ def interpret(node: ast.Expression | None, symtab: SymTab) -> Value:
     if node is None:
         return None
 
-    top_context = find_top_level_context(symtab)
+    return interpreter.visit(node, symtab)
+
+
+class Interpreter(Visitor[SymTab, Value]):
+    """Evaluates a node. Use `interpret`."""
+
+    def visit_Literal(self, node: ast.Literal, symtab: SymTab) -> Value:
+        return node.value
+
+    def visit_Identifier(self, node: ast.Identifier, symtab: SymTab) -> Value:
+        if node.binding is not None:
+            value: Value = symtab.load(node.binding)
+            return value
+        if node.name in symtab:
+            return symtab.require(node.name)
+        else:
+            raise Exception(f'Undefined variable name {node.name}')
+
+    def visit_BinaryOp(self, node: ast.BinaryOp, symtab: SymTab) -> Value:
+        if node.op == '=':
+            value = interpret(node.right, symtab)
+            if isinstance(node.left, ast.Identifier):
+                if node.left.binding is not None:
+                    symtab.store(node.left.binding, value)
+                    return value
+                if node.left.name in symtab:
+                    symtab.assign(node.left.name, value)
+                    return value
+                else:
+                    raise Exception(
+                        f'Undefined variable name {node.left.name}')
 
-    match node:
-        case ast.Literal():
-            return node.value
+                # if node.left.name in symtab.locals:
+                #     symtab.locals[node.left.name] = value
+                # else:
+                #     parent_context = find_context(symtab, node.left.name)
+                #     parent_context.locals[node.left.name] = value
 
-        case ast.Identifier():
-            context = find_context(symtab, node.name)
-            if context is not None:
-                return context.locals[node.name]
             else:
-                raise Exception(f'Undefined variable name {node.name}')
-
-        case ast.BinaryOp():
-            if node.op == '=':
-                value = interpret(node.right, symtab)
-                if isinstance(node.left, ast.Identifier):
-                    context = find_context(symtab, node.left.name)
-                    if context is not None:
-                        context.locals[node.left.name] = value
-                        return value
-                    else:
-                        raise Exception(
-                            f'Undefined variable name {node.left.name}')
-
-                    # if node.left.name in symtab.locals:
-                    #     symtab.locals[node.left.name] = value
-                    # else:
-                    #     parent_context = find_context(symtab, node.left.name)
-                    #     parent_context.locals[node.left.name] = value
+                raise Exception(
+                    f'Only identifiers allowed as variable names.')
 
-                else:
-                    raise Exception(
-                        f'Only identifiers allowed as variable names.')
+        elif node.op in symtab.globals:
+            a: Any = interpret(node.left, symtab)
+            op = symtab.globals[node.op]
 
-            elif node.op in top_context.locals:
-                a: Any = interpret(node.left, symtab)
-                op = top_context.locals[node.op]
+            if not callable(op):
+                raise Exception(f'{node.location}: {op} is not a function')
 
-                if not callable(op):
-                    raise Exception(f'{node.location}: {op} is not a function')
+            elif node.op == 'and':
+                if a is False:
+                    return False
+            elif node.op == 'or':
+                if a is True:
+                    return True
 
-                elif node.op == 'and':
-                    if a is False:
-                        return False
-                elif node.op == 'or':
-                    if a is True:
-                        return True
+            b: Any = interpret(node.right, symtab)
 
-                b: Any = interpret(node.right, symtab)
+            return op(a, b)
 
-                return op(a, b)
+        else:
+            raise Exception(f'{node.location}: unknown operator {node.op}')
 
-            else:
-                raise Exception(f'{node.location}: unknown operator {node.op}')
-
-        case ast.UnaryOp():
-            expr = interpret(node.expr, symtab)
-            if isinstance(expr, bool):
-                if node.op in top_context.locals:
-                    op = top_context.locals[node.op]
-                    return op(expr)
-                else:
-                    raise Exception(
-                        f'{node.location}: incompatible operator {node.op} for boolean')
-            elif isinstance(expr, int):
-                op = 'unary_' + node.op
-                if op in top_context.locals:
-                    op = top_context.locals[op]
-                    return op(expr)
-                else:
-                    raise Exception(
-                        f'{node.location}: incompatible operator {node.op} for integer')
+    def visit_UnaryOp(self, node: ast.UnaryOp, symtab: SymTab) -> Value:
+        expr = interpret(node.expr, symtab)
+        if isinstance(expr, bool):
+            if node.op in symtab.globals:
+                op = symtab.globals[node.op]
+                return op(expr)
             else:
                 raise Exception(
-                    f'{node.location}: expression must be an integer or boolean')
-
-        case ast.IfStatement():
-            cond = interpret(node.condition, symtab)
-            if node.false_branch is None:
-                if cond is True:
-                    interpret(node.true_branch, symtab)
-                    return Unit()
-                elif cond is False:
-                    return Unit()
-                else:
-                    raise Exception(
-                        f'{node.location}: unable to evaluate condition')
-            else:
-                if cond is True:
-                    return interpret(node.true_branch, symtab)
-                elif cond is False:
-                    return interpret(node.false_branch, symtab)
-                else:
-                    raise Exception(
-                        f'{node.location}: unable to evaluate condition')
-
-        case ast.VarDeclaration():
-            if not isinstance(node.name, ast.Identifier):
-                raise Exception('Only identifiers allowed as variable names')
-            elif node.name.name in symtab.locals:
-                raise Exception(f'Variable {node.name.name} already exists.')
+                    f'{node.location}: incompatible operator {node.op} for boolean')
+        elif isinstance(expr, int):
+            op = 'unary_' + node.op
+            if op in symtab.globals:
+                op = symtab.globals[op]
+                return op(expr)
             else:
-                symtab.locals[node.name.name] = interpret(node.value, symtab)
+                raise Exception(
+                    f'{node.location}: incompatible operator {node.op} for integer')
+        else:
+            raise Exception(
+                f'{node.location}: expression must be an integer or boolean')
+
+    def visit_IfStatement(self, node: ast.IfStatement, symtab: SymTab) -> Value:
+        cond = interpret(node.condition, symtab)
+        if node.false_branch is None:
+            if cond is True:
+                interpret(node.true_branch, symtab)
                 return Unit()
-
-        case ast.Block():
-            result = None
-            context = SymTab(
-                locals={},
-                parent=symtab
-            )
-
-            for statement in node.statements:
-                result = interpret(statement, context)
-
-            if result is None:
+            elif cond is False:
                 return Unit()
-
-            return result
-
-        case ast.WhileLoop():
-            cond = interpret(node.condition, symtab)
+            else:
+                raise Exception(
+                    f'{node.location}: unable to evaluate condition')
+        else:
             if cond is True:
-                interpret(node.body, symtab)
-                return interpret(node, symtab)
+                return interpret(node.true_branch, symtab)
             elif cond is False:
-                return Unit()
+                return interpret(node.false_branch, symtab)
             else:
                 raise Exception(
-                    f'{node.location}: failed to evaluate condition')
-
-        case ast.FunctionCall():
-            if isinstance(node.name, ast.Identifier):
-                name = node.name.name
-                if name in top_context.locals:  # only built in functions supported for now
-                    f = top_context.locals[name]
-                    if not callable(f):
-                        raise Exception(
-                            f'{node.location}: {f} is not a function')
-                    args = []
-                    for arg in node.args:
-                        args.append(interpret(arg, symtab))
-                    result = f(*args)
-                    return result
-                else:
+                    f'{node.location}: unable to evaluate condition')
+
+    def visit_VarDeclaration(self, node: ast.VarDeclaration, symtab: SymTab) -> Value:
+        if not isinstance(node.name, ast.Identifier):
+            raise Exception('Only identifiers allowed as variable names')
+        elif node.binding is not None:
+            symtab.store(node.binding, interpret(node.value, symtab))
+            return Unit()
+        elif symtab.is_local(node.name.name):
+            raise Exception(f'Variable {node.name.name} already exists.')
+        else:
+            symtab.add_local(node.name.name, interpret(node.value, symtab))
+            return Unit()
+
+    def visit_Block(self, node: ast.Block, symtab: SymTab) -> Value:
+        result = None
+
+        with symtab.scope(node.frame_size):
+            for statement in node.statements:
+                result = interpret(statement, symtab)
+
+        if result is None:
+            return Unit()
+
+        return result
+
+    def visit_WhileLoop(self, node: ast.WhileLoop, symtab: SymTab) -> Value:
+        cond = interpret(node.condition, symtab)
+        if cond is True:
+            interpret(node.body, symtab)
+            return interpret(node, symtab)
+        elif cond is False:
+            return Unit()
+        else:
+            raise Exception(
+                f'{node.location}: failed to evaluate condition')
+
+    def visit_FunctionCall(self, node: ast.FunctionCall, symtab: SymTab) -> Value:
+        if isinstance(node.name, ast.Identifier):
+            name = node.name.name
+            if name in symtab.globals:  # only built in functions supported for now
+                f = symtab.globals[name]
+                if not callable(f):
                     raise Exception(
-                        f'{node.location}: unknown function call {name}')
+                        f'{node.location}: {f} is not a function')
+                args = []
+                for arg in node.args:
+                    args.append(interpret(arg, symtab))
+                result = f(*args)
+                return result
             else:
                 raise Exception(
-                    f'{node.location}: function name has to be an Identifier')
+                    f'{node.location}: unknown function call {name}')
+        else:
+            raise Exception(
+                f'{node.location}: function name has to be an Identifier')
+
+    def visit_default(self, node: ast.Expression, symtab: SymTab) -> Value:
+        raise Exception(f'{node.location}: unrecognized AST node')
+
 
-        case _:
-            raise Exception(f'{node.location}: unrecognized AST node')
+interpreter = Interpreter()
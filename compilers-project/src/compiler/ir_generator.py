@@ -1,46 +1,45 @@
+from typing import Iterable
 from . import ast, ir
 from .symtab import SymTab
 from .type_definitions import Bool, Int, Type, Unit
 from .ir import IRVar
 from .tokenizer import Location
+from .visitor import Visitor
 
 
-def generate_ir(
-    # 'root_types' parameter should map all global names
-    # like 'print_int' and '+' to their types.
-    root_types: dict[IRVar, Type],
-    root_expr: ast.Expression
-) -> list[ir.Instruction]:
-    var_types: dict[IRVar, Type] = root_types.copy()
+class IRGenerator(Visitor[SymTab, IRVar]):
+    """Emits the IR instructions of a node into `ins` and returns the IR
+    variable that holds its result. Use `generate_ir`."""
+
+    def __init__(self, root_types: dict[IRVar, Type]) -> None:
+        self.var_types: dict[IRVar, Type] = root_types.copy()
 
-    # 'var_unit' is used when an expression's type is 'Unit'.
-    var_unit = IRVar('unit')
-    var_types[var_unit] = Unit
+        # 'var_unit' is used when an expression's type is 'Unit'.
+        self.var_unit = IRVar('unit')
+        self.var_types[self.var_unit] = Unit
 
-    next_var_number = 1
-    next_label_number = 1
+        self.next_var_number = 1
+        self.next_label_number = 1
 
-    def new_var(t: Type) -> IRVar:
+        # We collect the IR instructions that we generate
+        # into this list.
+        self.ins: list[ir.Instruction] = []
+
+    def new_var(self, t: Type) -> IRVar:
         # Create a new unique IR variable and
         # add it to var_types
-        nonlocal next_var_number
-        var = IRVar(f'x{next_var_number}')
-        next_var_number += 1
-        var_types[var] = t
+        var = IRVar(f'x{self.next_var_number}')
+        self.next_var_number += 1
+        self.var_types[var] = t
         return var
 
-    def new_label(loc: Location) -> ir.Label:
-        nonlocal next_label_number
+    def new_label(self, loc: Location) -> ir.Label:
         label = ir.Label(location=loc,
-                         name=f'L{next_label_number}')
-        next_label_number += 1
+                         name=f'L{self.next_label_number}')
+        self.next_label_number += 1
         return label
 
-    # We collect the IR instructions that we generate
-    # into this list.
-    ins: list[ir.Instruction] = []
-
-    # This function visits an AST node,
+    # Each method visits an AST node,
     # appends IR instructions to 'ins',
     # and returns the IR variable where
     # the emitted IR instructions put the result.
@@ -49,205 +48,231 @@ def generate_ir(
     # (which may be shadowed) to unique IR variables.
     # The symbol table will be updated in the same way as
     # in the interpreter and type checker.
-    def visit(st: SymTab, expr: ast.Expression) -> IRVar:
+
+    def visit_Literal(self, expr: ast.Literal, st: SymTab) -> IRVar:
         loc = expr.location
+        # Create an IR variable to hold the value,
+        # and emit the correct instruction to
+        # load the constant value.
+        match expr.value:
+            case bool():
+                var = self.new_var(Bool)
+                self.ins.append(ir.LoadBoolConst(
+                    loc, expr.value, var))
+            case int():
+                var = self.new_var(Int)
+                self.ins.append(ir.LoadIntConst(
+                    loc, expr.value, var))
+            case None:
+                var = self.var_unit
+            case _:
+                raise Exception(
+                    f"{loc}: unsupported literal: {type(expr.value)}")
 
-        match expr:
-            case ast.Literal():
-                # Create an IR variable to hold the value,
-                # and emit the correct instruction to
-                # load the constant value.
-                match expr.value:
-                    case bool():
-                        var = new_var(Bool)
-                        ins.append(ir.LoadBoolConst(
-                            loc, expr.value, var))
-                    case int():
-                        var = new_var(Int)
-                        ins.append(ir.LoadIntConst(
-                            loc, expr.value, var))
-                    case None:
-                        var = var_unit
-                    case _:
-                        raise Exception(
-                            f"{loc}: unsupported literal: {type(expr.value)}")
-
-                # Return the variable that holds
-                # the loaded value.
-                return var
-
-            case ast.Identifier():
-                # Look up the IR variable that corresponds to
-                # the source code variable.
-                return st.require(expr.name)
-
-            case ast.BinaryOp():
-                # Ask the symbol table to return the variable that refers
-                # to the operator to call.
-                var_op = st.require(expr.op)
-
-                # Recursively emit instructions to calculate the operands.
-                var_left = visit(st, expr.left)
-
-                if expr.op == 'and':
-                    l_right = new_label(loc)
-                    l_skip = new_label(loc)
-                    l_end = new_label(loc)
-
-                    ins.append(ir.CondJump(loc, var_left, l_right, l_skip))
-
-                    ins.append(l_right)
-                    var_right = visit(st, expr.right)
-                    result = new_var(Bool)
-                    ins.append(ir.Copy(loc, var_right, result))
-                    ins.append(ir.Jump(loc, l_end))
-
-                    ins.append(l_skip)
-                    ins.append(ir.LoadBoolConst(loc, False, result))
-                    ins.append(ir.Jump(loc, l_end))
-
-                    ins.append(l_end)
-
-                    return result
-
-                elif expr.op == 'or':
-                    l_right = new_label(loc)
-                    l_skip = new_label(loc)
-                    l_end = new_label(loc)
-
-                    ins.append(ir.CondJump(loc, var_left, l_skip, l_right))
-
-                    ins.append(l_right)
-                    var_right = visit(st, expr.right)
-                    result = new_var(Bool)
-                    ins.append(ir.Copy(loc, var_right, result))
-                    ins.append(ir.Jump(loc, l_end))
-
-                    ins.append(l_skip)
-                    ins.append(ir.LoadBoolConst(loc, True, result))
-                    ins.append(ir.Jump(loc, l_end))
-
-                    ins.append(l_end)
-
-                    return result
-
-                var_right = visit(st, expr.right)
-                if expr.op == '=':
-                    if not isinstance(expr.left, ast.Identifier):
-                        raise Exception(f'{loc}: expected an identifier')
-                    ins.append(ir.Copy(loc, var_right, var_left))
-                    return var_right
-                else:
-                    # Generate variable to hold the result.
-                    var_result = new_var(expr.type)
-                    # Emit a Call instruction that writes to that variable.
-                    ins.append(ir.Call(
-                        loc, var_op, [var_left, var_right], var_result))
-                    return var_result
-
-            case ast.UnaryOp():
-                var_op = st.require('unary_' + expr.op)
-                var_value = visit(st, expr.expr)
-                if expr.op == 'not':
-                    var_result = new_var(Bool)
-                elif expr.op == '-':
-                    var_result = new_var(Int)
-                else:
-                    raise Exception(f'{loc}: invalid unary operator {expr.op}')
-                ins.append(ir.Call(loc, var_op, [var_value], var_result))
-                return var_result
-
-            case ast.IfStatement():
-                if expr.false_branch is None:
-                    # Create (but don't emit) some jump targets.
-                    l_then = new_label(loc)
-                    l_end = new_label(loc)
-
-                    # Recursively emit instructions for
-                    # evaluating the condition.
-                    var_cond = visit(st, expr.condition)
-                    # Emit a conditional jump instruction
-                    # to jump to 'l_then' or 'l_end',
-                    # depending on the content of 'var_cond'.
-                    ins.append(ir.CondJump(loc, var_cond, l_then, l_end))
-
-                    # Emit the label that marks the beginning of
-                    # the "then" branch.
-                    ins.append(l_then)
-                    # Recursively emit instructions for the "then" branch.
-                    visit(st, expr.true_branch)
-
-                    # Emit the label that we jump to
-                    # when we don't want to go to the "then" branch.
-                    ins.append(l_end)
-
-                    # An if-then expression doesn't return anything, so we
-                    # return a special variable "unit".
-                    return var_unit
-                else:
-                    ...  # "if-then-else" case
-                    l_then = new_label(loc)
-                    l_else = new_label(loc)
-                    l_end = new_label(loc)
-
-                    var_cond = visit(st, expr.condition)
-                    ins.append(ir.CondJump(loc, var_cond, l_then, l_else))
-
-                    ins.append(l_then)
-                    var_result = visit(st, expr.true_branch)
-                    ins.append(ir.Jump(loc, l_end))
-
-                    ins.append(l_else)
-                    var_else_result = visit(st, expr.false_branch)
-                    ins.append(ir.Copy(loc, var_else_result, var_result))
-
-                    ins.append(l_end)
-                    return var_result
-
-            case ast.VarDeclaration():
-                value = visit(st, expr.value)
-                var = new_var(expr.value.type)
-                st.add_local(expr.name.name, var)
-                ins.append(ir.Copy(loc, value, var))
-                return var_unit
-
-            case ast.Block():
-                symtab = SymTab(locals={}, parent=st)
-                for statement in expr.statements:
-                    visit(symtab, statement)
-                return var_unit
-
-            case ast.FunctionCall():
-                if expr.name is None:
-                    raise Exception(f'{loc}: function has no name')
-                f_var = st.require(expr.name.name)
-                arg_vars = []
-                for arg in expr.args:
-                    arg_var = visit(st, arg)
-                    arg_vars.append(arg_var)
-                result_var = new_var(Unit)
-                ins.append(ir.Call(loc, f_var, arg_vars, result_var))
-                return result_var
-
-            case ast.WhileLoop():
-                l_start = new_label(loc)
-                l_body = new_label(loc)
-                l_end = new_label(loc)
-
-                ins.append(l_start)
-                condition = visit(st, expr.condition)
-                ins.append(ir.CondJump(loc, condition, l_body, l_end))
-
-                ins.append(l_body)
-                visit(st, expr.body)
-                ins.append(ir.Jump(loc, l_start))
-
-                ins.append(l_end)
-
-                return var_unit
+        # Return the variable that holds
+        # the loaded value.
+        return var
 
-            case _:
-                raise Exception(f'Unsupported AST node: {expr}')
+    def visit_Identifier(self, expr: ast.Identifier, st: SymTab) -> IRVar:
+        # Look up the IR variable that corresponds to
+        # the source code variable.
+        if expr.binding is not None:
+            var: IRVar = st.load(expr.binding)
+            return var
+        return st.require(expr.name)
+
+    def visit_BinaryOp(self, expr: ast.BinaryOp, st: SymTab) -> IRVar:
+        loc = expr.location
+        # Ask the symbol table to return the variable that refers
+        # to the operator to call.
+        var_op = st.require(expr.op)
+
+        # Recursively emit instructions to calculate the operands.
+        var_left = self.visit(expr.left, st)
+
+        if expr.op == 'and':
+            l_right = self.new_label(loc)
+            l_skip = self.new_label(loc)
+            l_end = self.new_label(loc)
+
+            self.ins.append(ir.CondJump(loc, var_left, l_right, l_skip))
+
+            self.ins.append(l_right)
+            var_right = self.visit(expr.right, st)
+            result = self.new_var(Bool)
+            self.ins.append(ir.Copy(loc, var_right, result))
+            self.ins.append(ir.Jump(loc, l_end))
+
+            self.ins.append(l_skip)
+            self.ins.append(ir.LoadBoolConst(loc, False, result))
+            self.ins.append(ir.Jump(loc, l_end))
+
+            self.ins.append(l_end)
+
+            return result
+
+        elif expr.op == 'or':
+            l_right = self.new_label(loc)
+            l_skip = self.new_label(loc)
+            l_end = self.new_label(loc)
+
+            self.ins.append(ir.CondJump(loc, var_left, l_skip, l_right))
+
+            self.ins.append(l_right)
+            var_right = self.visit(expr.right, st)
+            result = self.new_var(Bool)
+            self.ins.append(ir.Copy(loc, var_right, result))
+            self.ins.append(ir.Jump(loc, l_end))
+
+            self.ins.append(l_skip)
+            self.ins.append(ir.LoadBoolConst(loc, True, result))
+            self.ins.append(ir.Jump(loc, l_end))
+
+            self.ins.append(l_end)
+
+            return result
+
+        var_right = self.visit(expr.right, st)
+        if expr.op == '=':
+            if not isinstance(expr.left, ast.Identifier):
+                raise Exception(f'{loc}: expected an identifier')
+            self.ins.append(ir.Copy(loc, var_right, var_left))
+            return var_right
+        else:
+            # Generate variable to hold the result.
+            var_result = self.new_var(expr.type)
+            # Emit a Call instruction that writes to that variable.
+            self.ins.append(ir.Call(
+                loc, var_op, [var_left, var_right], var_result))
+            return var_result
+
+    def visit_UnaryOp(self, expr: ast.UnaryOp, st: SymTab) -> IRVar:
+        loc = expr.location
+        var_op = st.require('unary_' + expr.op)
+        var_value = self.visit(expr.expr, st)
+        if expr.op == 'not':
+            var_result = self.new_var(Bool)
+        elif expr.op == '-':
+            var_result = self.new_var(Int)
+        else:
+            raise Exception(f'{loc}: invalid unary operator {expr.op}')
+        self.ins.append(ir.Call(loc, var_op, [var_value], var_result))
+        return var_result
+
+    def visit_IfStatement(self, expr: ast.IfStatement, st: SymTab) -> IRVar:
+        loc = expr.location
+        if expr.false_branch is None:
+            # Create (but don't emit) some jump targets.
+            l_then = self.new_label(loc)
+            l_end = self.new_label(loc)
+
+            # Recursively emit instructions for
+            # evaluating the condition.
+            var_cond = self.visit(expr.condition, st)
+            # Emit a conditional jump instruction
+            # to jump to 'l_then' or 'l_end',
+            # depending on the content of 'var_cond'.
+            self.ins.append(ir.CondJump(loc, var_cond, l_then, l_end))
+
+            # Emit the label that marks the beginning of
+            # the "then" branch.
+            self.ins.append(l_then)
+            # Recursively emit instructions for the "then" branch.
+            self.visit(expr.true_branch, st)
+
+            # Emit the label that we jump to
+            # when we don't want to go to the "then" branch.
+            self.ins.append(l_end)
+
+            # An if-then expression doesn't return anything, so we
+            # return a special variable "unit".
+            return self.var_unit
+        else:
+            ...  # "if-then-else" case
+            l_then = self.new_label(loc)
+            l_else = self.new_label(loc)
+            l_end = self.new_label(loc)
+
+            var_cond = self.visit(expr.condition, st)
+            self.ins.append(ir.CondJump(loc, var_cond, l_then, l_else))
+
+            self.ins.append(l_then)
+            var_result = self.visit(expr.true_branch, st)
+            self.ins.append(ir.Jump(loc, l_end))
+
+            self.ins.append(l_else)
+            var_else_result = self.visit(expr.false_branch, st)
+            self.ins.append(ir.Copy(loc, var_else_result, var_result))
+
+            self.ins.append(l_end)
+            return var_result
+
+    def visit_VarDeclaration(self, expr: ast.VarDeclaration, st: SymTab) -> IRVar:
+        loc = expr.location
+        value = self.visit(expr.value, st)
+        var = self.new_var(expr.value.type)
+        if expr.binding is not None:
+            st.store(expr.binding, var)
+        else:
+            st.add_local(expr.name.name, var)
+        self.ins.append(ir.Copy(loc, value, var))
+        return self.var_unit
+
+    def visit_Block(self, expr: ast.Block, st: SymTab) -> IRVar:
+        with st.scope(expr.frame_size):
+            for statement in expr.statements:
+                self.visit(statement, st)
+        return self.var_unit
+
+    def visit_FunctionCall(self, expr: ast.FunctionCall, st: SymTab) -> IRVar:
+        loc = expr.location
+        if expr.name is None:
+            raise Exception(f'{loc}: function has no name')
+        f_var = st.require(expr.name.name)
+        arg_vars = []
+        for arg in expr.args:
+            arg_var = self.visit(arg, st)
+            arg_vars.append(arg_var)
+        result_var = self.new_var(Unit)
+        self.ins.append(ir.Call(loc, f_var, arg_vars, result_var))
+        return result_var
+
+    def visit_WhileLoop(self, expr: ast.WhileLoop, st: SymTab) -> IRVar:
+        loc = expr.location
+        l_start = self.new_label(loc)
+        l_body = self.new_label(loc)
+        l_end = self.new_label(loc)
+
+        self.ins.append(l_start)
+        condition = self.visit(expr.condition, st)
+        self.ins.append(ir.CondJump(loc, condition, l_body, l_end))
+
+        self.ins.append(l_body)
+        self.visit(expr.body, st)
+        self.ins.append(ir.Jump(loc, l_start))
+
+        self.ins.append(l_end)
+
+        return self.var_unit
+
+    def visit_default(self, expr: ast.Expression, st: SymTab) -> IRVar:
+        raise Exception(f'Unsupported AST node: {expr}')
+
+
+def generate_ir(
+    # 'root_types' parameter should map all global names
+    # like 'print_int' and '+' to their types.
+    root_types: dict[IRVar, Type],
+    # 'root_expr' is either the whole program or the top-level
+    # statements of the program, which are then visited one at a time
+    # as they are produced.
+    root_expr: ast.Expression | Iterable[ast.Expression]
+) -> list[ir.Instruction]:
+    generator = IRGenerator(root_types)
+    var_types = generator.var_types
+    var_unit = generator.var_unit
+    ins = generator.ins
+    new_var = generator.new_var
 
     # Convert 'root_types' into a SymTab
     # that maps all available global names to
@@ -255,33 +280,51 @@ def generate_ir(
     # In the Assembly generator stage, we will give
     # definitions for these globals. For now,
     # they just need to exist.
-    root_symtab = SymTab(locals={str: IRVar}, parent=None)
+    root_symtab = SymTab(locals={})
     for v in root_types.keys():
         if type(v) == str:
             root_symtab.add_local(v, v)
         else:
             root_symtab.add_local(v.name, v)
 
-    ins.append(ir.Label(root_expr.location, 'start'))
-
-    # Start visiting the AST from the root.
-    var_final_result = visit(root_symtab, root_expr)
-
-    if var_types[var_final_result] == Int:
+    if isinstance(root_expr, ast.Expression):
+        location = root_expr.location
+        ins.append(ir.Label(location, 'start'))
+
+        # Start visiting the AST from the root.
+        var_final_result = generator.visit(root_expr, root_symtab)
+    else:
+        # Statements are visited in the scope of a top-level block, and the
+        # result is printed only if the program is a single statement.
+        root_symtab.enter_scope()
+        statement_count = 0
+        for statement in root_expr:
+            if statement_count == 0:
+                location = statement.location
+                ins.append(ir.Label(location, 'start'))
+            var_final_result = generator.visit(statement, root_symtab)
+            statement_count += 1
+
+        if statement_count == 0:
+            raise Exception('Program has no statements')
+        if statement_count > 1:
+            var_final_result = var_unit
+
+    if var_types[var_final_result] is Int:
         ins.append(ir.Call(
-            root_expr.location,
+            location,
             IRVar('print_int'),
             [var_final_result],
             new_var(Int)
         ))
-    elif var_types[var_final_result] == Bool:
+    elif var_types[var_final_result] is Bool:
         ins.append(ir.Call(
-            root_expr.location,
+            location,
             IRVar('print_bool'),
             [var_final_result],
             new_var(Bool)
         ))
 
-    ins.append(ir.Return(root_expr.location))
+    ins.append(ir.Return(location))
 
     return ins
@@ -1,43 +1,206 @@
+import itertools
+from typing import Any, Generator, Iterable, Iterator, Literal, TypeVar
 from .tokenizer import Token
+from .token_buffer import TokenLike
 from . import ast
-
-
-def parse(tokens: list[Token]) -> ast.Expression | None:
-    if len(tokens) == 0:
+from .hash_consing import NodeTable
+
+Associativity = Literal['left', 'right', 'none']
+
+# Precedence and associativity of binary operators. A higher precedence
+# binds tighter. Comparisons cannot be chained, so they are non-associative.
+binary_operators: dict[str, tuple[int, Associativity]] = {
+    '=': (1, 'right'),
+    'or': (2, 'left'),
+    'and': (3, 'left'),
+    '==': (4, 'none'),
+    '!=': (4, 'none'),
+    '<': (5, 'none'),
+    '<=': (5, 'none'),
+    '>': (5, 'none'),
+    '>=': (5, 'none'),
+    '+': (6, 'left'),
+    '-': (6, 'left'),
+    '*': (7, 'left'),
+    '/': (7, 'left'),
+    '%': (7, 'left'),
+}
+
+max_binary_precedence = max(precedence for precedence, _ in binary_operators.values())
+
+T = TypeVar('T')
+
+# A parsing function that may need to parse a subexpression is a generator.
+# Instead of calling the parsing function of the subexpression, it yields
+# its generator and is sent back the result. This keeps the nesting of the
+# program on an explicit stack in `run_parsing` instead of the call stack,
+# so deeply nested programs are not limited by the recursion limit.
+Parsing = Generator[Any, Any, T]
+
+
+def run_parsing(parsing: Parsing[T]) -> T:
+    stack: list[Parsing[Any]] = [parsing]
+    value: Any = None
+    # An exception raised by a parsing function is raised in its caller at
+    # the yield, so that the caller can recover from it.
+    error: Exception | None = None
+    while True:
+        try:
+            if error is None:
+                step = stack[-1].send(value)
+            else:
+                thrown, error = error, None
+                step = stack[-1].throw(thrown)
+        except StopIteration as e:
+            stack.pop()
+            if not stack:
+                return e.value
+            value = e.value
+        except Exception as e:
+            stack.pop()
+            if not stack:
+                raise
+            error = e
+        else:
+            stack.append(step)
+            value = None
+
+
+def parse(tokens: Iterable[TokenLike],
+          diagnostics: list[str] | None = None,
+          nodes: NodeTable | None = None) -> ast.Expression | None:
+    """Parses a program. If `diagnostics` is given, syntax errors are added
+    to it instead of raised, as described in `parse_iter`. If `nodes` is
+    given, equal subtrees share one node from it."""
+    token_iter = iter(tokens)
+    first = next(token_iter, None)
+    if first is None:
         return None
 
-    pos = 0
-
-    def peek() -> Token:
-        if pos < len(tokens):
-            return tokens[pos]
-
-        return Token(
-            location=tokens[-1].location,
-            type='end',
-            text=''
-        )
-
-    def peek_backwards() -> Token:
-        if pos - 1 >= 0:
-            return tokens[pos - 1]
-
-        return tokens[0]
-
-    def consume(expected: str | list[str] | None = None) -> Token:
-        nonlocal pos
-        token = peek()
-        if isinstance(expected, str) and token.text != expected:
-            raise Exception(f'{token.location}: expected "{expected}"')
-
-        if isinstance(expected, list) and token.text not in expected:
-            comma_separated = ", ".join([f'"{e}' for e in expected])
-            raise Exception(
-                f'{token.location}: expected one of: {comma_separated}')
+    # A program of several top-level statements is parsed as a block.
+    statements = parse_iter(itertools.chain([first], token_iter),
+                            diagnostics=diagnostics, nodes=nodes)
+    result = next(statements)
+    second = next(statements, None)
+    if second is None:
+        return result
+
+    block = ast.Block(
+        location=first.location,
+        statements=[result, second, *statements]
+    )
+    if nodes is not None:
+        return nodes.share(block)
+    return block
+
+
+def parse_recovering(tokens: Iterable[TokenLike]) -> tuple[ast.Expression | None, list[str]]:
+    """Parses a program past syntax errors and returns the AST, with error
+    nodes in place of the statements that did not parse, and the errors."""
+    diagnostics: list[str] = []
+    ast_node = parse(tokens, diagnostics)
+    return ast_node, diagnostics
+
+
+def parse_iter(tokens: Iterable[TokenLike],
+               spans: dict[int, tuple[int, int]] | None = None,
+               first_index: int = 0,
+               diagnostics: list[str] | None = None,
+               nodes: NodeTable | None = None) -> Iterator[ast.Expression]:
+    """Yields each top-level statement as soon as it has been parsed, so
+    that later stages can process it before the rest of the program has
+    been read.
+
+    If `spans` is given, the range of token indices of each block and each
+    statement of a block or of the program is stored in it by the id of
+    the node, counting the first token as `first_index`.
+
+    If `diagnostics` is given, a statement of a block or of the program
+    that does not parse is replaced by an ErrorNode and its error message is
+    added to `diagnostics`. Parsing then continues from the next ";" or "}"
+    of the same block, so all syntax errors are found in one pass.
+
+    If `nodes` is given, each statement is hash-consed in it once it has
+    been parsed, so that equal subtrees share one node. The token ranges of
+    `spans` are then recorded for the nodes before sharing."""
+    # Tokens are read from an iterator one at a time, keeping only the
+    # current and the previous token, so that a token stream does not have
+    # to be materialized as a list.
+    token_iter = iter(tokens)
+    first = next(token_iter, None)
+    if first is None:
+        return
+
+    current = first
+    previous: TokenLike | None = None
+    at_end = False
+    # Index of the current token
+    position = first_index
+    # Index of the token where recovery from the last error stopped
+    recovered_at = -1
+
+    def peek() -> TokenLike:
+        return current
+
+    def peek_backwards() -> TokenLike:
+        if previous is not None:
+            return previous
+
+        return first
+
+    def consume(expected: str | list[str] | None = None) -> TokenLike:
+        nonlocal current, previous, at_end, position
+        token = current
+        if expected is not None:
+            if isinstance(expected, str) and token.text != expected:
+                raise Exception(f'{token.location}: expected "{expected}"')
+
+            if isinstance(expected, list) and token.text not in expected:
+                comma_separated = ", ".join([f'"{e}' for e in expected])
+                raise Exception(
+                    f'{token.location}: expected one of: {comma_separated}')
+
+        if not at_end:
+            previous = token
+            position += 1
+            next_token = next(token_iter, None)
+            if next_token is not None:
+                current = next_token
+            else:
+                at_end = True
+                current = Token(
+                    location=token.location,
+                    type='end',
+                    text=''
+                )
 
-        pos += 1
         return token
 
+    def record_span(node: ast.Expression, start: int) -> None:
+        if spans is not None:
+            spans[id(node)] = (start, position)
+
+    def recover(error: Exception, start_token: TokenLike) -> ast.ErrorNode:
+        """Records `error` and skips to the ";" or "}" that ends the
+        statement that started at `start_token`."""
+        nonlocal recovered_at
+        if diagnostics is None:
+            raise error
+        diagnostics.append(str(error))
+        depth = 0
+        while current.type != 'end':
+            if current.text == '{':
+                depth += 1
+            elif current.text == '}':
+                if depth == 0:
+                    break
+                depth -= 1
+            elif current.text == ';' and depth == 0:
+                break
+            consume()
+        recovered_at = position
+        return ast.ErrorNode(start_token.location, message=str(error))
+
     def parse_int_literal() -> ast.Literal:
         if peek().type != 'integer':
             raise Exception(f'{peek().location}: expected an integer')
@@ -78,16 +241,16 @@ def parse(tokens: list[Token]) -> ast.Expression | None:
         raise Exception(
             f'{token.location}: expected boolean true/True or false/False')
 
-    def parse_if_statement() -> ast.IfStatement:
+    def parse_if_statement() -> Parsing[ast.IfStatement]:
         location = peek().location
         consume('if')
-        condition = parse_expression()
+        condition = yield parse_expression()
         consume('then')
-        true_branch = parse_expression()
+        true_branch = yield parse_expression()
 
         if peek().text == 'else':
             consume('else')
-            false_branch = parse_expression()
+            false_branch = yield parse_expression()
         else:
             false_branch = None
 
@@ -98,13 +261,13 @@ def parse(tokens: list[Token]) -> ast.Expression | None:
             false_branch
         )
 
-    def parse_while_loop() -> ast.WhileLoop:
+    def parse_while_loop() -> Parsing[ast.WhileLoop]:
         location = peek().location
         consume('while')
-        condition = parse_expression()
+        condition = yield parse_expression()
 
         consume('do')
-        body = parse_expression()
+        body = yield parse_expression()
 
         return ast.WhileLoop(
             location,
@@ -112,7 +275,7 @@ def parse(tokens: list[Token]) -> ast.Expression | None:
             body
         )
 
-    def parse_function_call() -> ast.FunctionCall:
+    def parse_function_call() -> Parsing[ast.FunctionCall]:
         identifier = peek_backwards()
         consume('(')
         f = ast.FunctionCall(
@@ -125,7 +288,7 @@ def parse(tokens: list[Token]) -> ast.Expression | None:
             if peek().text == ',':
                 consume(',')
 
-            f.args.append(parse_expression())
+            f.args.append((yield parse_expression()))
 
         consume(')')
         return f
@@ -150,13 +313,13 @@ def parse(tokens: list[Token]) -> ast.Expression | None:
         else:
             return None
 
-    def parse_var_declaration() -> ast.VarDeclaration:
+    def parse_var_declaration() -> Parsing[ast.VarDeclaration]:
         location = peek().location
         consume('var')
         name = parse_identifier()
         var_type = parse_type_expression()
         consume('=')
-        value = parse_expression()
+        value = yield parse_expression()
 
         return ast.VarDeclaration(
             location,
@@ -165,8 +328,9 @@ def parse(tokens: list[Token]) -> ast.Expression | None:
             value
         )
 
-    def parse_block() -> ast.Block:
+    def parse_block() -> Parsing[ast.Block]:
         location = peek().location
+        block_start = position
         consume('{')
         block = ast.Block(
             location,
@@ -175,51 +339,70 @@ def parse(tokens: list[Token]) -> ast.Expression | None:
 
         while peek().text != '}':
             if peek().type == 'end':
-                raise Exception(f'{peek().location}: expected a "}}"')
-
-            block.statements.append(parse_expression())
+                error = Exception(f'{peek().location}: expected a "}}"')
+                if diagnostics is None:
+                    raise error
+                diagnostics.append(str(error))
+                return block
+
+            start = position
+            start_token = current
+            try:
+                statement = yield parse_expression()
+                # When recovering, a missing "}" at the end is reported
+                # once as such.
+                if (peek().text not in [';', '{', '}'] and peek_backwards().text != '}'
+                        and not (diagnostics is not None and peek().type == 'end')):
+                    raise Exception(f'{peek().location}: expected ";" or "}}"')
+            except Exception as e:
+                statement = recover(e, start_token)
+            record_span(statement, start)
+            block.statements.append(statement)
             if peek().text == ';':
                 consume(';')
                 if peek().text == '}':
                     location = peek().location
-                    block.statements.append(ast.Literal(location, value=None))
-            elif peek_backwards().text == '}':
-                continue
-            elif peek().text not in ['{', '}']:
-                raise Exception(f'{peek().location}: expected ";" or "}}"')
+                    unit = ast.Literal(location, value=None)
+                    if spans is not None:
+                        # The unit value stands for the closing brace.
+                        spans[id(unit)] = (position, position + 1)
+                    block.statements.append(unit)
 
         consume('}')
+        record_span(block, block_start)
 
         return block
 
-    def parse_factor() -> ast.Expression:
-        if peek().text == '(':
-            return parse_parenthesized()
-
-        if peek().text == '{':
-            return parse_block()
-
-        if peek().type == 'integer':
+    def parse_factor() -> Parsing[ast.Expression]:
+        # Literals and identifiers are the most common factors, so they are
+        # checked first.
+        if current.type == 'integer':
             return parse_int_literal()
 
-        if peek().type == 'identifier':
+        if current.type == 'identifier':
             identifier = parse_identifier()
-            if peek().text == '(':
-                f = parse_function_call()
+            if current.text == '(':
+                f = yield parse_function_call()
                 f.name = identifier
                 return f
 
             return identifier
 
+        if peek().text == '(':
+            return (yield parse_parenthesized())
+
+        if peek().text == '{':
+            return (yield parse_block())
+
         if peek().type == 'keyword':
             if peek().text == 'if':
-                return parse_if_statement()
+                return (yield parse_if_statement())
 
             if peek().text == 'while':
-                return parse_while_loop()
+                return (yield parse_while_loop())
 
-            if pos == 0 or peek_backwards().text in [';', '{', '}']:
-                return parse_var_declaration()
+            if previous is None or peek_backwards().text in [';', '{', '}']:
+                return (yield parse_var_declaration())
 
             raise Exception(
                 f'{peek().location}: unexpected keyword "{peek().text}"')
@@ -228,23 +411,23 @@ def parse(tokens: list[Token]) -> ast.Expression | None:
             return parse_bool_literal()
 
         if peek().text in ['-', 'not']:
-            return parse_unary_op()
+            return (yield parse_unary_op())
 
         raise Exception(
             f'{peek().location}: expected integer, identifier, keyword, boolean literal or unary operator')
 
-    def parse_parenthesized() -> ast.Expression:
+    def parse_parenthesized() -> Parsing[ast.Expression]:
         consume('(')
-        expr = parse_expression()
+        expr = yield parse_expression()
         consume(')')
         return expr
 
-    def parse_unary_op() -> ast.Expression:
+    def parse_unary_op() -> Parsing[ast.Expression]:
         location = peek().location
         if peek().text in ['-', 'not']:
             operator_token = consume()
             operator = operator_token.text
-            expr = parse_factor()
+            expr = yield parse_factor()
             return ast.UnaryOp(
                 location,
                 operator,
@@ -254,165 +437,79 @@ def parse(tokens: list[Token]) -> ast.Expression | None:
         raise Exception(
             f'{peek().location}: expected unary operator - or not')
 
-    def parse_term() -> ast.Expression:
-        left = parse_factor()
-
-        while peek().text in ['*', '/', '%']:
-            location = peek().location
-            operator_token = consume()
-            operator = operator_token.text
-            right = parse_factor()
-
-            left = ast.BinaryOp(
-                location,
-                left,
-                operator,
-                right
-            )
-
-        return left
-
-    def parse_polynomial() -> ast.Expression:
-        left = parse_term()
-
-        while peek().text in ['+', '-']:
-            location = peek().location
-            operator_token = consume()
-            operator = operator_token.text
-            right = parse_term()
-
-            left = ast.BinaryOp(
-                location,
-                left,
-                operator,
-                right
-            )
-
-        return left
-
-    def parse_comparison() -> ast.Expression:
-        left = parse_polynomial()
-
-        if peek().text in ['<=', '>=', '<', '>']:
-            location = peek().location
-            operator_token = consume()
-            operator = operator_token.text
-            right = parse_polynomial()
-
-            left = ast.BinaryOp(
-                location,
-                left,
-                operator,
-                right
-            )
-
-        return left
-
-    def parse_equality() -> ast.Expression:
-        left = parse_comparison()
-
-        if peek().text in ['==', '!=']:
-            location = peek().location
-            operator_token = consume()
-            operator = operator_token.text
-            right = parse_comparison()
-
-            left = ast.BinaryOp(
-                location,
-                left,
-                operator,
-                right
-            )
-
-        return left
-
-    def parse_logical_and() -> ast.Expression:
-        left = parse_equality()
-
-        while peek().text in ['and']:
-            location = peek().location
-            operator_token = consume()
-            operator = operator_token.text
-            right = parse_equality()
-
-            left = ast.BinaryOp(
-                location,
-                left,
-                operator,
-                right
-            )
-
-        return left
-
-    def parse_logical_or() -> ast.Expression:
-        left = parse_logical_and()
-
-        while peek().text in ['or']:
-            location = peek().location
-            operator_token = consume()
-            operator = operator_token.text
-            right = parse_logical_and()
-
-            left = ast.BinaryOp(
-                location,
-                left,
-                operator,
-                right
-            )
-
-        return left
+    def parse_expression(min_precedence: int = 1) -> Parsing[ast.Expression]:
+        left = yield from parse_factor()
+        return (yield from parse_binary_ops(left, min_precedence))
+
+    def parse_binary_ops(left: ast.Expression,
+                         min_precedence: int) -> Parsing[ast.Expression]:
+        # Precedence climbing: parses operators of at least `min_precedence`
+        # after `left`, and after an operator only operators that may follow
+        # it on the same level, i.e. none of higher precedence and none of
+        # the same precedence after a non-associative one.
+        max_precedence = max_binary_precedence
+
+        while True:
+            operator = binary_operators.get(current.text)
+            if operator is None:
+                break
+            precedence, associativity = operator
+            if not min_precedence <= precedence <= max_precedence:
+                break
 
-    def parse_expression() -> ast.Expression:
-        left = parse_logical_or()
-
-        if peek().text in ['=']:
-            location = peek().location
             operator_token = consume()
-            operator = operator_token.text
-            right = parse_expression_right()
+            right = yield from parse_factor()
+
+            # Only recurse if the next operator may belong to the right
+            # operand, so that an operand followed by an operator of the
+            # same level costs no extra call.
+            next_operator = binary_operators.get(current.text)
+            if next_operator is not None:
+                if associativity == 'right':
+                    right = yield parse_binary_ops(right, precedence)
+                elif next_operator[0] > precedence:
+                    right = yield parse_binary_ops(right, precedence + 1)
 
             left = ast.BinaryOp(
-                location,
+                operator_token.location,
                 left,
-                operator,
+                operator_token.text,
                 right
             )
 
-        return left
-
-    def parse_expression_right() -> ast.Expression:
-        left = parse_equality()
-
-        if peek().text in ['=']:
-            location = peek().location
-            operator_token = consume()
-            operator = operator_token.text
-            right = parse_expression_right()
-            return ast.BinaryOp(
-                location,
-                left,
-                operator,
-                right
-            )
+            if associativity == 'none':
+                max_precedence = precedence - 1
+            else:
+                max_precedence = precedence
 
         return left
 
-    result = parse_expression()
-
-    if pos < len(tokens):
-        result = ast.Block(
-            location=tokens[0].location,
-            statements=[
-                result
-            ]
-        )
-
-        while peek().type != 'end':
-            if peek().text == ';' or peek_backwards().text == '}':
-                if peek().text == ';':
-                    consume(';')
-                result.statements.append(parse_expression())
-            else:
-                raise Exception(f'Unexpected token: {tokens[pos]}')
-
-    return result
+    def parse_statement() -> ast.Expression:
+        start = position
+        start_token = current
+        try:
+            statement = run_parsing(parse_expression())
+        except Exception as e:
+            statement = recover(e, start_token)
+        record_span(statement, start)
+        if nodes is not None:
+            return nodes.share(statement)
+        return statement
+
+    yield parse_statement()
+
+    while peek().type != 'end':
+        if peek().text == '}' and diagnostics is not None:
+            # When recovering, a "}" without a matching "{" is skipped, so
+            # that parsing makes progress. It is reported unless recovery
+            # already stopped at it.
+            if recovered_at != position:
+                recover(Exception(f'Unexpected token: {peek()}'), current)
+            consume('}')
+        elif peek().text == ';' or peek_backwards().text == '}':
+            if peek().text == ';':
+                consume(';')
+            yield parse_statement()
+        else:
+            error = Exception(f'Unexpected token: {peek()}')
+            recover(error, current)
@@ -0,0 +1,129 @@
+from typing import Iterable, Iterator
+from . import ast
+from .visitor import Visitor
+
+# Slots of the names declared in each enclosing block, from the outermost
+Scopes = list[dict[str, int]]
+
+
+def resolve(node: ast.Expression, shared: bool = False,
+            diagnostics: list[str] | None = None) -> ast.Expression:
+    """Binds the variables declared in the blocks of `node` to their scope
+    depth and slot, so that the passes can look them up by index. Names not
+    declared in a block, like built-in functions, are left unbound and are
+    looked up by name.
+
+    `shared` tells that `node` is hash-consed, so that a node that occurs
+    in several places must be checked to have the same binding in each.
+
+    If `diagnostics` is given, a variable declared again in the same block
+    is added to it instead of raised, like `typecheck` does with type
+    errors, and the declaration is left unbound."""
+    Resolver(shared, diagnostics).visit(node, [])
+    return node
+
+
+def resolve_statements(statements: Iterable[ast.Expression],
+                       shared: bool = False,
+                       diagnostics: list[str] | None = None
+                       ) -> Iterator[ast.Expression]:
+    """Resolves top-level statements one at a time as they are parsed, in
+    the scope of the program, like `typecheck_statements`. Shared nodes are
+    checked within each statement. `diagnostics` is as in `resolve`."""
+    resolver = Resolver(shared, diagnostics)
+    scopes: Scopes = [{}]
+    for statement in statements:
+        resolver.visit(statement, scopes)
+        # The statement may be freed once it has been passed on.
+        resolver.bindings.clear()
+        yield statement
+
+
+class Resolver(Visitor[Scopes, None]):
+    """Sets the bindings of identifiers and variable declarations and the
+    frame sizes of blocks. Use `resolve`.
+
+    A variable is in scope after its declaration until the end of its
+    block, and a declaration's value is resolved before the variable is
+    declared, as the passes evaluate it. A node shared by a hash-consed tree
+    must have the same binding everywhere it occurs."""
+
+    def __init__(self, shared: bool = False,
+                 diagnostics: list[str] | None = None) -> None:
+        self.shared = shared
+        self.diagnostics = diagnostics
+        # Nodes bound so far and their bindings by the id of the node, if
+        # the tree is hash-consed. The nodes are kept so that their ids are
+        # not reused.
+        self.bindings: dict[int, tuple[ast.Expression, ast.Binding | None]] = {}
+
+    def bind(self, node: ast.Identifier | ast.VarDeclaration,
+             binding: ast.Binding | None) -> None:
+        if self.shared:
+            _, bound = self.bindings.setdefault(id(node), (node, binding))
+            if bound != binding:
+                raise Exception(
+                    f'{node.location}: shared node is bound to different variables')
+        node.binding = binding
+
+    def visit_Literal(self, node: ast.Literal, scopes: Scopes) -> None:
+        pass
+
+    def visit_Identifier(self, node: ast.Identifier, scopes: Scopes) -> None:
+        for depth in range(len(scopes) - 1, -1, -1):
+            slot = scopes[depth].get(node.name)
+            if slot is not None:
+                self.bind(node, (depth, slot))
+                return
+        self.bind(node, None)
+
+    def visit_VarDeclaration(self, node: ast.VarDeclaration,
+                             scopes: Scopes) -> None:
+        self.visit(node.value, scopes)
+        if not scopes:
+            # Declared in the scope the passes are given, outside any block
+            self.bind(node, None)
+            return
+        scope = scopes[-1]
+        if node.name.name in scope:
+            error = f'{node.location}: {node.name.name} is already defined'
+            if self.diagnostics is None:
+                raise Exception(error)
+            self.diagnostics.append(error)
+            self.bind(node, None)
+            return
+        scope[node.name.name] = len(scope)
+        self.bind(node, (len(scopes) - 1, scope[node.name.name]))
+
+    def visit_Block(self, node: ast.Block, scopes: Scopes) -> None:
+        scopes.append({})
+        for statement in node.statements:
+            self.visit(statement, scopes)
+        node.frame_size = len(scopes.pop())
+
+    def visit_FunctionCall(self, node: ast.FunctionCall,
+                           scopes: Scopes) -> None:
+        # Functions are built in, so only the arguments are resolved.
+        for arg in node.args:
+            self.visit(arg, scopes)
+
+    def visit_BinaryOp(self, node: ast.BinaryOp, scopes: Scopes) -> None:
+        self.visit(node.left, scopes)
+        self.visit(node.right, scopes)
+
+    def visit_UnaryOp(self, node: ast.UnaryOp, scopes: Scopes) -> None:
+        self.visit(node.expr, scopes)
+
+    def visit_IfStatement(self, node: ast.IfStatement, scopes: Scopes) -> None:
+        self.visit(node.condition, scopes)
+        self.visit(node.true_branch, scopes)
+        if node.false_branch is not None:
+            self.visit(node.false_branch, scopes)
+
+    def visit_WhileLoop(self, node: ast.WhileLoop, scopes: Scopes) -> None:
+        self.visit(node.condition, scopes)
+        self.visit(node.body, scopes)
+
+    def visit_default(self, node: ast.Expression, scopes: Scopes) -> None:
+        # Error nodes have nothing to resolve.
+        pass
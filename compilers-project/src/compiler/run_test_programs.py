@@ -1,8 +1,8 @@
 import os
 import subprocess
 from dataclasses import dataclass
-from .tokenizer import tokenize
-from .parser import parse
+from .cache import FrontEndCache, tokenize_and_parse
+from .resolver import resolve
 from .type_checker import typecheck
 from .ir_generator import generate_ir
 from .assembly_generator import generate_assembly
@@ -53,13 +53,16 @@ def get_all_testcases(directory: str) -> list[TestCase]:
     return test_cases
 
 
-def compile(testcase: TestCase) -> None:
-    tokens = tokenize(testcase.name, testcase.input)
-    ast_node = parse(tokens)
+def compile(testcase: TestCase, cache: FrontEndCache | None = None) -> None:
+    _, ast_node = tokenize_and_parse(testcase.name, testcase.input, cache)
     if ast_node is None:
         raise Exception('AST node was none')
-    typechecker_symtab = SymTab(locals={}, parent=None)
-    typecheck(ast_node, typechecker_symtab)
+    diagnostics: list[str] = []
+    resolve(ast_node, diagnostics=diagnostics)
+    typechecker_symtab = SymTab(locals={})
+    typecheck(ast_node, typechecker_symtab, diagnostics)
+    if diagnostics:
+        raise Exception('\n'.join(diagnostics))
     local_root_types = root_types.copy()
     ir_instructions = generate_ir(local_root_types, ast_node)
     asm_code = generate_assembly(ir_instructions)
@@ -82,14 +85,14 @@ def run_program_and_get_output(program_path: str) -> str:
         return ''
 
 
-def check_test_cases() -> None:
+def check_test_cases(cache: FrontEndCache | None = None) -> None:
     directory = 'test_programs/'
     test_cases = get_all_testcases(directory)
     successful = 0
 
     def run_test_case(testcase: TestCase) -> None:
         nonlocal successful
-        compile(testcase)
+        compile(testcase, cache)
         output = run_program_and_get_output('./')
         output = output.strip()
         try:
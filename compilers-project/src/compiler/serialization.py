@@ -0,0 +1,214 @@
+import marshal
+from array import array
+from typing import Any
+from . import ast
+from .arena import (AstArena, BOOL_TYPE, HAS_NAME, INT_TYPE, LITERAL_BIG_INT,
+                    LITERAL_BOOL, LITERAL_UNIT, arena_from_tree, kind_codes,
+                    operators)
+from .tokenizer import Location
+from .type_definitions import BasicType, ErrorType, FunType, Type
+
+# Serialized ASTs start with MAGIC and a byte of FORMAT_VERSION.
+MAGIC = b'AST\0'
+
+# Increase when the format changes. Data in other versions is rejected.
+FORMAT_VERSION = 2
+
+LITERAL = kind_codes[ast.Literal]
+IDENTIFIER = kind_codes[ast.Identifier]
+BINARY_OP = kind_codes[ast.BinaryOp]
+UNARY_OP = kind_codes[ast.UnaryOp]
+IF_STATEMENT = kind_codes[ast.IfStatement]
+WHILE_LOOP = kind_codes[ast.WhileLoop]
+BLOCK = kind_codes[ast.Block]
+FUNCTION_CALL = kind_codes[ast.FunctionCall]
+VAR_DECLARATION = kind_codes[ast.VarDeclaration]
+ERROR_NODE = kind_codes[ast.ErrorNode]
+
+
+def encode_type(t: Type) -> tuple:
+    if isinstance(t, FunType):
+        return (
+            'FunType',
+            t.name,
+            tuple(encode_type(arg) for arg in t.args),
+            None if t.return_type is None else encode_type(t.return_type)
+        )
+    return (type(t).__name__, t.name)
+
+
+def decode_type(data: tuple) -> Type:
+    if data[0] == 'FunType':
+        return FunType(
+            data[1],
+            tuple(decode_type(arg) for arg in data[2]),
+            None if data[3] is None else decode_type(data[3])
+        )
+    if data[0] == 'BasicType':
+        return BasicType(data[1])
+    if data[0] == 'ErrorType':
+        return ErrorType(data[1])
+    return Type(data[1])
+
+
+def pack(values: array) -> tuple[str, bytes]:
+    """Returns the smallest array type code that holds `values`, and the
+    values stored as that type."""
+    low = min(values, default=0)
+    high = max(values, default=0)
+    codes = 'bhiq' if low < 0 else 'BHIQ'
+    for code in codes:
+        bits = array(code).itemsize * 8
+        if low < 0 and -(1 << (bits - 1)) <= low and high < 1 << (bits - 1):
+            break
+        if low >= 0 and high < 1 << bits:
+            break
+    return code, array(code, values).tobytes()
+
+
+def unpack(data: tuple[str, bytes]) -> list[int]:
+    return array(data[0], data[1]).tolist()
+
+
+def serialize(root: ast.Expression) -> bytes:
+    """Encodes an AST, including the types and locations of its nodes, as
+    the arrays of its arena and tables of the strings and types they refer
+    to. Locations keep their line and column, so the source is not needed
+    to load them."""
+    arena = arena_from_tree(root)
+
+    files: dict[str, int] = {}
+    file_ids = array('H')
+    offsets = array('I')
+    lines = array('I')
+    columns = array('I')
+    for location in arena.locations:
+        file_ids.append(files.setdefault(location.file, len(files)))
+        offsets.append(location.offset)
+        lines.append(location.line)
+        columns.append(location.column)
+
+    # Types are interned, so equal types get the same id.
+    types: dict[Type, int] = {}
+    type_ids = array('I')
+    for t in arena.types:
+        type_ids.append(types.setdefault(t, len(types)))
+
+    # Only literals, identifiers and error nodes have values.
+    values = array('q', [arena.values[i] for i in range(len(arena))
+                         if arena.kinds[i] in [LITERAL, IDENTIFIER, ERROR_NODE]])
+
+    return MAGIC + bytes([FORMAT_VERSION]) + marshal.dumps((
+        arena.root,
+        arena.kinds.tobytes(),
+        arena.ops.tobytes(),
+        pack(values),
+        pack(arena.child_starts),
+        pack(arena.children),
+        pack(file_ids),
+        pack(offsets),
+        pack(lines),
+        pack(columns),
+        pack(type_ids),
+        list(files),
+        arena.names,
+        [encode_type(t) for t in types],
+        arena.big_ints,
+    ))
+
+
+def deserialize(data: bytes, input_file: str | None = None) -> ast.Expression:
+    """Decodes an AST encoded by `serialize`. If `input_file` is given, the
+    locations are in it instead of the files they were encoded with."""
+    if not data.startswith(MAGIC) or len(data) <= len(MAGIC):
+        raise Exception('Data is not a serialized AST')
+    version = data[len(MAGIC)]
+    if version != FORMAT_VERSION:
+        raise Exception(f'Unsupported AST format version {version}, '
+                        f'expected {FORMAT_VERSION}')
+    fields: tuple[Any, ...] = marshal.loads(data[len(MAGIC) + 1:])
+
+    (root, kinds, ops, values, child_starts, children, file_ids, offsets,
+     lines, columns, type_ids, files, names, type_table, big_ints) = fields
+    kinds = list(kinds)
+    ops = list(ops)
+    values = iter(unpack(values))
+    child_starts = unpack(child_starts)
+    children = unpack(children)
+    file_ids = unpack(file_ids)
+    offsets = unpack(offsets)
+    lines = unpack(lines)
+    columns = unpack(columns)
+    type_ids = unpack(type_ids)
+    types = [decode_type(t) for t in type_table]
+    if input_file is not None:
+        files = [input_file] * len(files)
+
+    # Children come before their parents, so the nodes can be built in
+    # order of their ids.
+    nodes: list[ast.Expression] = []
+    child_starts.append(len(children))
+    for i in range(len(kinds)):
+        kind = kinds[i]
+        location = Location(files[file_ids[i]], lines[i], columns[i],
+                            offsets[i])
+        node_type = types[type_ids[i]]
+        first = child_starts[i]
+        node: ast.Expression
+        if kind == LITERAL:
+            op = ops[i]
+            value: int | bool | None = next(values)
+            if op == LITERAL_BOOL:
+                value = bool(value)
+            elif op == LITERAL_UNIT:
+                value = None
+            elif op == LITERAL_BIG_INT:
+                value = big_ints[value]
+            node = ast.Literal(location, value, type=node_type)
+        elif kind == IDENTIFIER:
+            node = ast.Identifier(location, names[next(values)], type=node_type)
+        elif kind == BINARY_OP:
+            node = ast.BinaryOp(location, nodes[children[first]],
+                                operators[ops[i]], nodes[children[first + 1]],
+                                type=node_type)
+        elif kind == UNARY_OP:
+            node = ast.UnaryOp(location, operators[ops[i]],
+                               nodes[children[first]], type=node_type)
+        elif kind == IF_STATEMENT:
+            false_branch = None
+            if child_starts[i + 1] - first > 2:
+                false_branch = nodes[children[first + 2]]
+            node = ast.IfStatement(location, nodes[children[first]],
+                                   nodes[children[first + 1]], false_branch,
+                                   type=node_type)
+        elif kind == WHILE_LOOP:
+            node = ast.WhileLoop(location, nodes[children[first]],
+                                 nodes[children[first + 1]], type=node_type)
+        elif kind == BLOCK:
+            node = ast.Block(location, [
+                nodes[child] for child in children[first:child_starts[i + 1]]
+            ], type=node_type)
+        elif kind == FUNCTION_CALL:
+            args = [nodes[child]
+                    for child in children[first:child_starts[i + 1]]]
+            name = args.pop(0) if ops[i] == HAS_NAME else None
+            assert name is None or isinstance(name, ast.Identifier)
+            node = ast.FunctionCall(location, name, args, type=node_type)
+        elif kind == VAR_DECLARATION:
+            name = nodes[children[first]]
+            assert isinstance(name, ast.Identifier)
+            var_type: ast.TypeExpression | None = None
+            if ops[i] == INT_TYPE:
+                var_type = ast.Int('Int')
+            elif ops[i] == BOOL_TYPE:
+                var_type = ast.Bool('Bool')
+            node = ast.VarDeclaration(location, name, var_type,
+                                      nodes[children[first + 1]],
+                                      type=node_type)
+        elif kind == ERROR_NODE:
+            node = ast.ErrorNode(location, names[next(values)], type=node_type)
+        else:
+            raise Exception(f'Unknown AST node kind {kind}')
+        nodes.append(node)
+
+    return nodes[root]
@@ -1,28 +1,111 @@
 import operator
-from dataclasses import dataclass
 from typing import Any
 from .type_definitions import Bool, Int, Type, Unit
 from .ir import IRVar
 
 
-@dataclass
 class SymTab:
-    locals: dict
-    parent: 'SymTab | None'
+    """Symbol table of nested scopes, starting with a global scope holding
+    `locals`.
+
+    Each name maps to a stack of its values in the scopes that declare it,
+    innermost last, so a lookup is one dict probe. The names declared in a
+    scope are logged, and exiting the scope pops them off their stacks, so
+    entering a block allocates no dict.
+
+    Variables bound by the resolver are kept in one array of slots instead,
+    in which each enclosing block has a frame starting at its base."""
+
+    def __init__(self, locals: dict, parent: None = None) -> None:
+        # `parent=None` is accepted for compatibility with the parent-linked
+        # tables. Nested scopes are entered with `scope` instead, so a
+        # parent table is an error rather than silently ignored.
+        if parent is not None:
+            raise TypeError(
+                'SymTab no longer takes a parent table, use scope() instead')
+        # The global scope, like built-in functions and operators
+        self.globals = locals
+        self.values: dict[str, list[Any]] = {
+            name: [value] for name, value in locals.items()}
+        # Depths of the scopes that declare each name
+        self.depths: dict[str, list[int]] = {name: [0] for name in locals}
+        self.depth = 0
+        # Names declared in the open scopes, and where each scope starts
+        self.log: list[str] = []
+        self.marks: list[int] = []
+        self.slots: list[Any] = []
+        self.bases: list[int] = []
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.values
 
     def require(self, name: str) -> Any:
-        if name in self.locals:
-            return self.locals[name]
-        elif self.parent is not None:
-            return self.parent.require(name)
-        else:
+        values = self.values.get(name)
+        if values is None:
             return None
+        return values[-1]
+
+    def is_local(self, name: str) -> bool:
+        depths = self.depths.get(name)
+        return depths is not None and depths[-1] == self.depth
 
     def add_local(self, name: str, value: Any) -> None:
-        if name in self.locals:
+        if self.is_local(name):
             raise Exception(f'{name} is already defined')
+        if name in self.values:
+            self.values[name].append(value)
+            self.depths[name].append(self.depth)
         else:
-            self.locals[name] = value
+            self.values[name] = [value]
+            self.depths[name] = [self.depth]
+        self.log.append(name)
+
+    def assign(self, name: str, value: Any) -> None:
+        """Sets the value of the innermost variable called `name`."""
+        self.values[name][-1] = value
+
+    def enter_scope(self, frame_size: int = 0) -> None:
+        self.depth += 1
+        self.marks.append(len(self.log))
+        self.bases.append(len(self.slots))
+        self.slots.extend([None] * frame_size)
+
+    def exit_scope(self) -> None:
+        mark = self.marks.pop()
+        for name in reversed(self.log[mark:]):
+            values = self.values[name]
+            values.pop()
+            self.depths[name].pop()
+            if not values:
+                del self.values[name]
+                del self.depths[name]
+        del self.log[mark:]
+        del self.slots[self.bases.pop():]
+        self.depth -= 1
+
+    def scope(self, frame_size: int = 0) -> 'SymTab':
+        """Enters a scope that is exited at the end of a `with` statement,
+        also if it raises."""
+        self.enter_scope(frame_size)
+        return self
+
+    def __enter__(self) -> 'SymTab':
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.exit_scope()
+
+    def load(self, binding: tuple[int, int]) -> Any:
+        depth, slot = binding
+        return self.slots[self.bases[depth] + slot]
+
+    def store(self, binding: tuple[int, int], value: Any) -> None:
+        depth, slot = binding
+        index = self.bases[depth] + slot
+        if index >= len(self.slots):
+            # The frame of top-level statements grows as they are checked.
+            self.slots.extend([None] * (index + 1 - len(self.slots)))
+        self.slots[index] = value
 
 
 def print_int(i: int) -> None:
@@ -83,18 +166,3 @@ root_types: dict[IRVar, Type] = {
     IRVar('unary_not'): Bool
 }
 
-
-def find_top_level_context(symtab: SymTab) -> SymTab:
-    if symtab.parent is not None:
-        return find_top_level_context(symtab.parent)
-    return symtab
-
-
-def find_context(symtab: SymTab, name: str) -> SymTab | None:
-    if name in symtab.locals:
-        return symtab
-    else:
-        if symtab.parent is not None:
-            return find_context(symtab.parent, name)
-        else:
-            return None
@@ -0,0 +1,354 @@
+import re
+import sys
+from array import array
+from bisect import bisect_left
+from dataclasses import dataclass
+from typing import Iterator, get_args
+from .tokenizer import (LineIndex, Location, Token, TokenType, keyword_types,
+                        scan, symbol_types, token_patterns)
+
+
+token_types: tuple[TokenType, ...] = get_args(TokenType)
+type_codes: dict[TokenType, int] = {
+    type: code for code, type in enumerate(token_types)
+}
+
+# Texts of fixed lexemes. Every TokenBuffer interns these first, so that
+# their text ids are the same in every buffer.
+fixed_texts: list[str] = list(keyword_types) + list(symbol_types)
+
+# Text id of a token whose text has not been decoded from the source yet.
+UNRESOLVED = 0xFFFFFFFF
+
+
+class TokenBuffer:
+    """Tokens of a source stored as parallel arrays instead of Token objects:
+    a type code, start and end offsets into the source and an index into a
+    table of interned token texts for each token."""
+
+    def __init__(self, input_file: str,
+                 source_code: str | bytes | memoryview) -> None:
+        self.input_file = input_file
+        self.source_code = source_code
+        self.types = array('B')
+        self.starts = array('I')
+        self.ends = array('I')
+        self.text_ids = array('I')
+        self.texts: list[str] = []
+        self.text_index: dict[str, int] = {}
+        self._line_index: LineIndex | None = None
+        # Offsets of the tokens from index `gap` on are stored without
+        # `shift`, so that an edit does not have to move all later tokens.
+        self.gap = 0
+        self.shift = 0
+
+        for text in fixed_texts:
+            self.intern_text(text)
+
+    def intern_text(self, text: str) -> int:
+        """Returns the id of `text` in the table of token texts."""
+        text_id = self.text_index.get(text)
+        if text_id is None:
+            text_id = len(self.texts)
+            self.texts.append(sys.intern(text))
+            self.text_index[text] = text_id
+        return text_id
+
+    def append(self, type: TokenType, start: int, end: int, text: str) -> None:
+        self.types.append(type_codes[type])
+        self.starts.append(start)
+        self.ends.append(end)
+        self.text_ids.append(self.intern_text(text))
+
+    def source_text(self, start: int, end: int) -> str:
+        if isinstance(self.source_code, str):
+            return self.source_code[start:end]
+        return str(self.source_code[start:end], 'ascii')
+
+    @property
+    def line_index(self) -> LineIndex:
+        if self._line_index is None:
+            self._line_index = LineIndex(
+                self.source_text(0, len(self.source_code)))
+        return self._line_index
+
+    def start(self, index: int) -> int:
+        if index >= self.gap:
+            return self.starts[index] + self.shift
+        return self.starts[index]
+
+    def end(self, index: int) -> int:
+        if index >= self.gap:
+            return self.ends[index] + self.shift
+        return self.ends[index]
+
+    def find_start(self, offset: int, lo: int = 0) -> int:
+        """Returns the index of the first token starting at or after
+        `offset`."""
+        if lo < self.gap:
+            index = bisect_left(self.starts, offset, lo, self.gap)
+            if index < self.gap:
+                return index
+        return bisect_left(self.starts, offset - self.shift,
+                           max(lo, self.gap), len(self))
+
+    def text(self, index: int) -> str:
+        text_id = self.text_ids[index]
+        if text_id == UNRESOLVED:
+            text_id = self.intern_text(
+                self.source_text(self.start(index), self.end(index)))
+            self.text_ids[index] = text_id
+        return self.texts[text_id]
+
+    def type(self, index: int) -> TokenType:
+        return token_types[self.types[index]]
+
+    def location(self, index: int) -> Location:
+        return Location(self.input_file, offset=self.start(index),
+                        line_index=self.line_index)
+
+    def token(self, index: int) -> Token:
+        return Token(
+            text=self.text(index),
+            type=self.type(index),
+            location=self.location(index)
+        )
+
+    def __len__(self) -> int:
+        return len(self.types)
+
+    def __getitem__(self, index: int) -> 'TokenView':
+        if not -len(self) <= index < len(self):
+            raise IndexError('token index out of range')
+        return TokenView(self, index % len(self))
+
+    def __iter__(self) -> Iterator['TokenView']:
+        for index in range(len(self)):
+            yield TokenView(self, index)
+
+
+class TokenView:
+    """A token in a TokenBuffer. Reads its fields from the buffer on demand,
+    so it can be used in place of a Token without creating one."""
+    __slots__ = ('buffer', 'index')
+
+    def __init__(self, buffer: TokenBuffer, index: int) -> None:
+        self.buffer = buffer
+        self.index = index
+
+    @property
+    def text(self) -> str:
+        return self.buffer.text(self.index)
+
+    @property
+    def type(self) -> TokenType:
+        return self.buffer.type(self.index)
+
+    @property
+    def location(self) -> Location:
+        return self.buffer.location(self.index)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, (Token, TokenView)):
+            return (self.text, self.type, self.location) == (other.text, other.type, other.location)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return repr(self.buffer.token(self.index))
+
+
+TokenLike = Token | TokenView
+
+
+def tokenize_buffer(input_file: str, source_code: str) -> TokenBuffer:
+    """Tokenizes like `tokenize`, but into a compact TokenBuffer."""
+    buffer = TokenBuffer(input_file, source_code)
+
+    for type, text, start, end in scan(source_code):
+        buffer.append(type, start, end, text)
+
+    return buffer
+
+
+# Patterns for tokenizing bytes, with a group for each fixed lexeme so that
+# its text is known from the group that matched. Keywords are tried before
+# identifiers, and identifiers and integers never overlap with symbols.
+pattern_regexes = {name: regex for name, regex, _ in token_patterns}
+bytes_patterns: list[tuple[str, TokenType | None, str | None]] = [
+    (pattern_regexes['whitespace'], None, None),
+    (pattern_regexes['comment_oneline'], None, None),
+    (pattern_regexes['comment_multiline'], None, None),
+    *[(rf'\b{word}\b', type, word) for word, type in keyword_types.items()],
+    (pattern_regexes['identifier'], 'identifier', None),
+    (pattern_regexes['integer'], 'integer', None),
+    *[(re.escape(symbol), type, symbol)
+      for symbol, type in symbol_types.items()],
+]
+
+bytes_token_re = re.compile('|'.join(
+    f'({regex})' for regex, _, _ in bytes_patterns
+).encode())
+
+# Type code and text id of the token for each group of `bytes_token_re`.
+bytes_group_tokens: list[tuple[int, int] | None] = [None]
+for _, type, text in bytes_patterns:
+    if type is None:
+        bytes_group_tokens.append(None)
+    else:
+        bytes_group_tokens.append((
+            type_codes[type],
+            UNRESOLVED if text is None else fixed_texts.index(text)
+        ))
+
+
+def tokenize_bytes(input_file: str,
+                   source_code: bytes | memoryview) -> TokenBuffer:
+    """Tokenizes ASCII source code in bytes into a TokenBuffer without
+    creating a string for any token. The text of identifiers and integers is
+    decoded from the source when it is first asked for."""
+    buffer = TokenBuffer(input_file, source_code)
+    types = buffer.types
+    starts = buffer.starts
+    ends = buffer.ends
+    text_ids = buffer.text_ids
+
+    for match in bytes_token_re.finditer(source_code):
+        token = bytes_group_tokens[match.lastindex or 0]
+        if token is None:
+            continue
+
+        types.append(token[0])
+        starts.append(match.start())
+        ends.append(match.end())
+        text_ids.append(token[1])
+
+    return buffer
+
+
+@dataclass
+class SourceEdit:
+    """Replaces `deleted` characters at `offset` with `inserted`."""
+    offset: int
+    deleted: int
+    inserted: str
+
+
+@dataclass
+class TokenChange:
+    """Tokens from `start` to `old_end` were replaced by the tokens from
+    `start` to `new_end`."""
+    start: int
+    old_end: int
+    new_end: int
+
+
+def find_restart_limit(source_code: str, offset: int) -> int:
+    """Returns the last position from which tokenizing can be restarted when
+    the source is edited at `offset`, i.e. a position such that nothing the
+    tokenizer examined before it is at or after `offset`."""
+    limit = offset - 1
+
+    # Comments are the only patterns that look further ahead than one
+    # character past their match. An attempt to match "/*" reads up to the
+    # next "*" or "/", so the last "/*" before the edit must be re-read if
+    # that reaches the edit.
+    comment_start = source_code.rfind('/*', 0, offset)
+    if comment_start != -1:
+        closing = [pos for pos in (source_code.find('*', comment_start + 2),
+                                   source_code.find('/', comment_start + 2))
+                   if pos != -1]
+        if not closing or min(closing) + 1 >= offset:
+            limit = min(limit, comment_start)
+
+    # An attempt to match a one-line comment reads to the end of its line.
+    line_start = source_code.rfind('\n', 0, offset) + 1
+    for marker in ['#', '//']:
+        pos = source_code.find(marker, line_start, offset)
+        if pos != -1:
+            limit = min(limit, pos)
+
+    return limit
+
+
+def retokenize(buffer: TokenBuffer, edit: SourceEdit) -> TokenChange:
+    """Applies `edit` to the source of `buffer` and updates its tokens.
+
+    Tokenizing restarts from the last token start before the edit that no
+    earlier match depends on, and stops as soon as a new token starts at the
+    same place as an old one after the edit, since the tokenizer sees the
+    same text from there on. Offsets after the edit are shifted lazily, so
+    the work grows with the size of the edit and its distance from the
+    previous edit, not with the size of the source."""
+    old_source = buffer.source_code
+    if not isinstance(old_source, str):
+        raise Exception('Only tokens of str sources can be re-tokenized')
+
+    offset = edit.offset
+    if offset < 0 or offset + edit.deleted > len(old_source):
+        raise Exception(f'Edit at {offset} is outside the source')
+
+    new_source = old_source[:offset] + edit.inserted + \
+        old_source[offset + edit.deleted:]
+    delta = len(edit.inserted) - edit.deleted
+    edit_end = offset + len(edit.inserted)
+
+    limit = find_restart_limit(old_source, offset)
+    first = buffer.find_start(limit + 1) - 1
+    if first >= 0:
+        restart = buffer.start(first)
+    else:
+        first = 0
+        restart = 0
+
+    last = len(buffer)
+    new_tokens: list[tuple[int, int, int]] = []
+
+    for type, _, start, end in scan(new_source, restart):
+        if start > edit_end:
+            old_start = start - delta
+            index = buffer.find_start(old_start, first)
+            if index < len(buffer) and buffer.start(index) == old_start:
+                last = index
+                break
+
+        new_tokens.append((type_codes[type], start, end))
+
+    # Leave out the tokens at both ends that did not change.
+    while (new_tokens and first < last
+           and new_tokens[0] == (buffer.types[first], buffer.start(first), buffer.end(first))
+           and buffer.end(first) <= offset):
+        new_tokens.pop(0)
+        first += 1
+    while (new_tokens and first < last
+           and new_tokens[-1] == (buffer.types[last - 1], buffer.start(last - 1) + delta, buffer.end(last - 1) + delta)
+           and buffer.start(last - 1) >= offset + edit.deleted):
+        new_tokens.pop()
+        last -= 1
+
+    # Store the offsets between the old gap and the edit with their shift
+    # applied, so that a single gap remains right after the new tokens.
+    if buffer.gap <= last:
+        if buffer.shift != 0:
+            for index in range(buffer.gap, first):
+                buffer.starts[index] += buffer.shift
+                buffer.ends[index] += buffer.shift
+        buffer.gap = first + len(new_tokens)
+    else:
+        for index in range(last, buffer.gap):
+            buffer.starts[index] += delta
+            buffer.ends[index] += delta
+        buffer.gap += len(new_tokens) - (last - first)
+    buffer.shift += delta
+
+    buffer.source_code = new_source
+    buffer._line_index = None
+
+    buffer.types[first:last] = array('B', [t for t, _, _ in new_tokens])
+    buffer.starts[first:last] = array('I', [s for _, s, _ in new_tokens])
+    buffer.ends[first:last] = array('I', [e for _, _, e in new_tokens])
+    buffer.text_ids[first:last] = array('I', [
+        buffer.intern_text(new_source[start:end])
+        for _, start, end in new_tokens
+    ])
+
+    return TokenChange(first, last, first + len(new_tokens))
@@ -1,22 +1,79 @@
+import codecs
+import mmap
 import re
+import sys
 from dataclasses import dataclass
-from typing import Literal, Match
-import math
+from typing import BinaryIO, Iterator, Literal, TextIO
+from bisect import bisect_right
 
 
 TokenType = Literal['integer', 'operator', 'comp_operator', 'assignment', 'bool_literal', 'bool_operator',
                     'null_literal', 'unary_op', 'punctuation', 'identifier', 'keyword', 'end']
 
 
-@dataclass
+class LineIndex:
+    """Start offsets of the lines of a source, used to resolve an offset in
+    the source to a line and column with a binary search."""
+
+    def __init__(self, source_code: str = '') -> None:
+        self.line_starts = [0]
+        self.extend(source_code, 0)
+
+    def extend(self, text: str, offset: int) -> None:
+        """Adds the lines of `text`, which starts at `offset` in the source."""
+        pos = text.find('\n')
+        while pos != -1:
+            self.line_starts.append(offset + pos + 1)
+            pos = text.find('\n', pos + 1)
+
+    def line_and_column(self, offset: int) -> tuple[int, int]:
+        line = bisect_right(self.line_starts, offset)
+        return line, offset - self.line_starts[line - 1] + 1
+
+
 class Location:
-    file: str
-    line: int
-    column: int
+    """Location in a source file. Token locations store only the offset in
+    the source and resolve the line and column when they are first used."""
+    __slots__ = ('file', 'offset', '_line_index', '_line', '_column')
+
+    def __init__(self, file: str, line: int | None = None,
+                 column: int | None = None, offset: int = 0,
+                 line_index: LineIndex | None = None) -> None:
+        self.file = file
+        self.offset = offset
+        self._line_index = line_index
+        self._line = line
+        self._column = column
+
+    def _resolve(self) -> tuple[int, int]:
+        if self._line is None or self._column is None:
+            if self._line_index is not None:
+                self._line, self._column = self._line_index.line_and_column(
+                    self.offset)
+            else:
+                self._line, self._column = 1, self.offset + 1
+        return self._line, self._column
+
+    @property
+    def line(self) -> int:
+        return self._resolve()[0]
+
+    @property
+    def column(self) -> int:
+        return self._resolve()[1]
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Location):
+            return NotImplemented
+        return (self.file, self.line, self.column) == (other.file, other.line, other.column)
+
+    def __repr__(self) -> str:
+        return f'Location(file={self.file!r}, line={self.line}, column={self.column})'
 
 
-@dataclass
 class AnyLocation(Location):
+    __slots__ = ()
+
     def __eq__(self, other: object) -> bool:
         return isinstance(other, Location)
 
@@ -28,121 +85,155 @@ class Token:
     location: Location
 
 
-def match_re(regex: str, input: str, position: int) -> Match | None:
-    r = re.compile(regex)
-    return r.match(input, position)
-
+# Token patterns in the order they are tried at each position. Patterns with
+# no token type are skipped without producing a token. A whole word is either
+# a keyword or an identifier, and is looked up in `keyword_types`; letters
+# that are not a whole word (e.g. "if" in "3if") are always an identifier.
+token_patterns: list[tuple[str, str, TokenType | None]] = [
+    ('whitespace', r'\s+', None),
+    ('comment_oneline', r'(?:#+|//+).*\n+', None),
+    ('comment_multiline', r'/\*[^*/]*\*/', None),
+    ('word', r'(?<!\w)[a-zA-Z_][a-zA-Z0-9_]*(?!\w)', 'identifier'),
+    ('identifier', r'[a-zA-Z_]+[a-zA-Z0-9_]*', 'identifier'),
+    ('integer', r'[0-9]+', 'integer'),
+    ('operator', r'\+|\-|\*|\/|\%', 'operator'),
+    ('comp_operator', r'\=\=|\!\=|\<\=|\>\=|\<|\>', 'comp_operator'),
+    ('assignment', r'\=', 'assignment'),
+    ('punctuation', r'\(|\)|\[|\]|\{|\}|\,|\:|\;', 'punctuation'),
+]
+
+# Lexemes whose text alone determines their token type. Keys are interned
+# string literals. Symbols are listed in the order in which they are tried,
+# so that e.g. "<=" is tried before "<".
+keyword_types: dict[str, TokenType] = {
+    'if': 'keyword',
+    'then': 'keyword',
+    'elif': 'keyword',
+    'else': 'keyword',
+    'while': 'keyword',
+    'return': 'keyword',
+    'var': 'keyword',
+    'true': 'bool_literal',
+    'false': 'bool_literal',
+    'and': 'bool_operator',
+    'or': 'bool_operator',
+    'null': 'null_literal',
+    'not': 'unary_op',
+}
+
+symbol_types: dict[str, TokenType] = {
+    '+': 'operator',
+    '-': 'operator',
+    '*': 'operator',
+    '/': 'operator',
+    '%': 'operator',
+    '==': 'comp_operator',
+    '!=': 'comp_operator',
+    '<=': 'comp_operator',
+    '>=': 'comp_operator',
+    '<': 'comp_operator',
+    '>': 'comp_operator',
+    '=': 'assignment',
+    '(': 'punctuation',
+    ')': 'punctuation',
+    '[': 'punctuation',
+    ']': 'punctuation',
+    '{': 'punctuation',
+    '}': 'punctuation',
+    ',': 'punctuation',
+    ':': 'punctuation',
+    ';': 'punctuation',
+}
+
+# All patterns combined into one regex with a named group per pattern, so that
+# every lexeme is classified with a single match. Alternatives are tried in
+# order, which gives the same precedence as matching the patterns one by one.
+token_re = re.compile('|'.join(
+    f'(?P<{name}>{regex})' for name, regex, _ in token_patterns
+))
+
+group_types: dict[str, TokenType | None] = {
+    name: type for name, _, type in token_patterns
+}
+
+
+def scan(source_code: str, pos: int = 0,
+         endpos: int | None = None) -> Iterator[tuple[TokenType, str, int, int]]:
+    """Yields the type, text, start and end of each token in
+    source_code[pos:endpos]. Identifier texts are interned."""
+    if endpos is None:
+        endpos = len(source_code)
+
+    # Characters that match no pattern are skipped by finditer.
+    for match in token_re.finditer(source_code, pos, endpos):
+        group = match.lastgroup
+        if group == 'word':
+            text = match.group()
+            type = keyword_types.get(text)
+            if type is None:
+                yield 'identifier', sys.intern(text), match.start(), match.end()
+            else:
+                yield type, text, match.start(), match.end()
+            continue
 
-def get_location(file: str, line: int, pos: int) -> Location:
-    return Location(
-        file=file,
-        line=line,
-        column=math.floor(pos/line)
-    )
+        assert group is not None
+        token_type = group_types[group]
+        if token_type is not None:
+            yield token_type, match.group(), match.start(), match.end()
 
 
 def tokenize(input_file: str, source_code: str) -> list[Token]:
-    pos = 0
-    line = 1
-    result: list[Token] = []
-
-    def check_regex(regex: str, type: TokenType, source_code: str, input_file: str, line: int, result: list[Token]) -> bool:
-        nonlocal pos
-        match = match_re(regex, source_code, pos)
-        if match is not None:
-            result.append(Token(
+    line_index = LineIndex(source_code)
+
+    return [
+        Token(
+            type=type,
+            text=text,
+            location=Location(input_file, offset=start, line_index=line_index)
+        )
+        for type, text, start, _ in scan(source_code)
+    ]
+
+
+def tokenize_stream(input_file: str, stream: TextIO | BinaryIO | mmap.mmap,
+                    chunk_size: int = 1 << 16) -> Iterator[Token]:
+    """Tokenizes source code read from a file object or an mmap in chunks,
+    yielding the same tokens as `tokenize` without holding the whole source
+    in memory. Binary input is decoded as UTF-8."""
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    line_index = LineIndex()
+    buffer = ''
+    offset = 0  # position of buffer[0] in the whole source
+    at_eof = False
+
+    while not at_eof:
+        chunk = stream.read(chunk_size)
+        at_eof = len(chunk) == 0
+        if isinstance(chunk, bytes):
+            text = decoder.decode(chunk, final=at_eof)
+        else:
+            text = chunk
+        line_index.extend(text, offset + len(buffer))
+        buffer += text
+
+        # Only multiline comments span lines, so everything up to the last
+        # newline can be tokenized before more input has been read.
+        end = len(buffer) if at_eof else buffer.rfind('\n') + 1
+
+        for type, text, start, _ in scan(buffer, 0, end):
+            # A "/*" whose closing "*/" has not been read yet would wrongly
+            # match as an operator, so continue from it once there is more.
+            if (not at_eof and buffer.startswith('/*', start)
+                    and not 0 <= buffer.find('*/', start + 2) < end - 1):
+                end = start
+                break
+
+            yield Token(
                 type=type,
-                text=source_code[pos:match.end()],
-                location=get_location(input_file, line, pos)
-            ))
-            pos = match.end()
-            return True
-
-        return False
-
-    whitespace = r'\s+'
-    newline = r'\n+'
-    keyword = r'\b(if|then|elif|else|while|return|var)\b'
-    bool_literal = r'\b(true|false)\b'
-    bool_operator = r'\b(and|or)\b'
-    null_literal = r'\bnull\b'
-    unary_op = r'\bnot\b'
-    identifier = r'[a-zA-Z_]+[a-zA-Z0-9_]*'
-    integer = r'[0-9]+'
-    operator = r'\+|\-|\*|\/|\%'
-    comp_operator = r'\=\=|\!\=|\<\=|\>\=|\<|\>'
-    assignment = r'\='
-    punctuation = r'\(|\)|\[|\]|\{|\}|\,|\:|\;'
-    comment_oneline = r'(#+|//+).*\n+'
-    comment_multiline = r'/\*[^*/]*\*/'
-
-    while pos < len(source_code):
-
-        match = match_re(whitespace, source_code, pos)
-        if match is not None:
-            pos = match.end()
-            continue
-
-        match = match_re(newline, source_code, pos)
-        if match is not None:
-            pos = match.end()
-            line += 1
-            continue
-
-        match = match_re(comment_oneline, source_code, pos)
-        if match is not None:
-            pos = match.end()
-            continue
-
-        match = match_re(comment_multiline, source_code, pos)
-        if match is not None:
-            pos = match.end()
-            continue
-
-        if check_regex(keyword, 'keyword', source_code,
-                       input_file, line, result):
-            continue
-
-        if check_regex(bool_literal, 'bool_literal', source_code,
-                       input_file, line, result):
-            continue
-
-        if check_regex(bool_operator, 'bool_operator', source_code,
-                       input_file, line, result):
-            continue
-
-        if check_regex(null_literal, 'null_literal', source_code,
-                       input_file, line, result):
-            continue
-
-        if check_regex(unary_op, 'unary_op', source_code,
-                       input_file, line, result):
-            continue
-
-        if check_regex(identifier, 'identifier', source_code,
-                       input_file, line, result):
-            continue
-
-        if check_regex(integer, 'integer', source_code,
-                       input_file, line, result):
-            continue
-
-        if check_regex(operator, 'operator', source_code,
-                       input_file, line, result):
-            continue
-
-        if check_regex(comp_operator, 'comp_operator', source_code,
-                       input_file, line, result):
-            continue
-
-        if check_regex(assignment, 'assignment', source_code,
-                       input_file, line, result):
-            continue
-
-        if check_regex(punctuation, 'punctuation', source_code,
-                       input_file, line, result):
-            continue
-
-        pos += 1
+                text=text,
+                location=Location(input_file, offset=offset + start,
+                                  line_index=line_index)
+            )
 
-    return result
+        buffer = buffer[end:]
+        offset += end
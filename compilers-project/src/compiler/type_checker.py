@@ -1,167 +1,254 @@
+from typing import Iterable, Iterator
 from . import ast
-from .type_definitions import Bool, Int, Type, Unit, FunType
-from .symtab import SymTab, find_context
-
-
-def typecheck(node: ast.Expression | None, symtab: SymTab) -> Type:
-    if node is None:
-        return Unit
-
-    node_type = check_node(node, symtab)
-    node.type = node_type
-
-    return node_type
-
-
-def check_node(node: ast.Expression | None, symtab: SymTab) -> Type:
+from .type_definitions import Bool, Error, Int, Type, Unit, FunType
+from .symtab import SymTab
+from .visitor import Visitor
+
+
+def typecheck(node: ast.Expression | None, symtab: SymTab,
+              diagnostics: list[str] | None = None) -> Type:
+    """Type checks a node. If `diagnostics` is given, type errors are added
+    to it instead of raised, and the expressions that have them get the
+    type Error, so that checking continues and each error is reported
+    once."""
+    if diagnostics is None:
+        return type_checker.check(node, symtab)
+    return TypeChecker(diagnostics).check(node, symtab)
+
+
+def typecheck_recovering(node: ast.Expression | None,
+                         symtab: SymTab) -> tuple[Type, list[str]]:
+    """Type checks a node past type errors and returns its type and the
+    errors."""
+    diagnostics: list[str] = []
+    node_type = typecheck(node, symtab, diagnostics)
+    return node_type, diagnostics
+
+
+def typecheck_statements(statements: Iterable[ast.Expression],
+                         symtab: SymTab,
+                         diagnostics: list[str] | None = None
+                         ) -> Iterator[ast.Expression]:
+    """Type checks top-level statements in the scope of the program one at
+    a time as they are parsed, and passes each on once it has been checked.
+    `diagnostics` is as in `typecheck`."""
+    checker = type_checker if diagnostics is None else TypeChecker(diagnostics)
+    with symtab.scope():
+        for statement in statements:
+            checker.check(statement, symtab)
+            yield statement
+
+
+class TypeChecker(Visitor[SymTab, Type]):
+    """Computes the type of a node. `typecheck` also stores it in the
+    node.
+
+    If `diagnostics` is given, type errors are added to it. Checks of an
+    expression whose operands have the type Error pass, so that an error is
+    not reported again by the expressions around it."""
+
+    def __init__(self, diagnostics: list[str] | None = None) -> None:
+        self.diagnostics = diagnostics
+
+    def error(self, node: ast.Expression, message: str) -> Type:
+        """Raises a type error, or adds it to the diagnostics and returns
+        the type Error."""
+        if self.diagnostics is None:
+            raise Exception(message)
+        location = f'{node.location}: '
+        if not message.startswith(location):
+            message = location + message
+        self.diagnostics.append(message)
+        return Error
+
+    def check(self, node: ast.Expression | None, symtab: SymTab) -> Type:
+        if node is None:
+            return Unit
 
-    match node:
+        node_type = self.visit(node, symtab)
+        node.type = node_type
 
-        case ast.Literal():
-            if isinstance(node.value, bool):
-                return Bool
-            elif isinstance(node.value, int):
-                return Int
-            elif node.value == None:
-                return Unit
-            else:
-                raise Exception(f'Unknown type for literal {node.value}')
+        return node_type
 
-        case ast.Identifier():
-            context = find_context(symtab, node.name)
-            if context is not None:
-                return context.locals[node.name]
+    def visit_Literal(self, node: ast.Literal, symtab: SymTab) -> Type:
+        if isinstance(node.value, bool):
+            return Bool
+        elif isinstance(node.value, int):
+            return Int
+        elif node.value == None:
+            return Unit
+        else:
+            return self.error(node, f'Unknown type for literal {node.value}')
+
+    def visit_Identifier(self, node: ast.Identifier, symtab: SymTab) -> Type:
+        if node.binding is not None:
+            variable_type: Type = symtab.load(node.binding)
+            return variable_type
+        if node.name in symtab:
+            known_type: Type = symtab.require(node.name)
+            return known_type
+        else:
+            return self.error(node, f'Unknown identifier {node.name}')
+
+    def visit_VarDeclaration(self, node: ast.VarDeclaration, symtab: SymTab) -> Type:
+        # A variable with a binding was declared once in its block by the
+        # resolver.
+        if node.binding is None and symtab.is_local(node.name.name):
+            return self.error(
+                node, f'Variable {node.name.name} has already been declared')
+
+        value_type = self.check(node.value, symtab)
+
+        # A variable declared with a type has that type even if its value
+        # does not.
+        if node.var_type is None:
+            variable_type = value_type
+            result = Unit
+
+        elif isinstance(node.var_type, ast.Int):
+            if value_type is not Int and value_type is not Error:
+                self.error(node, f'{node.location}: type error, expected Int')
+            variable_type = result = Int
+
+        elif isinstance(node.var_type, ast.Bool):
+            if value_type is not Int and value_type is not Error:
+                self.error(node, f'{node.location}: type error, expected Bool')
+            variable_type = result = Bool
+
+        else:
+            return self.error(node, f'{node.location}: unknown type {node.type}')
+
+        if node.binding is not None:
+            symtab.store(node.binding, variable_type)
+        else:
+            symtab.add_local(node.name.name, variable_type)
+        return result
+
+    def visit_BinaryOp(self, node: ast.BinaryOp, symtab: SymTab) -> Type:
+        t1 = self.check(node.left, symtab)
+        t2 = self.check(node.right, symtab)
+
+        if t1 is Error or t2 is Error:
+            return Error
+
+        elif node.op in ['+', '-', '*', '/', '%']:
+            if t1 is not Int or t2 is not Int:
+                return self.error(
+                    node, f'Operator {node.op} expected two Ints, got {t1} and {t2}')
+            return t1
+
+        elif node.op in ['or', 'and']:
+            if t1 is not Bool or t2 is not Bool:
+                return self.error(
+                    node, f'{node.location}: operator {node.op} expected two Bools, got {t1} and {t2}')
+            return t1
+
+        elif node.op in ['<', '<=', '>', '>=']:
+            if t1 is not Int or t2 is not Int:
+                return self.error(
+                    node, f'Operator {node.op} expected two Ints, got {t1} and {t2}')
+            return Bool
+
+        elif node.op in ['==', '!=']:
+            if t1 not in [Int, Bool] or t2 not in [Int, Bool]:
+                return self.error(
+                    node, f'{node.location}: types must be either Int or Bool')
+            if t1 is not t2:
+                return self.error(
+                    node, f'{node.location}: types {t1} and {t2} do not match')
             else:
-                raise Exception(f'Unknown identifier {node.name}')
-
-        case ast.VarDeclaration():
-            if node.name.name in symtab.locals:
-                raise Exception(
-                    f'Variable {node.name.name} has already been declared')
-
-            value_type = typecheck(node.value, symtab)
-
-            if node.var_type is None:
-                symtab.locals[node.name.name] = value_type
-                return Unit
-
-            elif isinstance(node.var_type, ast.Int):
-                if value_type != Int:
-                    raise Exception(
-                        f'{node.location}: type error, expected Int')
-                symtab.locals[node.name.name] = Int
-                return Int
-
-            elif isinstance(node.var_type, ast.Bool):
-                if value_type != Int:
-                    raise Exception(
-                        f'{node.location}: type error, expected Bool')
-                symtab.locals[node.name.name] = Bool
                 return Bool
 
+        elif node.op == '=':
+            if t1 is not t2:
+                return self.error(
+                    node, f'{node.location}: types {t1} and {t2} do not match')
             else:
-                raise Exception(f'{node.location}: unknown type {node.type}')
-
-        case ast.BinaryOp():
-            t1 = typecheck(node.left, symtab)
-            t2 = typecheck(node.right, symtab)
-
-            if node.op in ['+', '-', '*', '/', '%']:
-                if t1 is not Int or t2 is not Int:
-                    raise Exception(
-                        f'Operator {node.op} expected two Ints, got {t1} and {t2}')
-                return t1
-
-            elif node.op in ['or', 'and']:
-                if t1 is not Bool or t2 is not Bool:
-                    raise Exception(
-                        f'{node.location}: operator {node.op} expected two Bools, got {t1} and {t2}')
                 return t1
 
-            elif node.op in ['<', '<=', '>', '>=']:
-                if t1 is not Int or t2 is not Int:
-                    raise Exception(
-                        f'Operator {node.op} expected two Ints, got {t1} and {t2}')
-                return Bool
+        else:
+            return self.error(node, f'Unknown operator {node.op}')
+
+    def visit_UnaryOp(self, node: ast.UnaryOp, symtab: SymTab) -> Type:
+        value_type = self.check(node.expr, symtab)
+
+        if value_type is Error:
+            return Error
+        elif node.op == 'not' and value_type is not Bool:
+            return self.error(
+                node, f'{node.location}: expected type Bool, got {value_type}')
+        elif node.op == '-' and value_type is not Int:
+            return self.error(
+                node, f'{node.location}: expected type Int, got {value_type}')
+        return value_type
+
+    def visit_IfStatement(self, node: ast.IfStatement, symtab: SymTab) -> Type:
+        t1 = self.check(node.condition, symtab)
+        if t1 is not Bool and t1 is not Error:
+            self.error(node, f'If condition was {t1}')
+
+        t2 = self.check(node.true_branch, symtab)
+        if node.false_branch is None:
+            return Unit
 
-            elif node.op in ['==', '!=']:
-                if t1 not in [Int, Bool] or t2 not in [Int, Bool]:
-                    raise Exception(
-                        f'{node.location}: types must be either Int or Bool')
-                if t1 != t2:
-                    raise Exception(
-                        f'{node.location}: types {t1} and {t2} do not match')
-                else:
-                    return Bool
-
-            elif node.op == '=':
-                if t1 != t2:
-                    raise Exception(
-                        f'{node.location}: types {t1} and {t2} do not match')
-                else:
-                    return t1
+        t3 = self.check(node.false_branch, symtab)
+        if t2 is Error or t3 is Error:
+            return Error
+        if t2 is not t3:
+            return self.error(
+                node, f'Branches had different types: {t2} and {t3}')
 
-            else:
-                raise Exception(f'Unknown operator {node.op}')
+        return t2
 
-        case ast.UnaryOp():
-            value_type = typecheck(node.expr, symtab)
-
-            if node.op == 'not' and value_type is not Bool:
-                raise Exception(
-                    f'{node.location}: expected type Bool, got {value_type}')
-            elif node.op == '-' and value_type is not Int:
-                raise Exception(
-                    f'{node.location}: expected type Int, got {value_type}')
-            return value_type
+    def visit_Block(self, node: ast.Block, symtab: SymTab) -> Type:
+        with symtab.scope(node.frame_size):
+            for statement in node.statements:
+                self.check(statement, symtab)
 
-        case ast.IfStatement():
-            t1 = typecheck(node.condition, symtab)
-            if t1 is not Bool:
-                raise Exception(f'If condition was {t1}')
+        return Unit
 
-            t2 = typecheck(node.true_branch, symtab)
-            if node.false_branch is None:
-                return Unit
+    def visit_FunctionCall(self, node: ast.FunctionCall, symtab: SymTab) -> Type:
+        args = []
+        return_type = Unit
 
-            t3 = typecheck(node.false_branch, symtab)
-            if t2 != t3:
-                raise Exception(f'Branches had different types: {t2} and {t3}')
+        for arg in node.args:
+            arg_type = self.check(arg, symtab)
+            args.append(arg_type)
 
-            return t2
+        if node.name is not None:
+            fun_type = FunType(node.name.name, tuple(args), return_type)
+            if symtab.is_local(node.name.name):
+                symtab.assign(node.name.name, fun_type)
+            else:
+                symtab.add_local(node.name.name, fun_type)
+            return fun_type
+        else:
+            return self.error(node, f'{node.location}: function call has no name')
 
-        case ast.Block():
-            context = SymTab(locals={}, parent=symtab)
+    def visit_WhileLoop(self, node: ast.WhileLoop, symtab: SymTab) -> Type:
+        condition = self.check(node.condition, symtab)
+        if condition is not Bool and condition is not Error:
+            self.error(
+                node, f'{node.location}: while loop condition must be type Bool, got {condition}')
 
-            for statement in node.statements:
-                typecheck(statement, context)
+        self.check(node.body, symtab)
 
-            return Unit
-
-        case ast.FunctionCall():
-            args = []
-            return_type = Unit
+        return Unit
 
-            for arg in node.args:
-                arg_type = typecheck(arg, symtab)
-                args.append(arg_type)
+    def visit_ErrorNode(self, node: ast.ErrorNode, symtab: SymTab) -> Type:
+        # The syntax error has been reported by the parser.
+        if self.diagnostics is None:
+            raise Exception(f'Unknown AST type: {node}')
+        return Error
 
-            if node.name is not None:
-                fun_type = FunType(node.name.name, args, return_type)
-                symtab.locals[node.name.name] = fun_type
-                return fun_type
-            else:
-                raise Exception(f'{node.location}: function call has no name')
+    def visit_default(self, node: ast.Expression, symtab: SymTab) -> Type:
+        return self.error(node, f'Unknown AST type: {node}')
 
-        case ast.WhileLoop():
-            condition = typecheck(node.condition, symtab)
-            if condition is not Bool:
-                raise Exception(
-                    f'{node.location}: while loop condition must be type Bool, got {condition}')
 
-            typecheck(node.body, symtab)
+type_checker = TypeChecker()
 
-            return Unit
 
-        case _:
-            raise Exception(f'Unknown AST type: {node}')
+def check_node(node: ast.Expression | None, symtab: SymTab) -> Type:
+    if node is None:
+        raise Exception(f'Unknown AST type: {node}')
+    return type_checker.visit(node, symtab)
@@ -1,13 +1,36 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, fields
+from typing import Any, TypeVar
 
+T = TypeVar('T')
 
-@dataclass(frozen=True)
-class Type:
+
+class Interned(type):
+    """Metaclass of types. Creating a type returns the one object of all
+    types of the same class and fields, so types are compared by identity
+    and can be used as dict keys."""
+
+    types: dict[tuple, Any] = {}
+
+    def __call__(cls: type[T], *args: Any, **kwargs: Any) -> T:
+        new_type = type.__call__(cls, *args, **kwargs)
+        key = (cls, *(getattr(new_type, field.name)
+                      for field in fields(new_type)))
+        interned: T = Interned.types.setdefault(key, new_type)
+        return interned
+
+
+@dataclass(frozen=True, eq=False)
+class Type(metaclass=Interned):
     """Base class for types."""
     name: str
 
+    def __reduce__(self) -> tuple:
+        # Unpickled and copied types are interned too.
+        return (type(self), tuple(getattr(self, field.name)
+                                  for field in fields(self)))
+
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, eq=False)
 class BasicType(Type):
     """Class for Int, Bool and Unit types."""
 
@@ -17,8 +40,19 @@ Bool = BasicType('Bool')
 Unit = BasicType('Unit')
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, eq=False)
+class ErrorType(Type):
+    """Type of an expression that has a type error."""
+
+
+Error = ErrorType('Error')
+
+
+@dataclass(frozen=True, eq=False)
 class FunType(Type):
     """Function types."""
-    args: list[Type]
+    args: tuple[Type, ...]
     return_type: Type | None
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, 'args', tuple(self.args))
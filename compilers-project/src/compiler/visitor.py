@@ -0,0 +1,157 @@
+import dataclasses
+from typing import Any, Callable, ClassVar, Generic, Iterator, TypeVar
+from . import ast
+
+C = TypeVar('C')
+R = TypeVar('R')
+
+# Classes of AST nodes that visitors and transformers dispatch on. The
+# classes that @dataclass(slots=True) replaced are subclasses too until
+# they are garbage collected, so only those that the module has are used.
+node_classes: list[type[ast.Expression]] = [
+    node_class for node_class in ast.Expression.__subclasses__()
+    if getattr(ast, node_class.__name__, None) is node_class
+]
+
+
+# Fields set by passes, which are not part of the structure of a node
+annotations = ['location', 'type', 'binding', 'frame_size']
+
+# Names of the fields of each node class other than annotations
+child_fields: dict[type, tuple[str, ...]] = {}
+
+
+def find_child_fields(node_class: type) -> tuple[str, ...]:
+    names = tuple(field.name for field in dataclasses.fields(node_class)
+                  if field.name not in annotations)
+    child_fields[node_class] = names
+    return names
+
+
+def children(node: ast.Expression) -> list[ast.Expression]:
+    """Child nodes of `node` in the order of its fields."""
+    result: list[ast.Expression] = []
+    names = child_fields.get(type(node)) or find_child_fields(type(node))
+    for name in names:
+        value = getattr(node, name)
+        if isinstance(value, ast.Expression):
+            result.append(value)
+        elif isinstance(value, list):
+            result.extend(value)
+    return result
+
+
+def walk(node: ast.Expression) -> Iterator[ast.Expression]:
+    """Yields the nodes of the subtree of `node` before their children,
+    without recursion."""
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        yield node
+        stack.extend(children(node))
+
+
+def post_order(root: ast.Expression) -> Iterator[ast.Expression]:
+    """Yields the nodes of the subtree of `root` after their children, from
+    left to right, without recursion."""
+    stack: list[tuple[ast.Expression, bool]] = [(root, False)]
+    while stack:
+        node, children_done = stack.pop()
+        if children_done:
+            yield node
+        else:
+            stack.append((node, True))
+            stack.extend((child, False) for child in reversed(children(node)))
+
+
+def dispatch_table(cls: type, prefix: str) -> dict[type, Callable[..., Any]]:
+    """Methods of `cls` named `prefix` + class name by node class."""
+    table: dict[type, Callable[..., Any]] = {}
+    for node_class in node_classes:
+        method = getattr(cls, prefix + node_class.__name__, None)
+        if method is not None:
+            table[node_class] = method
+    return table
+
+
+def find_method(table: dict[type, Callable[..., Any]], node_class: type,
+                default: Callable[..., Any]) -> Callable[..., Any]:
+    """Looks up the method of a subclass of a node class, e.g. of an arena
+    view, by its base classes and adds it to `table`."""
+    for base in node_class.__mro__:
+        if base in table:
+            table[node_class] = table[base]
+            return table[base]
+    table[node_class] = default
+    return default
+
+
+class Visitor(Generic[C, R]):
+    """Base class of passes that compute a result for a node, such as its
+    type or value, in some context, such as a symbol table.
+
+    A subclass defines a method `visit_<class name>(self, node, context)` for
+    each node class it supports, e.g. `visit_BinaryOp`, which calls `visit`
+    for the children it needs. The methods are collected into a table by
+    node class once per subclass, so dispatching a node is a dict lookup.
+    Nodes without a method are passed to `visit_default`."""
+
+    dispatch: ClassVar[dict[type, Callable[..., Any]]] = {}
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        cls.dispatch = dispatch_table(cls, 'visit_')
+
+    def visit(self, node: ast.Expression, context: C) -> R:
+        method = self.dispatch.get(type(node))
+        if method is None:
+            method = find_method(self.dispatch, type(node),
+                                 type(self).visit_default)
+        result: R = method(self, node, context)
+        return result
+
+    def visit_default(self, node: ast.Expression, context: C) -> R:
+        raise Exception(f'{node.location}: unsupported AST node {node}')
+
+
+class Transformer:
+    """Base class of passes that rewrite a tree, such as constant folding.
+
+    A subclass defines a method `transform_<class name>(self, node)` for the
+    node classes it rewrites, which returns the node to put in place of
+    `node`. Nodes are transformed after their children, without recursion,
+    and the children of a node are replaced in place with their transformed
+    nodes before it is transformed. A node that occurs several times in the
+    tree is transformed once."""
+
+    dispatch: ClassVar[dict[type, Callable[..., Any]]] = {}
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        cls.dispatch = dispatch_table(cls, 'transform_')
+
+    def transform(self, root: ast.Expression) -> ast.Expression:
+        transformed: dict[int, ast.Expression] = {}
+        for node in post_order(root):
+            if id(node) in transformed:
+                continue
+            for field in dataclasses.fields(node):
+                value = getattr(node, field.name)
+                if isinstance(value, ast.Expression):
+                    setattr(node, field.name, transformed[id(value)])
+                elif isinstance(value, list):
+                    setattr(node, field.name,
+                            [transformed[id(item)] for item in value])
+            transformed[id(node)] = self.transform_node(node)
+        return transformed[id(root)]
+
+    def transform_node(self, node: ast.Expression) -> ast.Expression:
+        method = self.dispatch.get(type(node))
+        if method is None:
+            method = find_method(self.dispatch, type(node),
+                                 type(self).transform_default)
+        result: ast.Expression = method(self, node)
+        return result
+
+    def transform_default(self, node: ast.Expression) -> ast.Expression:
+        return node
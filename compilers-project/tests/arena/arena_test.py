@@ -0,0 +1,65 @@
+import pytest
+from compiler.arena import arena_from_tree, tree_from_arena
+from compiler.tokenizer import tokenize
+from compiler.parser import parse
+from compiler.type_checker import typecheck
+from compiler.ir_generator import generate_ir
+from compiler.symtab import SymTab, root_types
+import compiler.ast as ast
+
+code = '''
+var x = 1;
+var y: Int = -x;
+{ if x < 2 and not false then x = 5 else x = 3 };
+print_int(y);
+while x > 0 do { x = x - 1; };
+x
+'''
+
+
+def parse_code(source_code: str) -> ast.Expression:
+    node = parse(tokenize('test', source_code))
+    assert node is not None
+    return node
+
+
+@pytest.mark.parametrize('source_code', [
+    code, '1', 'true', 'f()', 'if a then b', '{ var b: Bool = true; }',
+    '99999999999999999999 + 1'
+])
+def test_tree_round_trip(source_code: str) -> None:
+    node = parse_code(source_code)
+    assert tree_from_arena(arena_from_tree(node)) == node
+
+
+def test_children_have_smaller_ids() -> None:
+    arena = arena_from_tree(parse_code(code))
+    assert arena.root == len(arena) - 1
+    for node_id in range(len(arena)):
+        assert all(child < node_id for child in arena.child_ids(node_id))
+
+
+def test_views_match_node_classes() -> None:
+    view = arena_from_tree(parse_code('a + 1')).view()
+    assert isinstance(view, ast.BinaryOp)
+    assert isinstance(view.left, ast.Identifier)
+    assert isinstance(view.right, ast.Literal)
+    assert (view.left.name, view.op, view.right.value) == ('a', '+', 1)
+
+
+def test_typecheck_sets_types_in_arena() -> None:
+    node = parse_code(code)
+    arena = arena_from_tree(node)
+    typecheck(node, SymTab(locals={}))
+    typecheck(arena.view(), SymTab(locals={}))
+
+    assert tree_from_arena(arena) == node
+
+
+def test_generate_ir_on_arena() -> None:
+    node = parse_code(code)
+    typecheck(node, SymTab(locals={}))
+    arena = arena_from_tree(node)
+
+    assert [str(ins) for ins in generate_ir(root_types, arena.view())] == \
+        [str(ins) for ins in generate_ir(root_types, node)]
@@ -0,0 +1,43 @@
+from pathlib import Path
+from compiler.batch import front_end_files, front_end_sources
+from compiler.tokenizer import tokenize
+from compiler.parser import parse
+
+sources = [(f'file{i}', f'var x{i} = {i}; x{i} + 1') for i in range(10)]
+
+
+def test_results_in_input_order() -> None:
+    results = front_end_sources(sources, workers=2)
+
+    assert [result.input_file for result in results] == [name for name, _ in sources]
+    for result, (name, source_code) in zip(results, sources):
+        assert result.error is None
+        assert result.ast_node == parse(tokenize(name, source_code))
+
+
+def test_error_in_one_file_does_not_stop_others() -> None:
+    results = front_end_sources(sources[:2] + [('bad', '1 +')] + sources[2:4],
+                                workers=2)
+
+    assert [result.error is None for result in results] == [True, True, False, True, True]
+    assert results[2].input_file == 'bad'
+    assert results[2].tokens is None and results[2].ast_node is None
+    assert results[3].ast_node == parse(tokenize('file2', sources[2][1]))
+
+
+def test_files_are_read_by_workers(tmp_path: Path) -> None:
+    (tmp_path / 'a').write_text('1 + 2')
+    missing = str(tmp_path / 'missing')
+
+    results = front_end_files([str(tmp_path / 'a'), missing], workers=1)
+
+    assert results[0].tokens == tokenize(str(tmp_path / 'a'), '1 + 2')
+    assert results[1].error is not None and 'missing' in results[1].error
+
+
+def test_large_integer_literal_is_sent_from_workers() -> None:
+    big = ('big', '99999999999999999999 + 1')
+    results = front_end_sources(sources[:2] + [big] + sources[2:3], workers=2)
+
+    assert all(result.error is None for result in results)
+    assert results[2].ast_node == parse(tokenize(*big))
@@ -0,0 +1,82 @@
+from pathlib import Path
+import marshal
+import os
+from compiler.cache import FrontEndCache, tokenize_and_parse
+from compiler.tokenizer import tokenize
+from compiler.parser import parse
+
+code = '{ var x: Int = 1; while x < 10 do x = x + 1; if x == 10 then print_int(x) }'
+
+
+def test_cached_results_match(tmp_path: Path) -> None:
+    cache = FrontEndCache(str(tmp_path))
+    tokenize_and_parse('test', code, cache)
+    cached = cache.load('test', code)
+
+    assert cached is not None
+    tokens, ast_node = cached
+    assert tokens == tokenize('test', code)
+    assert ast_node == parse(tokenize('test', code))
+
+
+def test_locations_use_current_file_name(tmp_path: Path) -> None:
+    cache = FrontEndCache(str(tmp_path))
+    tokenize_and_parse('first', code, cache)
+    tokens, ast_node = tokenize_and_parse('second', code, cache)
+
+    assert tokens[0].location.file == 'second'
+    assert ast_node is not None and ast_node.location.file == 'second'
+
+
+def test_miss_for_changed_source(tmp_path: Path) -> None:
+    cache = FrontEndCache(str(tmp_path))
+    tokenize_and_parse('test', code, cache)
+
+    assert cache.load('test', code + ' ') is None
+
+
+def test_least_recently_used_are_evicted(tmp_path: Path) -> None:
+    cache = FrontEndCache(str(tmp_path))
+    sources = ['1 + 2', '3 + 4', '5 + 6']
+    for i, source in enumerate(sources):
+        tokenize_and_parse('test', source, cache)
+        os.utime(cache.path(source), (i, i))
+
+    cache.load('test', sources[0])
+    cache.max_bytes = os.path.getsize(cache.path(sources[0])) * 2
+    cache.evict()
+
+    assert cache.load('test', sources[0]) is not None
+    assert cache.load('test', sources[1]) is None
+    assert cache.load('test', sources[2]) is not None
+
+
+def test_large_integer_literal_is_cached(tmp_path: Path) -> None:
+    cache = FrontEndCache(str(tmp_path))
+    source = '99999999999999999999 + 1'
+    tokenize_and_parse('test', source, cache)
+    cached = cache.load('test', source)
+
+    assert cached is not None
+    assert cached[1] == parse(tokenize('test', source))
+
+
+def test_corrupted_entry_is_a_miss_and_removed(tmp_path: Path) -> None:
+    cache = FrontEndCache(str(tmp_path))
+    tokenize_and_parse('test', code, cache)
+    path = cache.path(code)
+    with open(path, 'rb') as f:
+        data = f.read()
+
+    entry = marshal.loads(data)
+    for corrupted in [data[:len(data) // 2], data[:-20], b'junk',
+                      marshal.dumps((entry[0][:1], entry[1])),
+                      marshal.dumps((entry[0], entry[1][:-10]))]:
+        with open(path, 'wb') as f:
+            f.write(corrupted)
+        assert cache.load('test', code) is None
+        assert not os.path.exists(path)
+
+    tokens, ast_node = tokenize_and_parse('test', code, cache)
+    assert ast_node == parse(tokenize('test', code))
+    assert os.path.exists(path)
@@ -1,7 +1,7 @@
 import pytest
 from compiler.tokenizer import tokenize
-from compiler.parser import parse
-from compiler.type_checker import typecheck
+from compiler.parser import parse, parse_iter
+from compiler.type_checker import typecheck, typecheck_statements
 from compiler.ir_generator import generate_ir
 from compiler.symtab import SymTab, root_types
 
@@ -26,3 +26,26 @@ def test_generate_ir_works() -> None:
     output = [str(ins) for ins in ir_instructions]
 
     assert output == expected
+
+
+def test_generate_ir_from_statement_stream() -> None:
+    code = 'var x = 1; while x < 3 do { x = x + 1; print_int(x) }; x'
+    program = parse(tokenize('test', code))
+    if program is None:
+        raise Exception('Failed to parse input')
+    typecheck(program, SymTab(locals={}, parent=None))
+    statements = typecheck_statements(parse_iter(tokenize('test', code)),
+                                      SymTab(locals={}, parent=None))
+
+    expected = [str(ins) for ins in generate_ir(root_types, program)]
+    output = [str(ins) for ins in generate_ir(root_types, statements)]
+
+    assert output == expected
+
+
+def test_single_statement_stream_prints_result() -> None:
+    statements = typecheck_statements(parse_iter(tokenize('test', '1 + 2')),
+                                      SymTab(locals={}, parent=None))
+    output = [str(ins) for ins in generate_ir(root_types, statements)]
+
+    assert output[-2] == 'Call(print_int, [x3], x4)'
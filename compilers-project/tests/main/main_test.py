@@ -0,0 +1,61 @@
+import pytest
+from pathlib import Path
+from compiler.__main__ import main
+from compiler.type_definitions import Unit
+
+source_code = '''
+var x = 1;
+{ var y = x + 2; x = y };
+print_int(x);
+x
+'''
+
+
+def run(command: str, tmp_path: Path, monkeypatch: pytest.MonkeyPatch,
+        capsys: pytest.CaptureFixture[str]) -> str:
+    source_file = tmp_path / 'program.txt'
+    source_file.write_text(source_code)
+    monkeypatch.setattr('sys.argv',
+                        ['compiler', command, str(source_file), '--no-cache'])
+    assert main() in [0, None]
+    return capsys.readouterr().out
+
+
+def test_interpret(tmp_path: Path, monkeypatch: pytest.MonkeyPatch,
+                   capsys: pytest.CaptureFixture[str]) -> None:
+    output = run('interpret', tmp_path, monkeypatch, capsys)
+    assert output.splitlines()[0] == '3'
+    assert output.splitlines()[-1] == str(Unit)
+
+
+def test_ir(tmp_path: Path, monkeypatch: pytest.MonkeyPatch,
+            capsys: pytest.CaptureFixture[str]) -> None:
+    output = run('ir', tmp_path, monkeypatch, capsys)
+    assert 'Call(print_int' in output
+    assert output.splitlines()[-1] == 'Return()'
+
+
+def test_asm(tmp_path: Path, monkeypatch: pytest.MonkeyPatch,
+             capsys: pytest.CaptureFixture[str]) -> None:
+    output = run('asm', tmp_path, monkeypatch, capsys)
+    assert 'call print_int' in output
+
+
+def test_test_prints(tmp_path: Path, monkeypatch: pytest.MonkeyPatch,
+                     capsys: pytest.CaptureFixture[str]) -> None:
+    output = run('test_prints', tmp_path, monkeypatch, capsys)
+    assert '------- Assembly --------' in output
+
+
+@pytest.mark.parametrize('command', ['interpret', 'ir'])
+def test_all_syntax_errors_are_reported(
+        command: str, tmp_path: Path,
+        monkeypatch: pytest.MonkeyPatch) -> None:
+    source_file = tmp_path / 'program.txt'
+    source_file.write_text('var x = ;\n1 + true;\nf(1, 2;\nx\n')
+    monkeypatch.setattr('sys.argv',
+                        ['compiler', command, str(source_file), '--no-cache'])
+
+    with pytest.raises(Exception) as e:
+        main()
+    assert len(str(e.value).splitlines()) == 2
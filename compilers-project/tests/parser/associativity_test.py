@@ -86,3 +86,25 @@ def test_continuous_right_associativity() -> None:
     )
 
     assert parse(input) == expected
+
+
+def test_assignment_of_logical_expression() -> None:
+    input = tokenize('test', 'a = b or c and d')
+    expected = ast.BinaryOp(
+        location,
+        left=ast.Identifier(location, name='a'),
+        op='=',
+        right=ast.BinaryOp(
+            location,
+            left=ast.Identifier(location, name='b'),
+            op='or',
+            right=ast.BinaryOp(
+                location,
+                left=ast.Identifier(location, name='c'),
+                op='and',
+                right=ast.Identifier(location, name='d')
+            )
+        )
+    )
+
+    assert parse(input) == expected
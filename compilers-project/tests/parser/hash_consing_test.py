@@ -0,0 +1,86 @@
+from compiler.hash_consing import NodeTable
+from compiler.ir_generator import generate_ir
+from compiler.parser import parse
+from compiler.symtab import SymTab, root_types
+from compiler.tokenizer import tokenize
+from compiler.type_checker import typecheck
+import compiler.ast as ast
+
+code = '''
+var x = 1;
+var y = x + 1;
+{ var z = x + 1; y = x + 1 };
+if x + 1 > 1 then { var z = x + 1; y = x + 1 } else { 1 };
+while x < 10 do { x = x + 1; };
+y
+'''
+
+
+def test_equal_subexpressions_share_one_node() -> None:
+    node = parse(tokenize('test', 'a + 1; b = a + 1'), nodes=NodeTable())
+    assert isinstance(node, ast.Block)
+    second = node.statements[1]
+    assert isinstance(second, ast.BinaryOp)
+    assert second.right is node.statements[0]
+
+
+def test_equal_blocks_are_shared() -> None:
+    node = parse(tokenize('test', code), nodes=NodeTable())
+    assert isinstance(node, ast.Block)
+    statement = node.statements[3]
+    assert isinstance(statement, ast.IfStatement)
+    assert statement.true_branch is node.statements[2]
+
+
+def test_different_values_are_not_shared() -> None:
+    node = parse(tokenize('test', '{ 1 }; { true }; { 1 + 1 }; { 1 - 1 }'),
+                 nodes=NodeTable())
+    assert isinstance(node, ast.Block)
+    assert len({id(statement) for statement in node.statements}) == 4
+
+
+def test_structural_hash_is_the_same_for_equal_subtrees() -> None:
+    first, second = NodeTable(), NodeTable()
+    a = parse(tokenize('test', 'f(x * 2, true)'), nodes=first)
+    b = parse(tokenize('other', '\n  f(x*2,true)'), nodes=second)
+    c = parse(tokenize('test', 'f(x * 2, 1)'), nodes=second)
+    assert a is not None and b is not None and c is not None
+
+    assert first.structural_hash(a) == second.structural_hash(b)
+    assert first.structural_hash(a) != second.structural_hash(c)
+
+
+def test_passes_give_the_same_result_on_shared_nodes() -> None:
+    plain = parse(tokenize('test', code))
+    shared = parse(tokenize('test', code), nodes=NodeTable())
+    assert plain is not None and shared is not None
+
+    assert typecheck(shared, SymTab(locals={})) == \
+        typecheck(plain, SymTab(locals={}))
+    assert [str(ins) for ins in generate_ir(root_types, shared)] == \
+        [str(ins) for ins in generate_ir(root_types, plain)]
+
+
+def test_shared_node_has_the_latest_location() -> None:
+    nodes = NodeTable()
+    first = parse(tokenize('test', '\n\n  a + 1'), nodes=nodes)
+    second = parse(tokenize('test', 'a + 1'), nodes=nodes)
+
+    assert second is first
+    assert second is not None
+    assert (second.location.line, second.location.column) == (1, 3)
+
+
+def test_retain_removes_other_trees() -> None:
+    nodes = NodeTable()
+    old = parse(tokenize('test', 'a + 1; b'), nodes=nodes)
+    new = parse(tokenize('test', 'a + 1; c'), nodes=nodes)
+    assert isinstance(old, ast.Block) and isinstance(new, ast.Block)
+
+    nodes.retain([new])
+
+    assert len(nodes) == 5
+    assert nodes.share(new.statements[0]) is new.statements[0]
+    other = parse(tokenize('test', 'c'))
+    assert other is not None
+    assert nodes.share(other) is new.statements[1]
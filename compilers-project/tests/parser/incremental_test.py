@@ -0,0 +1,133 @@
+import pytest
+import random
+from compiler.incremental import IncrementalParse, parse_buffer, reparse
+from compiler.parser import parse
+from compiler.token_buffer import tokenize_buffer, retokenize, SourceEdit
+from compiler.tokenizer import tokenize
+from compiler.visitor import walk
+import compiler.ast as ast
+
+filename = 'test'
+code = 'var x = 1;\n{ var y = x + 2;\n  y = y * 3 }\nwhile x < 10 do { x = x + 1 };\nx'
+
+
+def edit(source_code: str, offset: int, deleted: int, inserted: str) -> str:
+    return source_code[:offset] + inserted + source_code[offset + deleted:]
+
+
+def check_edit(source_code: str, offset: int, deleted: int, inserted: str) -> None:
+    parsed = parse_buffer(tokenize_buffer(filename, source_code))
+    change = retokenize(parsed.buffer, SourceEdit(offset, deleted, inserted))
+    new_code = edit(source_code, offset, deleted, inserted)
+    assert reparse(parsed, change) == parse(tokenize(filename, new_code))
+
+
+def test_reparse_keeps_unchanged_statements() -> None:
+    parsed = parse_buffer(tokenize_buffer(filename, code))
+    old = list(parsed.statements)
+    offset = code.index('2')
+    change = retokenize(parsed.buffer, SourceEdit(offset, 1, '42'))
+
+    assert reparse(parsed, change) == parse(
+        tokenize(filename, edit(code, offset, 1, '42')))
+    assert parsed.statements[0] is old[0]
+    assert parsed.statements[2] is old[2]
+    assert parsed.statements[3] is old[3]
+
+
+def test_reparse_keeps_statements_of_changed_block() -> None:
+    parsed = parse_buffer(tokenize_buffer(filename, code))
+    block = parsed.statements[1]
+    second = block.statements[1]  # type: ignore[attr-defined]
+    change = retokenize(parsed.buffer, SourceEdit(code.index('x + 2'), 1, 'z'))
+    reparse(parsed, change)
+
+    assert parsed.statements[1] is block
+    assert block.statements[1] is second  # type: ignore[attr-defined]
+
+
+def test_reparse_shifts_locations_after_edit() -> None:
+    parsed = parse_buffer(tokenize_buffer(filename, code))
+    change = retokenize(parsed.buffer, SourceEdit(0, 0, 'var w = 0;\n'))
+    reparse(parsed, change)
+
+    last = parsed.statements[-1]
+    assert (last.location.line, last.location.column) == (6, 1)
+
+
+@pytest.mark.parametrize('offset, deleted, inserted', [
+    (code.index('var y'), 4, ''),
+    (code.index('+ 2'), 3, '; 2'),
+    (code.index(';\nx'), 1, ''),
+    (code.index('}\nwhile'), 0, ';'),
+    (len(code), 0, '; x'),
+    (0, 0, '{ 0 };\n'),
+    (code.index('while'), 0, '1 + '),
+])
+def test_reparse_matches_full_parse(offset: int, deleted: int, inserted: str) -> None:
+    check_edit(code, offset, deleted, inserted)
+
+
+def test_reparse_after_error() -> None:
+    parsed = parse_buffer(tokenize_buffer(filename, 'a + b; c'))
+    with pytest.raises(Exception):
+        reparse(parsed, retokenize(parsed.buffer, SourceEdit(2, 1, '')))
+    change = retokenize(parsed.buffer, SourceEdit(2, 0, '*'))
+
+    assert reparse(parsed, change) == parse(tokenize(filename, 'a * b; c'))
+
+
+def full_parse(source_code: str) -> ast.Expression | None | Exception:
+    try:
+        return parse(tokenize(filename, source_code))
+    except Exception as e:
+        return e
+
+
+def check_edits(parsed: IncrementalParse, source_code: str,
+                edits: list[tuple[int, int, str]]) -> None:
+    """Applies the edits one at a time and compares the result and the
+    token ranges with those of a full parse after each of them."""
+    for offset, deleted, inserted in edits:
+        change = retokenize(parsed.buffer, SourceEdit(offset, deleted, inserted))
+        source_code = edit(source_code, offset, deleted, inserted)
+        expected = full_parse(source_code)
+        if isinstance(expected, Exception):
+            with pytest.raises(Exception):
+                reparse(parsed, change)
+            continue
+
+        assert reparse(parsed, change) == expected
+        if parsed.ast_node is None:
+            continue
+        fresh = parse_buffer(tokenize_buffer(filename, source_code))
+        assert fresh.ast_node is not None
+        for node, fresh_node in zip(walk(parsed.ast_node), walk(fresh.ast_node)):
+            assert parsed.spans.get(id(node)) == fresh.spans.get(id(fresh_node))
+
+
+@pytest.mark.parametrize('source_code, edits', [
+    # The unit value after the last ";" stands for the "}" of its block.
+    ('{ z; }', [(4, 0, '{')]),
+    # The deleted tokens were the last ones of a statement.
+    ('{ var x = 1; x = x + 2; { f(x); y } }', [(22, 3, '{'), (19, 3, '#c\n')]),
+])
+def test_reparse_matches_full_parse_after_edits(
+        source_code: str, edits: list[tuple[int, int, str]]) -> None:
+    parsed = parse_buffer(tokenize_buffer(filename, source_code))
+    check_edits(parsed, source_code, edits)
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_reparse_matches_full_parse_after_random_edits(seed: int) -> None:
+    pieces = ['{', '}', ';', ' ', 'x', '1', '+', '=', 'var ', 'if ', ' then ',
+              ' else ', 'while ', ' do ', 'f(', ')', ',', '#c\n', '\n']
+    rng = random.Random(seed)
+    source_code = code
+    parsed = parse_buffer(tokenize_buffer(filename, source_code))
+    for _ in range(40):
+        offset = rng.randint(0, len(source_code))
+        deleted = rng.randint(0, min(4, len(source_code) - offset))
+        inserted = ''.join(rng.choice(pieces) for _ in range(rng.randint(0, 2)))
+        check_edits(parsed, source_code, [(offset, deleted, inserted)])
+        source_code = edit(source_code, offset, deleted, inserted)
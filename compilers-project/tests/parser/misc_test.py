@@ -1,7 +1,9 @@
+import io
+from typing import Iterator
 import pytest
-from compiler.parser import parse
+from compiler.parser import parse, parse_iter
 import compiler.ast as ast
-from compiler.tokenizer import tokenize, AnyLocation
+from compiler.tokenizer import Token, tokenize, tokenize_stream, AnyLocation
 
 location = AnyLocation(
     file='test',
@@ -66,3 +68,38 @@ def test_top_level_expression_without_semicolon_raises_exception() -> None:
 
     error = f'Unexpected token: {unexpected}'
     assert str(excep_info.value) == error
+
+
+def test_parse_token_stream() -> None:
+    code = '{ var x = 1; while x < 3 do x = x + 1; x }'
+    stream = tokenize_stream('test', io.StringIO(code), chunk_size=4)
+    assert parse(stream) == parse(tokenize('test', code))
+
+
+def test_parse_iter_yields_statements_before_reading_the_rest() -> None:
+    code = 'var x = 1; { x } x + 1'
+    tokens = tokenize('test', code)
+    read = 0
+
+    def token_stream() -> Iterator[Token]:
+        nonlocal read
+        for token in tokens:
+            read += 1
+            yield token
+
+    statements = parse_iter(token_stream())
+
+    assert next(statements) == parse(tokenize('test', 'var x = 1'))
+    assert read == 5
+    block = parse(tokens)
+    assert isinstance(block, ast.Block)
+    assert list(statements) == block.statements[1:]
+
+
+def test_nodes_share_token_locations_and_have_no_dict() -> None:
+    tokens = tokenize('test', 'x + 1')
+    node = parse(tokens)
+    assert isinstance(node, ast.BinaryOp)
+    assert node.left.location is tokens[0].location
+    assert node.location is tokens[1].location
+    assert not hasattr(node, '__dict__')
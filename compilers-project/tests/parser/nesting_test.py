@@ -0,0 +1,35 @@
+from compiler.parser import parse
+import compiler.ast as ast
+from compiler.tokenizer import tokenize
+
+depth = 100_000
+
+
+def test_deeply_nested_parentheses() -> None:
+    input = tokenize('test', '(' * depth + '1' + ')' * depth + ' + 2')
+    result = parse(input)
+
+    assert isinstance(result, ast.BinaryOp)
+    assert result.left == ast.Literal(result.left.location, value=1)
+
+
+def test_deeply_nested_blocks() -> None:
+    input = tokenize('test', '{ ' * depth + 'x' + ' }' * depth)
+    node = parse(input)
+
+    for _ in range(depth):
+        assert isinstance(node, ast.Block) and len(node.statements) == 1
+        node = node.statements[0]
+    assert isinstance(node, ast.Identifier) and node.name == 'x'
+
+
+def test_deeply_nested_if_and_unary_ops() -> None:
+    input = tokenize('test', 'if a then - not ' * (depth // 10) + 'b')
+    node = parse(input)
+
+    for _ in range(depth // 10):
+        assert isinstance(node, ast.IfStatement)
+        assert isinstance(node.true_branch, ast.UnaryOp)
+        assert isinstance(node.true_branch.expr, ast.UnaryOp)
+        node = node.true_branch.expr.expr
+    assert isinstance(node, ast.Identifier) and node.name == 'b'
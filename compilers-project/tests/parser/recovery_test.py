@@ -0,0 +1,76 @@
+import pytest
+from compiler.cache import tokenize_and_parse
+from compiler.parser import parse, parse_recovering
+import compiler.ast as ast
+from compiler.tokenizer import tokenize
+
+
+def test_valid_program_has_no_diagnostics() -> None:
+    tokens = tokenize('test', 'var x = 1; { x = x + 1 }; x')
+    ast_node, diagnostics = parse_recovering(tokens)
+
+    assert diagnostics == []
+    assert ast_node == parse(tokens)
+
+
+def test_error_in_block_is_replaced_by_error_node() -> None:
+    ast_node, diagnostics = parse_recovering(
+        tokenize('test', '{ a + ; b }'))
+
+    assert len(diagnostics) == 1
+    assert isinstance(ast_node, ast.Block)
+    assert isinstance(ast_node.statements[0], ast.ErrorNode)
+    assert ast_node.statements[0].message == diagnostics[0]
+    assert isinstance(ast_node.statements[1], ast.Identifier)
+    assert ast_node.statements[1].name == 'b'
+
+
+def test_all_errors_are_reported() -> None:
+    source_code = '''
+    var x = ;
+    { if x then * 2; y };
+    f(1, 2;
+    while x do { z z };
+    x
+    '''
+    ast_node, diagnostics = parse_recovering(tokenize('test', source_code))
+
+    assert len(diagnostics) == 4
+    assert isinstance(ast_node, ast.Block)
+    assert isinstance(ast_node.statements[-1], ast.Identifier)
+
+
+def test_missing_closing_brace() -> None:
+    ast_node, diagnostics = parse_recovering(tokenize('test', '{ a; { b'))
+
+    # One error for each unclosed block
+    assert len(diagnostics) == 2
+    assert all(d.endswith('expected a "}"') for d in diagnostics)
+    assert isinstance(ast_node, ast.Block)
+
+
+def test_unmatched_closing_brace_is_skipped() -> None:
+    ast_node, diagnostics = parse_recovering(tokenize('test', 'a; b }; c'))
+
+    assert len(diagnostics) == 1
+    assert isinstance(ast_node, ast.Block)
+    assert [type(s) for s in ast_node.statements] == [ast.Identifier] * 3
+
+
+def test_tokenize_and_parse_raises_all_errors() -> None:
+    with pytest.raises(Exception) as e:
+        tokenize_and_parse('test', '{ a b }; var = 1; c')
+    assert len(str(e.value).splitlines()) == 2
+
+
+@pytest.mark.parametrize('source_code', ['}', '{ a } }', 'if a then { b } }'])
+def test_unmatched_closing_brace_at_the_end_is_skipped(
+        source_code: str) -> None:
+    _, diagnostics = parse_recovering(tokenize('test', source_code))
+
+    assert len(diagnostics) == 1
+
+
+def test_unmatched_closing_brace_raises_without_recovery() -> None:
+    with pytest.raises(Exception, match='expected integer, identifier'):
+        parse(tokenize('test', '{ a } }'))
@@ -0,0 +1,136 @@
+import pytest
+from compiler.hash_consing import NodeTable
+from compiler.interpreter import interpret
+from compiler.ir_generator import generate_ir
+from compiler.parser import parse, parse_iter
+from compiler.resolver import resolve, resolve_statements
+from compiler.symtab import SymTab, interpreter_locals, root_types
+from compiler.tokenizer import tokenize
+from compiler.type_checker import typecheck, typecheck_statements
+import compiler.ast as ast
+
+code = '''
+var x = 1;
+var y = x + 1;
+{ var x = x + 1; var z = x * 2; y = z };
+while x < 4 do { var x2 = x; x = x2 + 1; };
+{ var y = y; { x + y } }
+'''
+
+
+def parse_code(source: str) -> ast.Expression:
+    node = parse(tokenize('test', source))
+    assert node is not None
+    return node
+
+
+def test_variables_are_bound_to_depth_and_slot() -> None:
+    node = resolve(parse_code('{ var a = 1; var b = 2; { var c = a; b } }'))
+    assert isinstance(node, ast.Block)
+    assert node.frame_size == 2
+    inner = node.statements[2]
+    assert isinstance(inner, ast.Block)
+    assert inner.frame_size == 1
+    declaration = inner.statements[0]
+    assert isinstance(declaration, ast.VarDeclaration)
+    assert declaration.binding == (1, 0)
+    value = declaration.value
+    assert isinstance(value, ast.Identifier)
+    assert value.binding == (0, 0)
+    last = inner.statements[1]
+    assert isinstance(last, ast.Identifier)
+    assert last.binding == (0, 1)
+
+
+def test_declared_value_refers_to_outer_variable() -> None:
+    node = resolve(parse_code('{ var x = 1; { var x = x; x } }'))
+    assert isinstance(node, ast.Block)
+    inner = node.statements[1]
+    assert isinstance(inner, ast.Block)
+    declaration, last = inner.statements
+    assert isinstance(declaration, ast.VarDeclaration)
+    assert isinstance(declaration.value, ast.Identifier)
+    assert declaration.value.binding == (0, 0)
+    assert declaration.binding == (1, 0)
+    assert isinstance(last, ast.Identifier)
+    assert last.binding == (1, 0)
+
+
+def test_global_names_are_left_unbound() -> None:
+    node = resolve(parse_code('{ var x = read_int(); print_int(x); y }'))
+    assert isinstance(node, ast.Block)
+    call = node.statements[1]
+    assert isinstance(call, ast.FunctionCall)
+    assert call.name is not None and call.name.binding is None
+    last = node.statements[2]
+    assert isinstance(last, ast.Identifier)
+    assert last.binding is None
+
+
+def test_redeclaration_in_the_same_block_fails() -> None:
+    with pytest.raises(Exception, match='already defined'):
+        resolve(parse_code('{ var x = 1; var x = 2 }'))
+
+
+def test_passes_give_the_same_results_when_resolved() -> None:
+    plain = parse_code(code)
+    resolved = resolve(parse_code(code))
+
+    assert interpret(resolved, SymTab(locals=interpreter_locals)) \
+        == interpret(plain, SymTab(locals=interpreter_locals))
+    assert typecheck(resolved, SymTab(locals={})) \
+        == typecheck(plain, SymTab(locals={}))
+    assert [str(ins) for ins in generate_ir(root_types, resolved)] \
+        == [str(ins) for ins in generate_ir(root_types, plain)]
+
+
+def test_statements_are_resolved_in_the_scope_of_the_program() -> None:
+    statements = typecheck_statements(
+        resolve_statements(parse_iter(tokenize('test', code))),
+        SymTab(locals={}))
+    plain = parse_code(code)
+    typecheck(plain, SymTab(locals={}))
+
+    assert [str(ins) for ins in generate_ir(root_types, statements)] \
+        == [str(ins) for ins in generate_ir(root_types, plain)]
+
+
+def test_shared_nodes_with_the_same_binding_are_resolved() -> None:
+    source = '{ { var z = 1; z }; { var z = 1; z } }'
+    node = parse(tokenize('test', source), nodes=NodeTable())
+    assert node is not None
+    resolve(node, shared=True)
+    assert interpret(node, SymTab(locals=interpreter_locals)) == 1
+
+
+def test_shared_nodes_with_different_bindings_fail() -> None:
+    source = '{ { var x = 1; x }; { var y = 2; var x = 3; x } }'
+    node = parse(tokenize('test', source), nodes=NodeTable())
+    assert node is not None
+    with pytest.raises(Exception, match='different variables'):
+        resolve(node, shared=True)
+
+
+def test_many_statements_are_resolved() -> None:
+    lines = []
+    for n in range(150):
+        lines.append('{ var q = 2; var r = q; var s = r; s };')
+        lines.append(f'{{ var a{n} = 1; var b = a{n} + 1; b }};')
+    lines.append('1')
+    statements = resolve_statements(
+        parse_iter(tokenize('test', '\n'.join(lines))))
+
+    assert sum(1 for _ in statements) == 301
+
+
+def test_redeclaration_is_added_to_diagnostics() -> None:
+    diagnostics: list[str] = []
+    node = resolve(parse_code('{ var x = 1; var x = 2; x }'),
+                   diagnostics=diagnostics)
+
+    assert len(diagnostics) == 1
+    assert diagnostics[0].endswith('x is already defined')
+    assert isinstance(node, ast.Block)
+    declaration = node.statements[1]
+    assert isinstance(declaration, ast.VarDeclaration)
+    assert declaration.binding is None
@@ -0,0 +1,93 @@
+import pickle
+import pytest
+from compiler.batch import FrontEndResult
+from compiler.parser import parse, parse_recovering
+from compiler.serialization import MAGIC, deserialize, serialize
+from compiler.symtab import SymTab
+from compiler.tokenizer import Location, tokenize
+from compiler.type_checker import typecheck
+from compiler.type_definitions import Int, Unit
+import compiler.ast as ast
+
+code = '''
+var x = 1;
+var y: Int = -x;
+{ if x < 2 and not false then x = 5 else x = 3 };
+print_int(y);
+while x > 0 do { x = x - 1; };
+x
+'''
+
+
+def parse_code(source_code: str) -> ast.Expression:
+    node = parse(tokenize('test', source_code))
+    assert node is not None
+    return node
+
+
+@pytest.mark.parametrize('source_code', [
+    code, '1', 'true', 'f()', 'if a then b', '{ var b: Bool = true; }'
+])
+def test_round_trip(source_code: str) -> None:
+    node = parse_code(source_code)
+    assert deserialize(serialize(node)) == node
+
+
+def test_round_trip_keeps_types() -> None:
+    node = parse_code(code)
+    typecheck(node, SymTab(locals={}))
+    loaded = deserialize(serialize(node))
+
+    assert loaded == node
+    assert isinstance(loaded, ast.Block)
+    assert loaded.statements[-1].type is Int
+    assert loaded.statements[0].type is Unit
+
+
+def test_round_trip_keeps_locations() -> None:
+    node = parse_code('a +\n  b')
+    loaded = deserialize(serialize(node))
+
+    assert isinstance(loaded, ast.BinaryOp)
+    assert (loaded.right.location.line, loaded.right.location.column) == (2, 3)
+    assert loaded.right.location.offset == node.location.offset + 4
+
+
+def test_file_name_can_be_replaced() -> None:
+    loaded = deserialize(serialize(parse_code('a')), 'other')
+    assert loaded.location.file == 'other'
+
+
+def test_negative_and_large_values() -> None:
+    location = Location('test', 1, 1)
+    node = ast.Block(location, [ast.Literal(location, -5),
+                                ast.Literal(location, 1 << 40),
+                                ast.Literal(location, (1 << 63) - 1),
+                                ast.Literal(location, 1 << 63),
+                                ast.Literal(location, -(1 << 80))])
+    assert deserialize(serialize(node)) == node
+
+
+def test_error_nodes() -> None:
+    node, diagnostics = parse_recovering(tokenize('test', 'a; b c; d'))
+    assert node is not None and diagnostics
+    assert deserialize(serialize(node)) == node
+
+
+def test_smaller_than_pickle() -> None:
+    node = parse_code('; '.join(['{' + code + '}'] * 20))
+    assert len(serialize(node)) < len(pickle.dumps(node)) / 2
+
+
+def test_rejects_other_versions() -> None:
+    data = serialize(parse_code('a'))
+    with pytest.raises(Exception, match='Unsupported AST format version'):
+        deserialize(MAGIC + bytes([255]) + data[len(MAGIC) + 1:])
+    with pytest.raises(Exception, match='not a serialized AST'):
+        deserialize(b'junk')
+
+
+def test_front_end_result_pickles_ast_compactly() -> None:
+    node = parse_code(code)
+    result = FrontEndResult('test', ast_node=node)
+    assert pickle.loads(pickle.dumps(result)) == result
@@ -0,0 +1,66 @@
+import pytest
+from compiler.symtab import SymTab
+
+
+def test_inner_scope_shadows_outer_until_exited() -> None:
+    symtab = SymTab(locals={'x': 1})
+    with symtab.scope():
+        assert symtab.require('x') == 1
+        symtab.add_local('x', 2)
+        symtab.add_local('y', 3)
+        assert symtab.require('x') == 2
+    assert symtab.require('x') == 1
+    assert symtab.require('y') is None
+    assert 'y' not in symtab
+
+
+def test_add_local_fails_only_in_the_same_scope() -> None:
+    symtab = SymTab(locals={})
+    symtab.add_local('x', 1)
+    with pytest.raises(Exception, match='already defined'):
+        symtab.add_local('x', 2)
+    with symtab.scope():
+        assert not symtab.is_local('x')
+        symtab.add_local('x', 2)
+        assert symtab.is_local('x')
+
+
+def test_assign_sets_the_innermost_variable() -> None:
+    symtab = SymTab(locals={})
+    symtab.add_local('x', 1)
+    with symtab.scope():
+        symtab.assign('x', 2)
+        symtab.add_local('x', 3)
+        symtab.assign('x', 4)
+        assert symtab.require('x') == 4
+    assert symtab.require('x') == 2
+
+
+def test_scope_is_exited_when_an_error_is_raised() -> None:
+    symtab = SymTab(locals={})
+    with pytest.raises(Exception):
+        with symtab.scope(2):
+            symtab.add_local('x', 1)
+            raise Exception('error')
+    assert 'x' not in symtab
+    assert symtab.depth == 0
+    assert symtab.slots == []
+
+
+def test_slots_are_indexed_by_depth_and_slot() -> None:
+    symtab = SymTab(locals={})
+    with symtab.scope(2):
+        symtab.store((0, 1), 'b')
+        with symtab.scope(1):
+            symtab.store((1, 0), 'c')
+            assert symtab.load((0, 1)) == 'b'
+            assert symtab.load((1, 0)) == 'c'
+        # The innermost frame grows when needed.
+        symtab.store((0, 2), 'd')
+        assert symtab.slots == [None, 'b', 'd']
+
+
+def test_parent_table_is_rejected() -> None:
+    assert SymTab(locals={'a': 1}, parent=None).require('a') == 1
+    with pytest.raises(TypeError):
+        SymTab(locals={}, parent=SymTab(locals={}))  # type: ignore[arg-type]
@@ -0,0 +1,93 @@
+from compiler.tokenizer import tokenize
+from compiler.token_buffer import tokenize_buffer, tokenize_bytes, retokenize, SourceEdit, TokenChange, TokenBuffer, fixed_texts, UNRESOLVED
+from compiler.parser import parse
+
+filename = 'test'
+code = '{ var x = 1; /* comment */\nwhile x < 10 do {\n  x = x + 1\n}; x }'
+
+
+def test_buffer_matches_tokenize() -> None:
+    buffer = tokenize_buffer(filename, code)
+    assert [buffer.token(i) for i in range(len(buffer))] == tokenize(filename, code)
+
+
+def test_views_compare_equal_to_tokens() -> None:
+    assert list(tokenize_buffer(filename, code)) == tokenize(filename, code)
+
+
+def test_identifier_text_is_interned() -> None:
+    buffer = tokenize_buffer(filename, 'abc + abc')
+    assert buffer[0].text is buffer[2].text
+    assert buffer.texts == fixed_texts + ['abc']
+
+
+def test_view_locations() -> None:
+    buffer = tokenize_buffer(filename, 'a\n  b')
+    assert (buffer[1].location.line, buffer[1].location.column) == (2, 3)
+
+
+def test_parse_buffer() -> None:
+    assert parse(tokenize_buffer(filename, code)) == parse(
+        tokenize(filename, code))
+
+
+def buffer_tokens(buffer: TokenBuffer) -> list[tuple[str, str, int, int]]:
+    return [(buffer.text(i), buffer.type(i), buffer.start(i), buffer.end(i))
+            for i in range(len(buffer))]
+
+
+def test_retokenize_replaced_identifier() -> None:
+    buffer = tokenize_buffer(filename, 'a = b + c')
+    change = retokenize(buffer, SourceEdit(offset=4, deleted=1, inserted='bb'))
+
+    assert change == TokenChange(start=2, old_end=3, new_end=3)
+    assert buffer.source_code == 'a = bb + c'
+    assert buffer_tokens(buffer) == buffer_tokens(
+        tokenize_buffer(filename, 'a = bb + c'))
+
+
+def test_retokenize_joins_tokens() -> None:
+    buffer = tokenize_buffer(filename, 'x < = y')
+    change = retokenize(buffer, SourceEdit(offset=3, deleted=1, inserted=''))
+
+    assert change == TokenChange(start=1, old_end=3, new_end=2)
+    assert buffer.text(1) == '<='
+
+
+def test_retokenize_closing_comment() -> None:
+    buffer = tokenize_buffer(filename, 'a /* b + c d')
+    change = retokenize(buffer, SourceEdit(offset=11, deleted=0, inserted='*/ '))
+
+    assert change == TokenChange(start=1, old_end=6, new_end=1)
+    assert buffer_tokens(buffer) == [('a', 'identifier', 0, 1), ('d', 'identifier', 14, 15)]
+
+
+def test_retokenize_edits_in_sequence() -> None:
+    source = 'var x = 1;\nwhile x < 10 do x = x + 1;\nprint_int(x)'
+    buffer = tokenize_buffer(filename, source)
+    edits = [
+        SourceEdit(offset=8, deleted=1, inserted='100'),
+        SourceEdit(offset=0, deleted=0, inserted='# comment\n'),
+        SourceEdit(offset=30, deleted=2, inserted='y'),
+        SourceEdit(offset=20, deleted=0, inserted='/* x */')
+    ]
+    for edit in edits:
+        retokenize(buffer, edit)
+        source = source[:edit.offset] + edit.inserted + \
+            source[edit.offset + edit.deleted:]
+        assert buffer_tokens(buffer) == buffer_tokens(
+            tokenize_buffer(filename, source))
+
+
+def test_bytes_match_str() -> None:
+    buffer = tokenize_bytes(filename, memoryview(code.encode()))
+    assert list(buffer) == tokenize(filename, code)
+
+
+def test_bytes_decode_text_on_demand() -> None:
+    buffer = tokenize_bytes(filename, b'var abc = 12')
+    assert list(buffer.text_ids) == [
+        fixed_texts.index('var'), UNRESOLVED, fixed_texts.index('='), UNRESOLVED]
+
+    assert buffer.text(1) == 'abc'
+    assert buffer.texts[buffer.text_ids[1]] == 'abc'
@@ -1,4 +1,5 @@
-from compiler.tokenizer import tokenize, Location, AnyLocation, Token
+import io
+from compiler.tokenizer import tokenize, tokenize_stream, Location, AnyLocation, Token, LineIndex
 
 
 filename = 'test'
@@ -372,3 +373,94 @@ def test_locations_are_equal() -> None:
 
 def test_empty_returns_nothing() -> None:
     assert tokenize(filename, '') == []
+
+
+def test_unknown_characters_are_skipped() -> None:
+    tokens = [
+        Token(
+            text='a',
+            type='identifier',
+            location=location
+        ),
+        Token(
+            text='b',
+            type='identifier',
+            location=location
+        )
+    ]
+    assert tokenize(filename, 'a @ $b') == tokens
+
+
+def test_keyword_prefix_is_identifier() -> None:
+    tokens = [
+        Token(
+            text='iffy',
+            type='identifier',
+            location=location
+        ),
+        Token(
+            text='notes',
+            type='identifier',
+            location=location
+        ),
+        Token(
+            text='not',
+            type='unary_op',
+            location=location
+        )
+    ]
+    assert tokenize(filename, 'iffy notes not') == tokens
+
+
+def test_stream_matches_tokenize() -> None:
+    code = 'var x = 1; /* a\nmultiline comment */\n# comment\nwhile x < 10 do x = x + 1'
+    stream = io.StringIO(code)
+    assert list(tokenize_stream(filename, stream, chunk_size=3)) == tokenize(filename, code)
+
+
+def test_stream_decodes_binary_input() -> None:
+    code = 'print_int(123) // comment\n{ a }'
+    stream = io.BytesIO(code.encode())
+    assert list(tokenize_stream(filename, stream, chunk_size=2)) == tokenize(filename, code)
+
+
+def test_token_lines_and_columns() -> None:
+    tokens = tokenize(filename, 'a\n  b /* c\n */ d\n\n\te')
+    positions = [(t.text, t.location.line, t.location.column) for t in tokens]
+    assert positions == [('a', 1, 1), ('b', 2, 3), ('d', 3, 5), ('e', 5, 2)]
+
+
+def test_stream_lines_and_columns() -> None:
+    code = 'var x = 1;\nx = 2;\n  x'
+    stream = io.StringIO(code)
+    last = list(tokenize_stream(filename, stream, chunk_size=2))[-1]
+    assert (last.location.line, last.location.column) == (3, 3)
+
+
+def test_line_index() -> None:
+    index = LineIndex('ab\ncd\n')
+    assert index.line_and_column(0) == (1, 1)
+    assert index.line_and_column(2) == (1, 3)
+    assert index.line_and_column(3) == (2, 1)
+    assert index.line_and_column(6) == (3, 1)
+
+
+def test_identifiers_are_interned() -> None:
+    first, second = tokenize(filename, 'counter counter')
+    assert first.text is second.text
+
+
+def test_keyword_after_integer_is_identifier() -> None:
+    tokens = [
+        Token(
+            text='3',
+            type='integer',
+            location=location
+        ),
+        Token(
+            text='if',
+            type='identifier',
+            location=location
+        )
+    ]
+    assert tokenize(filename, '3if') == tokens
@@ -0,0 +1,141 @@
+import pytest
+from compiler.incremental_type_checker import IncrementalTypeChecker
+from compiler.parser import parse, parse_iter, parse_recovering
+from compiler.resolver import resolve_statements
+from compiler.symtab import SymTab
+from compiler.tokenizer import tokenize
+from compiler.type_checker import (typecheck, typecheck_recovering,
+                                   typecheck_statements)
+from compiler.type_definitions import Bool, Error, Int, Unit
+import compiler.ast as ast
+
+
+def parse_code(source: str) -> ast.Expression:
+    node = parse(tokenize('test', source))
+    assert node is not None
+    return node
+
+
+def test_all_type_errors_are_reported() -> None:
+    node = parse_code('''
+    var x = 1 + true;
+    if 3 then 1;
+    while 1 do 2;
+    undefined
+    ''')
+
+    _, diagnostics = typecheck_recovering(node, SymTab(locals={}))
+
+    assert len(diagnostics) == 4
+    assert 'Operator + expected two Ints' in diagnostics[0]
+    assert 'If condition was' in diagnostics[1]
+    assert 'while loop condition must be type Bool' in diagnostics[2]
+    assert 'Unknown identifier undefined' in diagnostics[3]
+
+
+def test_messages_have_the_location() -> None:
+    node = parse_code('1 + true')
+
+    _, diagnostics = typecheck_recovering(node, SymTab(locals={}))
+
+    assert diagnostics == [
+        f'{node.location}: Operator + expected two Ints, got {Int} and {Bool}']
+
+
+def test_errors_are_not_reported_again_by_enclosing_expressions() -> None:
+    node = parse_code('''
+    var x = 1 + true;
+    var y: Int = x * 2;
+    if x < 3 then { x } else { 1 == 2 };
+    -x;
+    print_int(y)
+    ''')
+
+    _, diagnostics = typecheck_recovering(node, SymTab(locals={}))
+
+    assert len(diagnostics) == 1
+
+
+def test_expression_with_an_error_has_the_error_type() -> None:
+    node = parse_code('var x = 1 + true; x')
+    assert isinstance(node, ast.Block)
+
+    node_type, _ = typecheck_recovering(node, SymTab(locals={}))
+
+    assert node.statements[0].type is Unit
+    assert node.statements[1].type is Error
+    assert node_type is Unit
+
+
+def test_declared_type_is_kept_after_an_error() -> None:
+    node = parse_code('var x: Int = true; x + 1')
+    assert isinstance(node, ast.Block)
+
+    _, diagnostics = typecheck_recovering(node, SymTab(locals={}))
+
+    assert len(diagnostics) == 1
+    assert 'expected Int' in diagnostics[0]
+    assert node.statements[1].type is Int
+
+
+def test_redeclaration_is_reported() -> None:
+    node = parse_code('var x = 1; var x = 2; x + true')
+
+    _, diagnostics = typecheck_recovering(node, SymTab(locals={}))
+
+    assert len(diagnostics) == 2
+    assert 'already been declared' in diagnostics[0]
+
+
+def test_without_diagnostics_the_first_error_is_raised() -> None:
+    node = parse_code('1 + true; if 3 then 1')
+
+    with pytest.raises(Exception, match='expected two Ints'):
+        typecheck(node, SymTab(locals={}))
+
+
+def test_statements_are_checked_past_errors() -> None:
+    diagnostics: list[str] = []
+    statements = typecheck_statements(
+        parse_iter(tokenize('test', '1 + true; 2; not 3; 4')),
+        SymTab(locals={}), diagnostics)
+
+    checked = list(statements)
+
+    assert len(checked) == 4
+    assert len(diagnostics) == 2
+
+
+def test_syntax_errors_are_not_reported_again() -> None:
+    node, syntax_errors = parse_recovering(
+        tokenize('test', 'var x = ; 1 + true'))
+    assert node is not None and syntax_errors
+
+    _, diagnostics = typecheck_recovering(node, SymTab(locals={}))
+
+    assert len(diagnostics) == 1
+    assert 'expected two Ints' in diagnostics[0]
+
+
+def test_incremental_checker_reports_errors_of_reused_code_again() -> None:
+    diagnostics: list[str] = []
+    checker = IncrementalTypeChecker(diagnostics=diagnostics)
+
+    checker.typecheck(parse_code('var x = 1; x + true'), SymTab(locals={}))
+    checker.typecheck(parse_code('var x = 1; x + true'), SymTab(locals={}))
+
+    assert len(diagnostics) == 2
+    assert diagnostics[0] == diagnostics[1]
+
+
+def test_resolver_and_type_errors_are_reported_together() -> None:
+    diagnostics: list[str] = []
+    statements = typecheck_statements(
+        resolve_statements(
+            parse_iter(tokenize('test', '1 + true; { var a = 1; var a = 2 }; false + 1')),
+            diagnostics=diagnostics),
+        SymTab(locals={}), diagnostics)
+
+    assert len(list(statements)) == 3
+    assert len(diagnostics) == 3
+    assert diagnostics[1].endswith('a is already defined')
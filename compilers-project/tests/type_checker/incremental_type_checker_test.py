@@ -0,0 +1,123 @@
+import pytest
+from compiler.incremental_type_checker import IncrementalTypeChecker
+from compiler.parser import parse
+from compiler.symtab import SymTab
+from compiler.tokenizer import tokenize
+from compiler.type_checker import typecheck
+from compiler.type_definitions import Bool, Int
+import compiler.ast as ast
+
+code = '''
+var x = 1;
+var y = x + 1;
+{ var z = y * 2; y = z };
+while x < 10 do { x = x + 1; };
+print_int(y);
+y
+'''
+
+
+def parse_code(source: str) -> ast.Expression:
+    node = parse(tokenize('test', source))
+    assert node is not None
+    return node
+
+
+def test_types_are_the_same_as_with_typecheck() -> None:
+    plain = parse_code(code)
+    typecheck(plain, SymTab(locals={}))
+    checked = IncrementalTypeChecker().typecheck(parse_code(code),
+                                                 SymTab(locals={}))
+    assert isinstance(plain, ast.Block) and isinstance(checked, ast.Block)
+    # Names of declarations are not checked, but are shared with the
+    # identifiers that read them, so only the statements are compared.
+    assert [s.type for s in checked.statements] == \
+        [s.type for s in plain.statements]
+    assert checked.type is plain.type
+
+
+def test_unchanged_statements_are_reused() -> None:
+    checker = IncrementalTypeChecker()
+    checker.typecheck(parse_code(code), SymTab(locals={}))
+    assert checker.hits == 0
+
+    checker.hits = checker.misses = 0
+    checker.typecheck(parse_code(code.replace('z };', 'z + 0 };')),
+                      SymTab(locals={}))
+    # The changed block and the statement in it that changed
+    assert checker.misses == 2
+    assert checker.hits == 6
+    assert checker.hit_ratio == 6 / 8
+
+
+def test_statements_reading_a_changed_variable_are_checked() -> None:
+    checker = IncrementalTypeChecker()
+    checker.typecheck(parse_code('var a = 1; var b = a; b'), SymTab(locals={}))
+    checker.hits = checker.misses = 0
+
+    root = checker.typecheck(parse_code('var a = true; var b = a; b'),
+                             SymTab(locals={}))
+    assert checker.hits == 0
+    assert isinstance(root, ast.Block)
+    assert root.statements[2].type is Bool
+
+    with pytest.raises(Exception, match='expected two Ints'):
+        checker.typecheck(parse_code('var a = true; var b = a; b + 1'),
+                          SymTab(locals={}))
+
+
+def test_reused_declarations_are_added_to_the_scope() -> None:
+    checker = IncrementalTypeChecker()
+    checker.typecheck(parse_code('var a = 1; a'), SymTab(locals={}))
+    root = checker.typecheck(parse_code('var a = 1; a + a'), SymTab(locals={}))
+    assert checker.hits == 1
+    assert isinstance(root, ast.Block)
+    assert root.statements[1].type is Int
+
+
+def test_redeclaration_is_not_reused() -> None:
+    checker = IncrementalTypeChecker()
+    checker.typecheck(parse_code('{ var a = 1 }'), SymTab(locals={}))
+    with pytest.raises(Exception, match='already been declared'):
+        checker.typecheck(parse_code('{ var a = 2; var a = 1 }'),
+                          SymTab(locals={}))
+
+
+def test_inputs_are_free_reads_and_declarations() -> None:
+    checker = IncrementalTypeChecker()
+    inputs = checker.inputs_of(
+        checker.nodes.share(parse_code('{ var a = b; { var c = a + d } }')))
+    assert inputs.reads == ('b', 'd')
+    assert inputs.declares == ()
+    inputs = checker.inputs_of(
+        checker.nodes.share(parse_code('var a = b + a')))
+    assert inputs.reads == ('b', 'a')
+    assert inputs.declares == ('a',)
+
+
+def test_errors_have_locations_in_the_current_program() -> None:
+    diagnostics: list[str] = []
+    checker = IncrementalTypeChecker(diagnostics=diagnostics)
+    checker.typecheck(parse_code('var a = 1;\n\n\n\n   a + 1'),
+                      SymTab(locals={}))
+    node = parse_code('var a = true; a + 1')
+    checker.typecheck(node, SymTab(locals={}))
+
+    assert isinstance(node, ast.Block)
+    assert diagnostics == [
+        f'{node.statements[1].location}: Operator + expected two Ints, '
+        f'got {Bool} and {Int}']
+    assert node.statements[1].location.line == 1
+
+
+def test_nodes_of_old_programs_are_dropped() -> None:
+    checker = IncrementalTypeChecker()
+    for i in range(50):
+        source = f'var a = {i}; var b = a + 1; b * {i}'
+        node = parse(tokenize('test', source), nodes=checker.nodes)
+        assert node is not None
+        checker.typecheck(node, SymTab(locals={}))
+
+    assert len(checker.nodes) < 40
+    assert len(checker.results) < 10
+    assert len(checker.inputs) < 10
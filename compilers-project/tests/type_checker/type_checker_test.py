@@ -1,8 +1,8 @@
 import pytest
 from typing import cast
 from compiler.tokenizer import tokenize
-from compiler.parser import parse
-from compiler.type_checker import typecheck
+from compiler.parser import parse, parse_iter
+from compiler.type_checker import typecheck, typecheck_statements
 from compiler.type_definitions import BasicType, Bool, Int, Unit, FunType
 from compiler.symtab import SymTab
 import compiler.ast as ast
@@ -174,7 +174,7 @@ def test_or_operator_requires_bool() -> None:
 
 def test_typechecking_function_call() -> None:
     input = parse(tokenize('test', 'print_int(1)'))
-    expected = FunType(name='print_int', args=[Int], return_type=Unit)
+    expected = FunType(name='print_int', args=(Int,), return_type=Unit)
 
     assert typecheck(input, SymTab(locals={}, parent=None)) == expected
 
@@ -241,3 +241,21 @@ def test_typechecker_sets_node_type() -> None:
     # if statement
     while_body = cast(ast.Block, while_loop.body)
     assert while_body.statements[0].type == Int
+
+
+def test_typecheck_statements_share_program_scope() -> None:
+    statements = typecheck_statements(
+        parse_iter(tokenize('test', 'var x = 1 < 2; x and true')),
+        SymTab(locals={}, parent=None))
+
+    assert [statement.type for statement in statements] == [Unit, Bool]
+
+
+def test_typecheck_statements_stops_at_first_error() -> None:
+    statements = typecheck_statements(
+        parse_iter(tokenize('test', 'var x = 1; x and true; y')),
+        SymTab(locals={}, parent=None))
+
+    assert next(statements).type == Unit
+    with pytest.raises(Exception):
+        next(statements)
@@ -0,0 +1,28 @@
+import copy
+import pickle
+from compiler.type_definitions import BasicType, Bool, FunType, Int, Type, Unit
+
+
+def test_equal_types_are_the_same_object() -> None:
+    assert BasicType('Int') is Int
+    assert FunType('f', (Int, Bool), Unit) is \
+        FunType(name='f', args=(BasicType('Int'), Bool), return_type=Unit)
+    assert FunType('f', (Int,), Unit) is not FunType('f', (Bool,), Unit)
+    assert Type('Int') is not Int
+
+
+def test_function_arguments_are_a_tuple() -> None:
+    f = FunType('f', [Int], None)  # type: ignore[arg-type]
+    assert f.args == (Int,)
+    assert f is FunType('f', (Int,), None)
+
+
+def test_types_can_be_dict_keys() -> None:
+    names = {Int: 'Int', FunType('f', (Int,), Unit): 'f'}
+    assert names[FunType('f', (Int,), Unit)] == 'f'
+
+
+def test_copied_and_unpickled_types_are_interned() -> None:
+    f = FunType('f', (Int,), Unit)
+    assert copy.deepcopy(f) is f
+    assert pickle.loads(pickle.dumps(f)) is f
@@ -0,0 +1,88 @@
+import pytest
+from compiler.arena import arena_from_tree
+from compiler.interpreter import Interpreter
+from compiler.ir_generator import IRGenerator
+from compiler.parser import parse
+from compiler.symtab import SymTab
+from compiler.tokenizer import tokenize
+from compiler.type_checker import TypeChecker
+from compiler.visitor import Transformer, Visitor, node_classes, post_order
+import compiler.ast as ast
+
+
+def parse_code(source_code: str) -> ast.Expression:
+    node = parse(tokenize('test', source_code))
+    assert node is not None
+    return node
+
+
+class NodeCounter(Visitor[None, int]):
+    def visit_BinaryOp(self, node: ast.BinaryOp, context: None) -> int:
+        return 1 + self.visit(node.left, context) + self.visit(node.right, context)
+
+    def visit_default(self, node: ast.Expression, context: None) -> int:
+        return 1
+
+
+class ConstantFolder(Transformer):
+    def transform_BinaryOp(self, node: ast.BinaryOp) -> ast.Expression:
+        left, right = node.left, node.right
+        if (node.op == '+' and isinstance(left, ast.Literal)
+                and isinstance(right, ast.Literal)
+                and type(left.value) is int and type(right.value) is int):
+            return ast.Literal(node.location, left.value + right.value)
+        return node
+
+
+def test_passes_handle_every_node_class() -> None:
+    for dispatch in [TypeChecker.dispatch, Interpreter.dispatch, IRGenerator.dispatch]:
+        assert set(dispatch) >= set(node_classes) - {ast.ErrorNode}
+
+
+def test_node_classes_are_the_classes_of_the_ast_module() -> None:
+    assert all(getattr(ast, node_class.__name__) is node_class
+               for node_class in node_classes)
+    assert len({node_class.__name__ for node_class in node_classes}) \
+        == len(node_classes)
+
+
+def test_visit_dispatches_on_node_class() -> None:
+    assert NodeCounter().visit(parse_code('1 + 2 * x'), None) == 5
+
+
+def test_subclasses_of_node_classes_use_their_base_method() -> None:
+    view = arena_from_tree(parse_code('1 + 2 * x')).view()
+    assert type(view) is not ast.BinaryOp
+    assert NodeCounter().visit(view, None) == 5
+
+
+def test_unsupported_node_raises() -> None:
+    with pytest.raises(Exception, match='Unknown AST type'):
+        TypeChecker().visit(ast.ErrorNode(parse_code('a').location, 'error'),
+                            SymTab(locals={}))
+
+
+def test_post_order_yields_children_first() -> None:
+    node = parse_code('f(a, b + c)')
+    names = [n.name if isinstance(n, ast.Identifier) else type(n).__name__
+             for n in post_order(node)]
+    assert names == ['f', 'a', 'b', 'c', 'BinaryOp', 'FunctionCall']
+
+
+def test_transformer_folds_constants() -> None:
+    node = ConstantFolder().transform(parse_code('{ x = 1 + 2 + 3; 4 + x }'))
+    assert isinstance(node, ast.Block)
+    assignment = node.statements[0]
+    assert isinstance(assignment, ast.BinaryOp)
+    assert assignment.right == ast.Literal(assignment.right.location, 6)
+    assert isinstance(node.statements[1], ast.BinaryOp)
+
+
+def test_transformer_handles_deep_trees() -> None:
+    depth = 20000
+    node = parse_code('{ ' * depth + '1 + 1' + ' }' * depth)
+    folded = ConstantFolder().transform(node)
+    for _ in range(depth):
+        assert isinstance(folded, ast.Block)
+        folded = folded.statements[0]
+    assert folded == ast.Literal(folded.location, 2)